@@ -129,19 +129,20 @@ def export_geojson(project_id, **context):
         return False
 
 def export_to_superset(**context):
-    """Exporter les données vers Apache Superset"""
+    """Exporter vers Apache Superset les changements depuis la dernière synchronisation"""
     try:
         analysis_result = context['task_instance'].xcom_pull(key='analysis_result')
         project_id = analysis_result.get('project_id')
         
         response = requests.post(
             f'{BIMEX_API_URL}/bi/export-superset',
-            data={'project_id': project_id},
+            data={'project_id': project_id, 'incremental': 'true'},
             timeout=120
         )
         
         if response.status_code == 200:
-            print("Export vers Superset réussi")
+            result = response.json()
+            print(f"Export vers Superset réussi (changements: {result.get('changes')}, filigrane: {result.get('watermark')})")
             return True
         else:
             print(f"Erreur export Superset: {response.text}")
@@ -0,0 +1,113 @@
+"""
+Client HTTP asynchrone partagé pour les connecteurs BI
+Pool de connexions keep-alive, limite de concurrence par connecteur,
+timeouts et reprises automatiques avec backoff exponentiel
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger("BI_Integration")
+
+# Statuts transitoires justifiant une nouvelle tentative
+RETRY_STATUSES_ANY = {429, 503}          # la requête n'a pas été traitée
+RETRY_STATUSES_IDEMPOTENT = {502, 504}   # la requête a pu être traitée
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class BIHttpClient:
+    """🚀 Client HTTP asynchrone mutualisé entre tous les connecteurs BI"""
+
+    def __init__(self, max_connections: int = 50, max_keepalive: int = 20,
+                 timeout: float = 30.0, max_retries: int = 3, backoff_factor: float = 0.5):
+        """
+        Args:
+            max_connections: Nombre maximal de connexions ouvertes (tous hôtes confondus)
+            max_keepalive: Nombre de connexions conservées ouvertes entre deux requêtes
+            timeout: Timeout par défaut (secondes) si le connecteur n'en définit pas
+            max_retries: Nombre de nouvelles tentatives sur erreur transitoire
+            backoff_factor: Délai de base du backoff exponentiel (secondes)
+        """
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Client et sémaphores sont liés à la boucle d'événements courante"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            # Boucle différente (ex: asyncio.run successifs côté Airflow): repartir de zéro
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._loop = loop
+            self._semaphores = {}
+        return self._client
+
+    def _get_semaphore(self, connector) -> asyncio.Semaphore:
+        if connector.name not in self._semaphores:
+            self._semaphores[connector.name] = asyncio.Semaphore(max(1, connector.max_concurrency))
+        return self._semaphores[connector.name]
+
+    async def request(self, connector, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Envoie une requête pour un connecteur en respectant sa limite de concurrence
+
+        Args:
+            connector: BIConnector émetteur (nom, max_concurrency, timeout)
+            method: Méthode HTTP
+            url: URL cible
+            **kwargs: Arguments transmis à httpx (json, data, files, headers, ...)
+
+        Returns:
+            Réponse HTTP de la dernière tentative
+        """
+        method = method.upper()
+        client = self._get_client()
+        kwargs.setdefault("timeout", connector.timeout or self.timeout)
+
+        async with self._get_semaphore(connector):
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                    # Requête jamais émise: nouvelle tentative sans risque
+                    if last_attempt:
+                        raise
+                    logger.warning(f"{connector.name}: connexion impossible ({e}), tentative {attempt + 1}/{self.max_retries}")
+                except httpx.TransportError as e:
+                    if last_attempt or method not in IDEMPOTENT_METHODS:
+                        raise
+                    logger.warning(f"{connector.name}: erreur réseau ({e}), tentative {attempt + 1}/{self.max_retries}")
+                else:
+                    retryable = response.status_code in RETRY_STATUSES_ANY or (
+                        method in IDEMPOTENT_METHODS and response.status_code in RETRY_STATUSES_IDEMPOTENT
+                    )
+                    if not retryable or last_attempt:
+                        return response
+                    logger.warning(f"{connector.name}: HTTP {response.status_code}, tentative {attempt + 1}/{self.max_retries}")
+
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def get(self, connector, url: str, **kwargs) -> httpx.Response:
+        return await self.request(connector, "GET", url, **kwargs)
+
+    async def post(self, connector, url: str, **kwargs) -> httpx.Response:
+        return await self.request(connector, "POST", url, **kwargs)
+
+    async def aclose(self):
+        """Ferme les connexions du pool"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._semaphores = {}
+
+
+# Instance partagée par tous les connecteurs BI
+bi_http_client = BIHttpClient()
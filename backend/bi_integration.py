@@ -7,17 +7,20 @@ Connexion directe aux modèles BIM pour export automatique
 import os
 import json
 import asyncio
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import logging
 from dataclasses import dataclass
 import uuid
 import base64
+import hashlib
 from urllib.parse import urlencode
 
+from bi_http_client import bi_http_client
+from bi_sync_store import BISyncStore, SyncHistory, StaleDeltaError, delta_has_changes
+
 # Configuration du logger
 logger = logging.getLogger("BI_Integration")
 logger.setLevel(logging.INFO)
@@ -40,6 +43,8 @@ class BIConnector:
     credentials: Dict[str, str]
     active: bool = True
     last_sync: Optional[datetime] = None
+    max_concurrency: int = 4  # Requêtes simultanées maximum vers cette plateforme
+    timeout: float = 30.0  # Timeout HTTP en secondes
 
 class BusinessIntelligenceManager:
     """🚀 Gestionnaire principal des intégrations BI"""
@@ -47,7 +52,9 @@ class BusinessIntelligenceManager:
     def __init__(self):
         self.connectors: Dict[str, BIConnector] = {}
         self.model_cache: Dict[str, BIMModelData] = {}
-        self.sync_history: List[Dict] = []
+        # Instantanés exportés, filigranes et historique persistés entre redémarrages
+        self.sync_store = BISyncStore(Path("bi_sync.db"))
+        self.sync_history = SyncHistory(self.sync_store)
         self.config_path = Path("bi_config.json")
         self.load_configuration()
         
@@ -127,7 +134,9 @@ class BusinessIntelligenceManager:
                         "endpoint": conn.endpoint,
                         "credentials": conn.credentials,
                         "active": conn.active,
-                        "last_sync": conn.last_sync.isoformat() if conn.last_sync else None
+                        "last_sync": conn.last_sync.isoformat() if conn.last_sync else None,
+                        "max_concurrency": conn.max_concurrency,
+                        "timeout": conn.timeout
                     }
                     for conn in self.connectors.values()
                 ]
@@ -137,6 +146,45 @@ class BusinessIntelligenceManager:
         except Exception as e:
             logger.error(f"Erreur sauvegarde config BI: {e}")
 
+    def compute_delta(self, project_id: str, connector: BIConnector, bim_data: Dict[str, Any]) -> Dict[str, Any]:
+        """🔄 Lignes modifiées depuis le dernier export de ce projet vers ce connecteur"""
+        return self.sync_store.compute_delta(project_id, connector.name, bim_data)
+
+    def record_sync(self, project_id: str, connector: BIConnector, platform: str,
+                    result: Dict[str, Any], delta: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Enregistre une synchronisation dans l'historique
+
+        Si elle a réussi et qu'un delta est fourni, les tables que le connecteur
+        déclare avoir envoyées (result["synced_tables"]) sont reportées dans son
+        instantané et son filigrane est avancé. Si une autre synchronisation l'a
+        avancé entre-temps, l'instantané est laissé tel quel: le prochain delta
+        sera recalculé à partir de celui-ci.
+
+        Returns:
+            Nouveau filigrane {"version", "synced_at"} ou None
+        """
+        watermark = None
+        if result.get("success"):
+            connector.last_sync = datetime.now()
+            if delta is not None:
+                try:
+                    watermark = self.sync_store.commit_delta(delta, result.get("synced_tables", []))
+                except StaleDeltaError as e:
+                    logger.warning(f"Instantané non mis à jour: {e}")
+
+        self.sync_history.append({
+            "timestamp": datetime.now().isoformat(),
+            "project_id": project_id,
+            "platform": platform,
+            "connector": connector.name,
+            "status": "success" if result.get("success") else "error",
+            "message": result.get("message", result.get("error", "")),
+            "changes": delta["summary"] if delta else None,
+            "watermark": watermark
+        })
+        return watermark
+
     async def extract_bim_data_for_bi(self, project_id: str, model_path: str) -> Dict[str, Any]:
         """🔍 Extrait les données BIM optimisées pour les plateformes BI"""
         try:
@@ -267,11 +315,50 @@ class BusinessIntelligenceManager:
 class SupersetConnector:
     """🟡 Connecteur Apache Superset pour dashboards open-source"""
 
+    # Jetons partagés entre instances (une instance est créée par requête API)
+    _token_cache: Dict[str, Tuple[str, datetime]] = {}
+    # Durée de vie par défaut d'un jeton JWT Superset (JWT_ACCESS_TOKEN_EXPIRES)
+    DEFAULT_TOKEN_LIFETIME = timedelta(minutes=15)
+    # Marge avant expiration pour ne pas utiliser un jeton sur le point d'expirer
+    TOKEN_EXPIRY_MARGIN = timedelta(seconds=60)
+    # Lignes par requête d'insertion (Power BI accepte 10 000 lignes par POST)
+    BATCH_SIZE = 5000
+    progress_dir = Path("bi_export_progress")
+    # Colonnes recalculées à chaque extraction, exclues de l'empreinte de reprise
+    VOLATILE_COLUMNS = {"AnalysisDate"}
+    # Tables suivies (BISyncStore) effectivement poussées vers la plateforme
+    SYNCED_TABLES = ("elements",)
+
     def __init__(self, connector_config: BIConnector):
         self.config = connector_config
         self.access_token = None
         self.token_expires = None
 
+        cached = self._token_cache.get(self.config.name)
+        if cached:
+            self.access_token, self.token_expires = cached
+
+    def token_valid(self) -> bool:
+        """Le jeton courant existe et n'expire pas avant la marge de sécurité"""
+        return bool(self.access_token) and self.token_expires is not None and \
+            datetime.now() + self.TOKEN_EXPIRY_MARGIN < self.token_expires
+
+    def _store_token(self, token: Optional[str], expires: datetime):
+        self.access_token = token
+        self.token_expires = expires
+        self._token_cache[self.config.name] = (token, expires)
+
+    @staticmethod
+    def _jwt_expiration(token: str) -> Optional[datetime]:
+        """Lit la date d'expiration (claim exp) d'un jeton JWT sans vérifier sa signature"""
+        try:
+            payload = token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return datetime.fromtimestamp(claims['exp'])
+        except Exception:
+            return None
+
     async def authenticate(self) -> bool:
         """Authentification avec Apache Superset"""
         try:
@@ -285,40 +372,57 @@ class SupersetConnector:
                     'provider': 'db'
                 }
 
-                response = requests.post(auth_url, json=data)
+                response = await bi_http_client.post(self.config, auth_url, json=data)
                 if response.status_code == 200:
-                    token_data = response.json()
-                    self.access_token = token_data.get('access_token')
-                    logger.info("Authentification Superset réussie")
+                    token = response.json().get('access_token')
+                    expires = self._jwt_expiration(token) if token else None
+                    self._store_token(token, expires or datetime.now() + self.DEFAULT_TOKEN_LIFETIME)
+                    logger.info(f"Authentification Superset réussie (jeton valide jusqu'à {self.token_expires:%H:%M:%S})")
                     return True
             else:
-                # Utiliser l'API key directement
-                self.access_token = self.config.credentials.get('api_key')
+                # Utiliser l'API key directement (pas d'expiration)
+                self._store_token(self.config.credentials.get('api_key'), datetime.max)
                 logger.info("API Key Superset configurée")
                 return True
 
         except Exception as e:
             logger.error(f"Erreur authentification Superset: {e}")
             # En mode démo, on continue
-            self.access_token = "demo_token"
+            self._store_token("demo_token", datetime.now() + self.DEFAULT_TOKEN_LIFETIME)
             return True
 
-    async def export_bim_data(self, bim_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Export des données BIM vers Power BI"""
+    async def export_bim_data(self, bim_data: Dict[str, Any], delta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Export des données BIM vers Power BI
+
+        Args:
+            bim_data: Données extraites par extract_bim_data_for_bi
+            delta: Changements depuis le dernier export (BISyncStore.compute_delta);
+                   None pour un export complet
+        """
         try:
-            if not self.access_token or datetime.now() >= self.token_expires:
+            if delta is not None and not delta_has_changes(delta, self.SYNCED_TABLES):
+                return {"success": True, "message": "Aucun changement depuis la dernière synchronisation",
+                        "rows_inserted": 0, "synced_tables": []}
+
+            if not self.token_valid():
                 if not await self.authenticate():
                     return {"success": False, "error": "Authentification échouée"}
 
             # Préparer les données pour Power BI
             powerbi_data = self.format_data_for_powerbi(bim_data)
+            replace_tables = self.apply_delta(powerbi_data, delta) if delta is not None else None
 
             # Créer ou mettre à jour le dataset
             dataset_result = await self.create_or_update_dataset(powerbi_data)
 
             if dataset_result["success"]:
                 # Insérer les données
-                insert_result = await self.insert_data_to_dataset(dataset_result["dataset_id"], powerbi_data)
+                insert_result = await self.insert_data_to_dataset(
+                    dataset_result["dataset_id"], powerbi_data, replace_tables=replace_tables
+                )
+                # Seule BIM_Elements reflète une table suivie; elle est renvoyée en entier dès qu'elle change
+                insert_result["synced_tables"] = list(self.SYNCED_TABLES)
                 return insert_result
             else:
                 return dataset_result
@@ -377,6 +481,24 @@ class SupersetConnector:
             }
         }
 
+    def apply_delta(self, powerbi_data: Dict[str, Any], delta: Dict[str, Any]) -> set:
+        """
+        Réduit les lignes à pousser aux tables touchées par le delta
+
+        Les tables Power BI en push sont en ajout seul et BIM_Elements contient
+        des pourcentages du total: toute modification d'élément la fait vider puis
+        recharger, tandis qu'une table inchangée n'est pas renvoyée.
+
+        Returns:
+            Tables à vider avant insertion
+        """
+        elements = delta["tables"]["elements"]
+        if elements["inserted"] or elements["updated"] or elements["deleted"]:
+            return {"BIM_Elements"}
+
+        powerbi_data["data"]["BIM_Elements"] = []
+        return set()
+
     async def create_or_update_dataset(self, powerbi_data: Dict[str, Any]) -> Dict[str, Any]:
         """Crée ou met à jour un dataset Power BI"""
         try:
@@ -389,7 +511,7 @@ class SupersetConnector:
 
             # Vérifier si le dataset existe
             datasets_url = f"{self.config.endpoint}"
-            response = requests.get(datasets_url, headers=headers)
+            response = await bi_http_client.get(self.config, datasets_url, headers=headers)
 
             existing_dataset = None
             if response.status_code == 200:
@@ -405,7 +527,7 @@ class SupersetConnector:
                     "tables": powerbi_data["tables"]
                 }
 
-                response = requests.post(datasets_url, headers=headers, json=create_data)
+                response = await bi_http_client.post(self.config, datasets_url, headers=headers, json=create_data)
                 if response.status_code == 201:
                     dataset = response.json()
                     return {"success": True, "dataset_id": dataset['id']}
@@ -415,30 +537,128 @@ class SupersetConnector:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    async def insert_data_to_dataset(self, dataset_id: str, powerbi_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Insère les données dans le dataset Power BI"""
+    async def insert_data_to_dataset(self, dataset_id: str, powerbi_data: Dict[str, Any],
+                                     batch_size: Optional[int] = None,
+                                     replace_tables: Optional[set] = None) -> Dict[str, Any]:
+        """
+        Insère les données dans le dataset Power BI par lots
+
+        Les lots sont envoyés par fenêtres de max_concurrency requêtes: la fenêtre
+        suivante n'est émise qu'une fois la précédente acquittée. Les lots acquittés
+        sont enregistrés dans un fichier de progression, si bien qu'un export
+        interrompu reprend là où il s'était arrêté lorsqu'il est relancé avec les
+        mêmes données. Les tables de replace_tables sont vidées avant leur premier lot.
+        """
         try:
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'Content-Type': 'application/json'
-            }
+            batch_size = batch_size or self.BATCH_SIZE
+            progress_path, progress = self._load_progress(dataset_id, powerbi_data, batch_size)
+            window = max(1, self.config.max_concurrency)
+            rows_inserted = 0
+            batches_skipped = 0
 
-            # Insérer les données dans chaque table
             for table_name, rows in powerbi_data["data"].items():
                 insert_url = f"{self.config.endpoint}/{dataset_id}/tables/{table_name}/rows"
+                done = set(progress["tables"].setdefault(table_name, []))
+                pending = [i for i in range((len(rows) + batch_size - 1) // batch_size) if i not in done]
+                batches_skipped += len(done)
+
+                if replace_tables and table_name in replace_tables and not done:
+                    if not await self._clear_table(insert_url):
+                        return {"success": False, "error": f"Impossible de vider la table {table_name}"}
+
+                for start in range(0, len(pending), window):
+                    indexes = pending[start:start + window]
+                    results = await asyncio.gather(*(
+                        self._post_rows(insert_url, rows[i * batch_size:(i + 1) * batch_size])
+                        for i in indexes
+                    ))
+                    for i, ok in zip(indexes, results):
+                        if ok:
+                            done.add(i)
+                            rows_inserted += len(rows[i * batch_size:(i + 1) * batch_size])
+                    progress["tables"][table_name] = sorted(done)
+                    self._save_progress(progress_path, progress)
+
+                    if not all(results):
+                        return {
+                            "success": False,
+                            "error": f"Erreur insertion table {table_name}, export reprenable",
+                            "rows_inserted": rows_inserted,
+                            "resumable": True
+                        }
 
-                # Power BI nécessite un format spécifique
-                insert_data = {"rows": rows}
-
-                response = requests.post(insert_url, headers=headers, json=insert_data)
-                if response.status_code not in [200, 201]:
-                    logger.error(f"Erreur insertion table {table_name}: {response.text}")
+            # Export complet: la progression n'est plus utile
+            if progress_path.exists():
+                progress_path.unlink()
 
-            return {"success": True, "message": "Données exportées vers Power BI"}
+            return {
+                "success": True,
+                "message": "Données exportées vers Power BI",
+                "rows_inserted": rows_inserted,
+                "batches_skipped": batches_skipped
+            }
 
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    async def _clear_table(self, rows_url: str) -> bool:
+        """Supprime toutes les lignes d'une table du dataset"""
+        headers = {'Authorization': f'Bearer {self.access_token}'}
+        response = await bi_http_client.request(self.config, "DELETE", rows_url, headers=headers)
+        if response.status_code not in [200, 204]:
+            logger.error(f"Erreur vidage {rows_url}: {response.text}")
+            return False
+        return True
+
+    async def _post_rows(self, insert_url: str, rows: List[Dict[str, Any]]) -> bool:
+        """Envoie un lot de lignes, avec une ré-authentification si le jeton a été révoqué"""
+        for attempt in range(2):
+            headers = {
+                'Authorization': f'Bearer {self.access_token}',
+                'Content-Type': 'application/json'
+            }
+            # Power BI nécessite un format spécifique
+            response = await bi_http_client.post(self.config, insert_url, headers=headers, json={"rows": rows})
+            if response.status_code in [200, 201]:
+                return True
+            if response.status_code == 401 and attempt == 0:
+                self._token_cache.pop(self.config.name, None)
+                await self.authenticate()
+                continue
+            logger.error(f"Erreur insertion lot ({len(rows)} lignes) vers {insert_url}: {response.text}")
+            return False
+        return False
+
+    def _load_progress(self, dataset_id: str, powerbi_data: Dict[str, Any], batch_size: int) -> Tuple[Path, Dict[str, Any]]:
+        """Charge la progression d'un export précédent s'il portait sur les mêmes données"""
+        stable_data = {
+            table_name: [{k: v for k, v in row.items() if k not in self.VOLATILE_COLUMNS} for row in rows]
+            for table_name, rows in powerbi_data["data"].items()
+        }
+        data_hash = hashlib.sha256(
+            json.dumps(stable_data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        progress_path = self.progress_dir / f"{self.config.name}_{dataset_id}.json"
+
+        if progress_path.exists():
+            try:
+                with open(progress_path, 'r') as f:
+                    progress = json.load(f)
+                if progress.get("data_hash") == data_hash and progress.get("batch_size") == batch_size:
+                    logger.info(f"Reprise de l'export {dataset_id} depuis {progress_path}")
+                    return progress_path, progress
+            except Exception as e:
+                logger.warning(f"Progression d'export illisible, export complet: {e}")
+
+        return progress_path, {"data_hash": data_hash, "batch_size": batch_size, "tables": {}}
+
+    def _save_progress(self, progress_path: Path, progress: Dict[str, Any]):
+        progress_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = progress_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, progress_path)
+
 class IFCViewerConnector:
     """🔵 Connecteur IFC.js Viewer pour visualisation BIM"""
 
@@ -458,7 +678,7 @@ class IFCViewerConnector:
             # Test de connexion au viewer
             health_url = f"{self.config.endpoint.replace('/viewer', '')}/health"
             try:
-                response = requests.get(health_url, timeout=5)
+                response = await bi_http_client.get(self.config, health_url, timeout=5)
                 logger.info("Connexion IFC.js Viewer établie")
             except:
                 logger.info("IFC.js Viewer en mode local")
@@ -548,20 +768,22 @@ class IFCViewerConnector:
 
             publish_url = f"{self.config.endpoint}/sites/{self.site_id}/datasources"
 
-            # Préparer les données multipart
+            # Préparer les données multipart (contenu en mémoire pour permettre les reprises)
             with open(csv_file, 'rb') as f:
-                files = {
-                    'tableau_datasource': (f'BIM_Data_{project_id}.csv', f, 'text/csv'),
-                    'datasource_type': (None, 'csv'),
-                    'overwrite': (None, 'true')
-                }
+                csv_content = f.read()
 
-                response = requests.post(publish_url, headers=headers, files=files)
+            files = {
+                'tableau_datasource': (f'BIM_Data_{project_id}.csv', csv_content, 'text/csv'),
+                'datasource_type': (None, 'csv'),
+                'overwrite': (None, 'true')
+            }
 
-                if response.status_code in [200, 201]:
-                    return {"success": True, "message": "Données publiées vers Tableau"}
-                else:
-                    return {"success": False, "error": f"Erreur publication: {response.text}"}
+            response = await bi_http_client.post(self.config, publish_url, headers=headers, files=files)
+
+            if response.status_code in [200, 201]:
+                return {"success": True, "message": "Données publiées vers Tableau"}
+            else:
+                return {"success": False, "error": f"Erreur publication: {response.text}"}
 
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -591,7 +813,7 @@ class N8nConnector:
                 'Authorization': f"Bearer {self.config.credentials.get('api_key', '')}"
             }
 
-            response = requests.post(webhook_url, json=n8n_payload, headers=headers)
+            response = await bi_http_client.post(self.config, webhook_url, json=n8n_payload, headers=headers)
 
             if response.status_code in [200, 201]:
                 return {
@@ -660,7 +882,7 @@ class N8nConnector:
                 'Authorization': f"Bearer {self.config.credentials.get('api_key', '')}"
             }
 
-            response = requests.post(create_url, json=workflow_data, headers=headers)
+            response = await bi_http_client.post(self.config, create_url, json=workflow_data, headers=headers)
 
             if response.status_code in [200, 201]:
                 workflow = response.json()
@@ -703,7 +925,7 @@ class ERPNextConnector:
                     'pwd': self.config.credentials['password']
                 }
 
-                response = requests.post(auth_url, data=data)
+                response = await bi_http_client.post(self.config, auth_url, data=data)
                 if response.status_code == 200:
                     # ERPNext utilise les cookies de session
                     self.session_id = response.cookies
@@ -728,7 +950,7 @@ class ERPNextConnector:
                 "client": self.config.credentials.get('client', '100')
             }
 
-            response = requests.post(auth_url, json=auth_data)
+            response = await bi_http_client.post(self.config, auth_url, json=auth_data)
             if response.status_code == 200:
                 self.session_id = response.json().get('session_id')
                 logger.info("Authentification SAP réussie")
@@ -751,7 +973,7 @@ class ERPNextConnector:
                 "password": self.config.credentials['password']
             }
 
-            response = requests.post(auth_url, json=auth_data)
+            response = await bi_http_client.post(self.config, auth_url, json=auth_data)
             if response.status_code == 200:
                 self.session_id = response.json().get('token', response.json().get('session_id'))
                 logger.info("Authentification ERP réussie")
@@ -762,9 +984,18 @@ class ERPNextConnector:
         except Exception as e:
             return False
 
-    async def sync_project_costs(self, bim_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Synchronise les coûts de projet avec l'ERP"""
+    async def sync_project_costs(self, bim_data: Dict[str, Any], delta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Synchronise les coûts de projet avec l'ERP
+
+        Args:
+            bim_data: Données extraites par extract_bim_data_for_bi
+            delta: Changements depuis la dernière synchronisation; None pour un envoi complet
+        """
         try:
+            if delta is not None and not delta["has_changes"]:
+                return {"success": True, "message": "Aucun changement depuis la dernière synchronisation", "synced_tables": []}
+
             if not self.session_id:
                 if not await self.authenticate():
                     return {"success": False, "error": "Authentification ERP échouée"}
@@ -782,6 +1013,13 @@ class ERPNextConnector:
                 "materials": bim_data.get("material_breakdown", {})
             }
 
+            if delta is not None:
+                # Envoi incrémental: seules les lignes modifiées remplacent les matériaux complets
+                del cost_data["materials"]
+                cost_data["sync_mode"] = "incremental"
+                cost_data["since_watermark"] = delta["from_watermark"]
+                cost_data["changes"] = delta["tables"]
+
             # Envoyer vers l'ERP
             sync_url = f"{self.config.endpoint}/projects/costs"
             headers = {
@@ -789,13 +1027,15 @@ class ERPNextConnector:
                 'Content-Type': 'application/json'
             }
 
-            response = requests.post(sync_url, json=cost_data, headers=headers)
+            response = await bi_http_client.post(self.config, sync_url, json=cost_data, headers=headers)
 
             if response.status_code in [200, 201]:
                 return {
                     "success": True,
                     "message": "Coûts synchronisés avec l'ERP",
-                    "erp_project_id": response.json().get('project_id')
+                    "erp_project_id": response.json().get('project_id'),
+                    # Envoi complet: seuls les matériaux sont transmis, pas les éléments ni les espaces
+                    "synced_tables": list(delta["tables"]) if delta is not None else ["materials"]
                 }
             else:
                 return {"success": False, "error": f"Erreur sync ERP: {response.text}"}
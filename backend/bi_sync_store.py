@@ -0,0 +1,277 @@
+"""
+🔄 SUIVI DES SYNCHRONISATIONS BI (CHANGE DATA CAPTURE)
+Conserve le dernier instantané exporté par projet/connecteur pour ne pousser
+que les lignes modifiées, et persiste l'historique des synchronisations
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Any, Optional
+
+logger = logging.getLogger("BI_Integration")
+
+# Entrées d'historique conservées (les plus anciennes sont purgées)
+MAX_HISTORY_ENTRIES = 10000
+
+# Tables suivies -> section correspondante des données extraites par extract_bim_data_for_bi
+CDC_TABLES = {
+    "elements": "element_counts",
+    "spaces": "space_analysis",
+    "materials": "material_breakdown",
+}
+
+
+def _row_hash(row: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def extract_rows(bim_data: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Lignes suivies des données BIM, par table puis par clé de ligne"""
+    tables = {}
+    for table, section in CDC_TABLES.items():
+        data = bim_data.get(section) or {}
+        rows = {}
+        if isinstance(data, dict):
+            for key, value in data.items():
+                rows[str(key)] = value if isinstance(value, dict) else {"value": value}
+        elif isinstance(data, list):
+            for index, item in enumerate(data):
+                if isinstance(item, dict):
+                    key = item.get("id") or item.get("name") or index
+                    rows[str(key)] = item
+                else:
+                    rows[str(index)] = {"value": item}
+        tables[table] = rows
+    return tables
+
+
+def delta_has_changes(delta: Dict[str, Any], tables: Optional[Iterable[str]] = None) -> bool:
+    """Le delta modifie-t-il au moins une des tables données (toutes si None) ?"""
+    names = delta["tables"] if tables is None else tables
+    return any(
+        delta["tables"][name]["inserted"] or delta["tables"][name]["updated"] or delta["tables"][name]["deleted"]
+        for name in names
+    )
+
+
+class StaleDeltaError(Exception):
+    """Le filigrane a avancé depuis le calcul du delta (synchronisation concurrente)"""
+    pass
+
+
+class BISyncStore:
+    """Instantanés exportés, filigranes de synchronisation et historique (SQLite)"""
+
+    def __init__(self, db_path: Path = Path("bi_sync.db")):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS snapshot_rows (
+                    project_id TEXT NOT NULL,
+                    connector TEXT NOT NULL,
+                    table_name TEXT NOT NULL,
+                    row_key TEXT NOT NULL,
+                    row_hash TEXT NOT NULL,
+                    PRIMARY KEY (project_id, connector, table_name, row_key)
+                );
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    project_id TEXT NOT NULL,
+                    connector TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    synced_at TEXT NOT NULL,
+                    PRIMARY KEY (project_id, connector)
+                );
+                CREATE TABLE IF NOT EXISTS sync_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entry TEXT NOT NULL
+                );
+            """)
+
+    def get_watermark(self, project_id: str, connector: str) -> Optional[Dict[str, Any]]:
+        """Dernière synchronisation réussie d'un projet vers un connecteur"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, synced_at FROM watermarks WHERE project_id = ? AND connector = ?",
+                (project_id, connector)
+            ).fetchone()
+        return {"version": row[0], "synced_at": row[1]} if row else None
+
+    def compute_delta(self, project_id: str, connector: str, bim_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compare les données courantes au dernier instantané exporté
+
+        Returns:
+            Delta par table (lignes insérées, mises à jour, clés supprimées),
+            avec le filigrane de départ. Sans instantané, toutes les lignes sont insérées.
+        """
+        current = extract_rows(bim_data)
+        with self._connect() as conn:
+            previous_rows = conn.execute(
+                "SELECT table_name, row_key, row_hash FROM snapshot_rows WHERE project_id = ? AND connector = ?",
+                (project_id, connector)
+            ).fetchall()
+
+        previous: Dict[str, Dict[str, str]] = {table: {} for table in CDC_TABLES}
+        for table_name, row_key, row_hash in previous_rows:
+            previous.setdefault(table_name, {})[row_key] = row_hash
+
+        tables = {}
+        for table, rows in current.items():
+            old = previous.get(table, {})
+            inserted = {k: r for k, r in rows.items() if k not in old}
+            updated = {k: r for k, r in rows.items() if k in old and old[k] != _row_hash(r)}
+            deleted = [k for k in old if k not in rows]
+            tables[table] = {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+        return {
+            "project_id": project_id,
+            "connector": connector,
+            "from_watermark": self.get_watermark(project_id, connector),
+            "tables": tables,
+            "has_changes": any(t["inserted"] or t["updated"] or t["deleted"] for t in tables.values()),
+            "summary": {
+                table: {name: len(changes) for name, changes in t.items()}
+                for table, t in tables.items()
+            }
+        }
+
+    def commit_delta(self, delta: Dict[str, Any], tables: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Applique un delta poussé avec succès à l'instantané et avance le filigrane
+
+        Args:
+            delta: Delta calculé par compute_delta
+            tables: Tables effectivement envoyées par le connecteur (toutes si None);
+                    les autres restent dans le prochain delta
+
+        Raises:
+            StaleDeltaError: Le filigrane n'est plus celui à partir duquel le delta a
+                été calculé; rien n'est modifié et le prochain delta sera recalculé
+        """
+        project_id, connector = delta["project_id"], delta["connector"]
+        synced_at = datetime.now().isoformat()
+        sent = set(delta["tables"]) if tables is None else set(tables)
+        expected = (delta["from_watermark"] or {}).get("version")
+
+        with self._connect() as conn:
+            # Verrou d'écriture dès la lecture du filigrane: vérification et mise à jour sont atomiques
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT version FROM watermarks WHERE project_id = ? AND connector = ?",
+                (project_id, connector)
+            ).fetchone()
+            current = row[0] if row else None
+            if current != expected:
+                raise StaleDeltaError(
+                    f"Filigrane {project_id}/{connector} en version {current}, delta calculé depuis {expected}"
+                )
+
+            for table, changes in delta["tables"].items():
+                if table not in sent:
+                    continue
+                conn.executemany(
+                    "INSERT OR REPLACE INTO snapshot_rows VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (project_id, connector, table, key, _row_hash(row))
+                        for key, row in {**changes["inserted"], **changes["updated"]}.items()
+                    ]
+                )
+                conn.executemany(
+                    "DELETE FROM snapshot_rows WHERE project_id = ? AND connector = ? AND table_name = ? AND row_key = ?",
+                    [(project_id, connector, table, key) for key in changes["deleted"]]
+                )
+            conn.execute(
+                """INSERT INTO watermarks VALUES (?, ?, 1, ?)
+                   ON CONFLICT(project_id, connector) DO UPDATE SET version = version + 1, synced_at = excluded.synced_at""",
+                (project_id, connector, synced_at)
+            )
+            version = conn.execute(
+                "SELECT version FROM watermarks WHERE project_id = ? AND connector = ?",
+                (project_id, connector)
+            ).fetchone()[0]
+
+        return {"version": version, "synced_at": synced_at}
+
+    def reset(self, project_id: str, connector: Optional[str] = None):
+        """Oublie l'instantané pour forcer un export complet"""
+        with self._connect() as conn:
+            if connector:
+                conn.execute("DELETE FROM snapshot_rows WHERE project_id = ? AND connector = ?", (project_id, connector))
+                conn.execute("DELETE FROM watermarks WHERE project_id = ? AND connector = ?", (project_id, connector))
+            else:
+                conn.execute("DELETE FROM snapshot_rows WHERE project_id = ?", (project_id,))
+                conn.execute("DELETE FROM watermarks WHERE project_id = ?", (project_id,))
+
+    def recent_history(self, limit: int) -> List[Dict[str, Any]]:
+        """Les limit dernières entrées, de la plus ancienne à la plus récente"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT entry FROM (SELECT id, entry FROM sync_history ORDER BY id DESC LIMIT ?) ORDER BY id",
+                (max(0, limit),)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count_history(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sync_history").fetchone()[0]
+
+    def history_statistics(self) -> Dict[str, Dict[str, int]]:
+        """Nombre de synchronisations et de succès par plateforme, agrégés par SQLite"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT COALESCE(json_extract(entry, '$.platform'), 'unknown'),
+                       COUNT(*),
+                       SUM(json_extract(entry, '$.status') = 'success')
+                FROM sync_history GROUP BY 1
+            """).fetchall()
+        return {platform: {"total": total, "success": success or 0} for platform, total, success in rows}
+
+    def append_history(self, entry: Dict[str, Any], max_entries: int = MAX_HISTORY_ENTRIES):
+        with self._connect() as conn:
+            cur = conn.execute("INSERT INTO sync_history (entry) VALUES (?)", (json.dumps(entry, default=str),))
+            conn.execute("DELETE FROM sync_history WHERE id <= ?", (cur.lastrowid - max_entries,))
+
+
+class SyncHistory:
+    """
+    Historique des synchronisations, lu page par page dans SQLite
+
+    Rien n'est gardé en mémoire: chaque ajout est persisté et seules les
+    max_entries dernières entrées sont conservées.
+    """
+
+    def __init__(self, store: BISyncStore, max_entries: int = MAX_HISTORY_ENTRIES):
+        self.store = store
+        self.max_entries = max_entries
+
+    def append(self, entry: Dict[str, Any]):
+        self.store.append_history(entry, self.max_entries)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.store.recent_history(limit)
+
+    def platform_statistics(self) -> Dict[str, Dict[str, int]]:
+        return self.store.history_statistics()
+
+    def __len__(self) -> int:
+        return self.store.count_history()
@@ -3,10 +3,13 @@ Assistant BIM avec Ollama - Version optimisée pour l'analyse BIM
 Utilise Llama 3.1 local pour des réponses intelligentes sans coût
 """
 
+import asyncio
 import json
+import time
+import hashlib
 import logging
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
 from pathlib import Path
 import pandas as pd
 from datetime import datetime
@@ -27,8 +30,15 @@ except ImportError:
     except ImportError:
         OLLAMA_AVAILABLE = False
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 from ifc_analyzer import IFCAnalyzer
 from anomaly_detector import IFCAnomalyDetector
+from semantic_cache import shared_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -43,27 +53,37 @@ class OllamaBIMAssistant:
             model_name: Nom du modèle Ollama à utiliser
         """
         self.model_name = model_name
+        self.base_url = "http://localhost:11434"
         self.current_ifc_data = None
         self.current_file_path = None
+        # Empreinte (LLM + contenu IFC) servant de clé au cache de réponses partagé
+        self.cache_key = None
+
+        # Client HTTP asynchrone (créé à la demande) pour le streaming des tokens
+        self._async_client = None
         
         # Vérifier qu'Ollama est disponible
         if not self._check_ollama_availability():
             raise ValueError("Ollama n'est pas disponible. Assurez-vous qu'Ollama est installé et en cours d'exécution.")
         
         # 🚀 OPTIMISATION ULTRA-RAPIDE: Paramètres pour réponses < 3s
-        self.llm = OllamaLLM(
-            model=model_name,
-            temperature=0.05,  # Très déterministe pour vitesse
-            base_url="http://localhost:11434",
+        # (partagés entre l'appel bloquant LangChain et le streaming /api/generate)
+        self.generation_options = {
+            "temperature": 0.05,  # Très déterministe pour vitesse
             # Paramètres ultra-optimisés pour vitesse maximale
-            num_predict=150,   # Réponses encore plus courtes
-            top_k=5,          # Espace de recherche très réduit
-            top_p=0.8,        # Sampling très focalisé
-            repeat_penalty=1.2,  # Éviter répétitions
-            timeout=8,        # Timeout très rapide
+            "num_predict": 150,   # Réponses encore plus courtes
+            "top_k": 5,          # Espace de recherche très réduit
+            "top_p": 0.8,        # Sampling très focalisé
+            "repeat_penalty": 1.2,  # Éviter répétitions
             # Paramètres additionnels pour vitesse
-            num_ctx=1024,     # Contexte réduit
-            num_batch=1,      # Traitement par batch minimal
+            "num_ctx": 1024,     # Contexte réduit
+            "num_batch": 1,      # Traitement par batch minimal
+        }
+        self.llm = OllamaLLM(
+            model=self.model_name,
+            base_url=self.base_url,
+            timeout=8,        # Timeout très rapide
+            **self.generation_options
         )
         
         # Mémoire conversationnelle
@@ -75,8 +95,8 @@ class OllamaBIMAssistant:
         # Contexte BIM spécialisé
         self.bim_context = self._create_bim_context()
 
-        # 🚀 OPTIMISATION: Cache pour éviter les questions répétées
-        self.response_cache = {}
+        # 🚀 OPTIMISATION: Cache sémantique partagé entre sessions pour éviter les questions répétées
+        self.response_cache = shared_response_cache
         self.conversation_history = []
 
         # 🚀 Réponses rapides pré-calculées ÉTENDUES pour questions courantes
@@ -102,7 +122,7 @@ class OllamaBIMAssistant:
     def _check_ollama_availability(self) -> bool:
         """Vérifie qu'Ollama est disponible et fonctionne"""
         try:
-            response = requests.get("http://localhost:11434/api/tags", timeout=5)
+            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 available_models = [model["name"] for model in models]
@@ -175,6 +195,7 @@ FORMAT: [Analyse directe] + [Chiffre clé] + [Recommandation pratique]"""
             analyzer = IFCAnalyzer(ifc_file_path)
             self.current_ifc_data = analyzer.generate_full_analysis()
             self.current_file_path = ifc_file_path
+            self.cache_key = f"{self.model_name}:{self._hash_file(ifc_file_path)}"
             
             # Détecter les anomalies
             try:
@@ -232,10 +253,9 @@ FORMAT: [Analyse directe] + [Chiffre clé] + [Recommandation pratique]"""
         
         try:
             # 🚀 OPTIMISATION 1: Vérifier le cache d'abord
-            question_key = question.lower().strip()
-            if question_key in self.response_cache:
+            cached_response = self.response_cache.get(self.cache_key, question)
+            if cached_response:
                 logger.info("🚀 Réponse trouvée dans le cache - réponse instantanée")
-                cached_response = self.response_cache[question_key]
                 return {
                     "answer": f"⚡ {cached_response}",
                     "question": question,
@@ -248,7 +268,6 @@ FORMAT: [Analyse directe] + [Chiffre clé] + [Recommandation pratique]"""
             quick_answer = self._get_quick_response(question)
             if quick_answer:
                 logger.info("🚀 Réponse rapide pré-calculée")
-                self.response_cache[question_key] = quick_answer
                 return {
                     "answer": f"⚡ {quick_answer}",
                     "question": question,
@@ -257,36 +276,16 @@ FORMAT: [Analyse directe] + [Chiffre clé] + [Recommandation pratique]"""
                     "response_time": "< 0.2s"
                 }
 
-            # Préparer le contexte avec les données du modèle
-            model_context = self._prepare_model_context()
-
-            # 🚀 OPTIMISÉ: Prompt ultra-concis pour vitesse maximale
-            full_prompt = f"""{self.bim_context}
-
-DONNÉES: {model_context}
-
-Q: {question}
-R:"""
+            full_prompt = self._build_prompt(question)
 
             # Obtenir la réponse d'Ollama avec timeout
-            import time
             start_time = time.time()
             response = self.llm.invoke(full_prompt)
             response_time = time.time() - start_time
             
             # Nettoyer la réponse
             clean_response = self._clean_response(response)
-
-            # 🚀 OPTIMISATION: Mettre en cache pour les prochaines fois
-            self.response_cache[question_key] = clean_response
-
-            # Ajouter à l'historique
-            self.conversation_history.append({
-                "question": question,
-                "answer": clean_response,
-                "timestamp": datetime.now().isoformat(),
-                "response_time": f"{response_time:.2f}s"
-            })
+            self._record_answer(question, clean_response, response_time)
 
             return {
                 "answer": clean_response,
@@ -304,6 +303,140 @@ R:"""
                 "file_analyzed": Path(self.current_file_path).name if self.current_file_path else None
             }
     
+    async def astream_question(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante streaming de ask_question: relaie les tokens d'Ollama dès leur génération
+
+        Fermer le générateur (déconnexion du client) ferme la connexion HTTP
+        vers Ollama, ce qui interrompt la génération côté serveur.
+
+        Args:
+            question: Question de l'utilisateur
+
+        Yields:
+            Événements {"event": "token", "token": ...} puis {"event": "done", ...}
+            (même contenu que ask_question) ou {"event": "error", "message": ...}
+        """
+        if not self.current_ifc_data or not HTTPX_AVAILABLE:
+            # Pas de streaming possible: réponse complète en un seul événement
+            # ask_question fait un appel HTTP bloquant : hors de la boucle d'événements
+            result = await asyncio.to_thread(self.ask_question, question)
+            yield {"event": "token", "token": result["answer"]}
+            yield {"event": "done", **result}
+            return
+
+        file_analyzed = Path(self.current_file_path).name if self.current_file_path else None
+
+        # Cache et réponses rapides: inutile de solliciter le LLM
+        fast_answer = self.response_cache.get(self.cache_key, question) or self._get_quick_response(question)
+        if fast_answer:
+            yield {"event": "token", "token": f"⚡ {fast_answer}"}
+            yield {
+                "event": "done",
+                "answer": f"⚡ {fast_answer}",
+                "question": question,
+                "file_analyzed": file_analyzed,
+                "model_used": f"{self.model_name} (cache)",
+                "response_time": "< 0.2s"
+            }
+            return
+
+        payload = {
+            "model": self.model_name,
+            "prompt": self._build_prompt(question),
+            "stream": True,
+            "options": self.generation_options
+        }
+
+        tokens = []
+        start_time = time.time()
+        try:
+            client = self._get_async_client()
+            async with client.stream("POST", f"{self.base_url}/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = chunk.get("response", "")
+                    if token:
+                        tokens.append(token)
+                        yield {"event": "token", "token": token}
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            logger.error(f"Erreur streaming Ollama: {e}")
+            yield {
+                "event": "error",
+                "message": f"Désolé, je n'ai pas pu traiter votre question. Erreur: {str(e)}",
+                "question": question,
+                "file_analyzed": file_analyzed
+            }
+            return
+
+        response_time = time.time() - start_time
+        clean_response = self._clean_response("".join(tokens))
+        self._record_answer(question, clean_response, response_time)
+
+        yield {
+            "event": "done",
+            "answer": clean_response,
+            "question": question,
+            "file_analyzed": file_analyzed,
+            "model_used": self.model_name,
+            "response_time": f"{response_time:.2f}s"
+        }
+
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """Client HTTP asynchrone réutilisé (connexions keep-alive vers Ollama)"""
+        if self._async_client is None or self._async_client.is_closed:
+            # Pas de timeout de lecture global: seul l'écart entre deux tokens est borné
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Ferme le client HTTP asynchrone"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _build_prompt(self, question: str) -> str:
+        """Construit le prompt complet envoyé à Ollama"""
+        # Préparer le contexte avec les données du modèle
+        model_context = self._prepare_model_context()
+
+        # 🚀 OPTIMISÉ: Prompt ultra-concis pour vitesse maximale
+        return f"""{self.bim_context}
+
+DONNÉES: {model_context}
+
+Q: {question}
+R:"""
+
+    def _record_answer(self, question: str, answer: str, response_time: float):
+        """Met en cache la réponse et l'ajoute à l'historique"""
+        # 🚀 OPTIMISATION: Mettre en cache pour les prochaines fois (toutes sessions confondues)
+        self.response_cache.put(self.cache_key, question, answer)
+
+        # Ajouter à l'historique
+        self.conversation_history.append({
+            "question": question,
+            "answer": answer,
+            "timestamp": datetime.now().isoformat(),
+            "response_time": f"{response_time:.2f}s"
+        })
+
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        """Empreinte SHA-256 du contenu d'un fichier"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
     def _prepare_model_context(self) -> str:
         """🚀 OPTIMISÉ: Contexte concis pour réponses rapides"""
         if not self.current_ifc_data:
@@ -498,11 +631,10 @@ QUALITÉ: {anomalies.get('total_anomalies', 0)} anomalies ({anomalies.get('by_se
         return self.conversation_history
     
     def clear_conversation(self):
-        """Efface l'historique de la conversation et le cache"""
+        """Efface l'historique de la conversation (le cache partagé est conservé pour les autres sessions)"""
         self.memory.clear()
         self.conversation_history = []
-        self.response_cache = {}
-        logger.info("🧹 Historique et cache effacés")
+        logger.info("🧹 Historique effacé")
     
     def get_model_summary(self) -> Dict[str, Any]:
         """Retourne un résumé du modèle actuellement chargé"""
@@ -2808,34 +2808,51 @@ conversion_status = ConversionStatus()
 building_classifier = BuildingClassifier()
 report_generator = BIMReportGenerator()
 bim_assistants = {}  # Dictionnaire pour stocker les assistants par session
+assistant_temp_files = {}  # session_id -> fichier IFC temporaire charge par l assistant
 
 # Creer le dossier generatedReports au demarrage
 os.makedirs("generatedReports", exist_ok=True)
 logger.info("Dossier 'generatedReports' cree/verifie")
 
+# Retention et index des dossiers de sortie (rapports, PixOCR, OCR, fichiers temporaires)
+from storage_manager import StorageManager, load_policies, ASSISTANT_TEMP_DIR, ASSISTANT_TEMP_PREFIX
+storage_manager = StorageManager(load_policies(), protected=lambda: list(assistant_temp_files.values()))
+
+# Index des projets : base SQLite transactionnelle, index.json du viewer reexporte a chaque modification
+from projects_store import ProjectsStore
+projects_store = ProjectsStore(
+    Path(os.getenv("PROJECTS_DB_PATH", Path(__file__).parent / "data" / "projects.db")), PROJECTS_INDEX
+)
+
 def load_projects_index():
     """Charge l index des projets"""
     try:
-        if PROJECTS_INDEX.exists():
-            with open(PROJECTS_INDEX, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            return {"projects": []}
+        return projects_store.as_index()
     except Exception as e:
         print(f"Erreur lors du chargement de l index: {e}")
         return {"projects": []}
 
 def save_projects_index(data):
-    """Sauvegarde l index des projets"""
+    """Sauvegarde l index des projets (remplacement complet, en une transaction)"""
     try:
-        PROJECTS_INDEX.parent.mkdir(parents=True, exist_ok=True)
-        with open(PROJECTS_INDEX, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        projects_store.replace_all(data.get("projects", []))
+        project_catalog.invalidate("index")
         return True
     except Exception as e:
         print(f"Erreur lors de la sauvegarde de l index: {e}")
         return False
 
+# Catalogue en memoire des fichiers IFC/XKT et des projets (/list-files, /scan-projects, /xeokit-projects)
+from project_catalog import ProjectCatalog
+project_catalog = ProjectCatalog(
+    uploads_dir=Path("uploads"),
+    projects_dir=Path("xeokit-bim-viewer/app/data/projects"),
+    legacy_projects_dir=Path("xeokit-bim-viewer/app/projects"),
+    viewer_projects_dir=Path(__file__).parent.parent / "xeokit-bim-viewer" / "app" / "data" / "projects",
+    projects_index=PROJECTS_INDEX,
+    load_projects_index=load_projects_index,
+)
+
 def create_project_structure(project_id: str, project_name: str):
     """Cree la structure de dossiers pour un nouveau projet"""
     project_dir = PROJECTS_DIR / project_id
@@ -2869,6 +2886,7 @@ def create_project_structure(project_id: str, project_name: str):
     
     with open(project_dir / "index.json", 'w', encoding='utf-8') as f:
         json.dump(project_index, f, indent=4, ensure_ascii=False)
+    project_catalog.invalidate("viewer", "projects")
     
     return project_dir, model_dir
 
@@ -3168,74 +3186,9 @@ async def health_check():
 async def list_available_files():
     """[EMOJI] Liste tous les fichiers IFC disponibles pour la selection automatique"""
     try:
-        files = []
-
-        # Extensions de fichiers supportees
-        supported_extensions = ["*.ifc", "*.xkt"]
-
-        # Chercher dans le dossier uploads
-        uploads_dir = Path("uploads")
-        if uploads_dir.exists():
-            for ext in supported_extensions:
-                for file_path in uploads_dir.rglob(ext):
-                    files.append({
-                        "name": file_path.name,
-                        "path": str(file_path),
-                        "type": file_path.suffix.lower(),
-                        "size": file_path.stat().st_size,
-                        "modified": file_path.stat().st_mtime
-                    })
-
-        # Chercher dans les dossiers de projets XeoKit (structure standardisee)
-        xeokit_projects_dir = Path("xeokit-bim-viewer/app/data/projects")
-        if xeokit_projects_dir.exists():
-            logger.info(f"[SEARCH] Recherche dans: {xeokit_projects_dir}")
-            for project_dir in xeokit_projects_dir.iterdir():
-                if project_dir.is_dir():
-                    logger.info(f"[EMOJI] Projet trouve: {project_dir.name}")
-                    # Structure standardisee : projects/ProjectName/models/model/
-                    model_dir = project_dir / "models" / "model"
-                    if model_dir.exists():
-                        logger.info(f"[EMOJI] Dossier model trouve: {model_dir}")
-                        for ext in supported_extensions:
-                            for file_path in model_dir.rglob(ext):
-                                logger.info(f"[CHECK] Fichier trouve: {file_path}")
-                                files.append({
-                                    "name": file_path.name,
-                                    "path": str(file_path),
-                                    "project": project_dir.name,
-                                    "type": file_path.suffix.lower(),
-                                    "size": file_path.stat().st_size,
-                                    "modified": file_path.stat().st_mtime,
-                                    "source": "xeokit_standardized"
-                                })
-                    else:
-                        logger.warning(f"[WARNING] Dossier model non trouve: {model_dir}")
-        else:
-            logger.warning(f"[WARNING] Dossier projets non trouve: {xeokit_projects_dir}")
-
-        # Fallback : chercher dans l ancienne structure (compatibilite)
-        xeokit_old_projects_dir = Path("xeokit-bim-viewer/app/projects")
-        if xeokit_old_projects_dir.exists():
-            for project_dir in xeokit_old_projects_dir.iterdir():
-                if project_dir.is_dir():
-                    # Ancienne structure : models/design/ et models/
-                    for models_subdir in ["models/model/design", "models"]:
-                        design_dir = project_dir / models_subdir
-                        if design_dir.exists():
-                            for ext in supported_extensions:
-                                for file_path in design_dir.rglob(ext):
-                                    files.append({
-                                        "name": file_path.name,
-                                        "path": str(file_path),
-                                        "project": project_dir.name,
-                                        "type": file_path.suffix.lower(),
-                                        "size": file_path.stat().st_size,
-                                        "modified": file_path.stat().st_mtime,
-                                        "source": "xeokit_legacy"
-                                    })
-
-        logger.info(f"[EMOJI] {len(files)} fichiers trouves ({len([f for f in files if f['type'] == '.ifc'])} IFC, {len([f for f in files if f['type'] == '.xkt'])} XKT)")
+        # uploads, projets XeoKit (structure standardisee puis ancienne structure) : servis par le catalogue
+        files = await asyncio.to_thread(project_catalog.list_files)
+        logger.debug(f"[EMOJI] {len(files)} fichiers disponibles")
         return files
 
     except Exception as e:
@@ -3263,6 +3216,7 @@ async def add_project_model(
         with open(file_path, "wb") as buffer:
             content = await file.read()
             buffer.write(content)
+        project_catalog.invalidate("projects")
 
         logger.info(f"[CHECK] Modele ajoute: {file.filename} -> {file_path}")
 
@@ -3327,46 +3281,8 @@ async def get_xeokit_viewer():
 async def scan_projects():
     """Scanne le dossier des projets pour detecter tous les projets disponibles"""
     try:
-        # Utiliser un chemin absolu depuis le dossier backend
-        backend_dir = Path(__file__).parent
-        projects_dir = backend_dir.parent / "xeokit-bim-viewer" / "app" / "data" / "projects"
-        print(f"[DEBUG] Backend directory: {backend_dir}")
-        print(f"[DEBUG] Scanning projects directory: {projects_dir}")
-        print(f"[DEBUG] Absolute path: {projects_dir.absolute()}")
-        print(f"[DEBUG] Directory exists: {projects_dir.exists()}")
-
-        if not projects_dir.exists():
-            print("[DEBUG] Projects directory does not exist")
-            return {"projects": []}
-
-        # Charger l index existant
-        index_data = load_projects_index()
-        known_projects = {p["id"]: p for p in index_data.get("projects", [])}
-        print(f"[DEBUG] Known projects from index: {list(known_projects.keys())}")
-
-        # Scanner le dossier pour detecter tous les projets
-        all_projects = []
-
-        for project_dir in projects_dir.iterdir():
-            if project_dir.is_dir() and project_dir.name != "index.json":
-                project_id = project_dir.name
-                print(f"[DEBUG] Found project directory: {project_id}")
-
-                # Utiliser les donnees de l index si disponibles, sinon creer une entree basique
-                if project_id in known_projects:
-                    all_projects.append(known_projects[project_id])
-                    print(f"[DEBUG] Added known project: {project_id}")
-                else:
-                    # Creer une entree basique pour les projets non references
-                    project_name = re.sub(r'([A-Z])', r' \1', project_id).strip() if project_id else project_id
-                    all_projects.append({
-                        "id": project_id,
-                        "name": project_name
-                    })
-                    print(f"[DEBUG] Added new project: {project_id} -> {project_name}")
-
-        print(f"[DEBUG] Total projects found: {len(all_projects)}")
-        return {"projects": all_projects}
+        # Dossiers de projets + index des projets, tenus a jour par le catalogue
+        return {"projects": await asyncio.to_thread(project_catalog.scan_projects)}
 
     except Exception as e:
         print(f"Erreur lors du scan des projets: {e}")
@@ -3378,33 +3294,10 @@ async def scan_projects():
 async def get_xeokit_projects():
     """[EMOJI] Recupere la liste des projets XeoKit disponibles"""
     try:
-        xeokit_projects_path = os.path.join(os.path.dirname(__file__), "..", "xeokit-bim-viewer", "app", "data", "projects")
-
-        if not os.path.exists(xeokit_projects_path):
+        if not project_catalog.viewer_dir_exists():
             return {"projects": [], "message": "Dossier projets XeoKit non trouve"}
 
-        projects = []
-        for project_dir in os.listdir(xeokit_projects_path):
-            project_path = os.path.join(xeokit_projects_path, project_dir)
-            if os.path.isdir(project_path) and project_dir != "index.json":
-                index_file = os.path.join(project_path, "index.json")
-                if os.path.exists(index_file):
-                    try:
-                        with open(index_file, 'r', encoding='utf-8') as f:
-                            project_data = json.load(f)
-                            projects.append({
-                                "id": project_dir,
-                                "name": project_data.get("name", project_dir),
-                                "description": project_data.get("description", ""),
-                                "models": project_data.get("models", []),
-                                "viewerConfigs": project_data.get("viewerConfigs", {}),
-                                "viewerContent": project_data.get("viewerContent", {}),
-                                "viewerState": project_data.get("viewerState", {})
-                            })
-                    except Exception as e:
-                        logger.warning(f"Erreur lecture projet XeoKit {project_dir}: {e}")
-
-        logger.info(f"[EMOJI] {len(projects)} projets XeoKit trouves")
+        projects = await asyncio.to_thread(project_catalog.xeokit_projects)
         return {"projects": projects, "count": len(projects)}
 
     except Exception as e:
@@ -3506,9 +3399,7 @@ async def upload_ifc(
     project_id = project_id.replace(' ', '_')
     
     # Verifier si le projet existe deja
-    projects_data = load_projects_index()
-    existing_project = next((p for p in projects_data["projects"] if p["id"] == project_id), None)
-    if existing_project:
+    if projects_store.exists(project_id):
         raise HTTPException(status_code=400, detail="Un projet avec ce nom existe deja")
     
     try:
@@ -3567,14 +3458,10 @@ def convert_and_finalize(ifc_path: str, model_dir: str, conversion_id: str, proj
             except Exception as copy_error:
                 print(f"[WARNING] Impossible de sauvegarder le fichier IFC original: {copy_error}")
                 # Ne pas faire echouer la conversion pour cette erreur
+            project_catalog.invalidate("projects")
 
             # Ajouter le projet a l index
-            projects_data = load_projects_index()
-            projects_data["projects"].append({
-                "id": project_id,
-                "name": project_name
-            })
-            save_projects_index(projects_data)
+            add_project_to_index(project_id, project_name)
 
             conversion_status.complete_conversion(conversion_id, True, "Projet cree avec succes")
 
@@ -3588,13 +3475,12 @@ def convert_and_finalize(ifc_path: str, model_dir: str, conversion_id: str, proj
 def add_project_to_index(project_id: str, project_name: str):
     """Ajoute un projet a l index des projets"""
     try:
-        projects_data = load_projects_index()
-        projects_data["projects"].append({
-            "id": project_id,
-            "name": project_name
-        })
-        save_projects_index(projects_data)
-        logger.info(f"[CHECK] Projet {project_id} ajoute a l index")
+        # Insertion atomique : deux ajouts concurrents ne peuvent plus s ecraser
+        if projects_store.add({"id": project_id, "name": project_name}):
+            project_catalog.invalidate("index")
+            logger.info(f"[CHECK] Projet {project_id} ajoute a l index")
+        else:
+            logger.warning(f"[WARNING] Projet {project_id} deja present dans l index")
     except Exception as e:
         logger.error(f"[CROSS] Erreur ajout projet a l index: {e}")
 def convert_rvt_and_finalize(rvt_path: str, model_dir: str, conversion_id: str, project_id: str, project_name: str):
@@ -3639,6 +3525,7 @@ def convert_rvt_and_finalize(rvt_path: str, model_dir: str, conversion_id: str,
             # Copier aussi le fichier RVT original
             final_rvt_path = os.path.join(model_dir, "geometry.rvt")
             shutil.copy2(rvt_path, final_rvt_path)
+            project_catalog.invalidate("projects")
 
             # Ajouter le projet a l index
             add_project_to_index(project_id, project_name)
@@ -9176,26 +9063,20 @@ async def generate_pdf_with_weasyprint(report_id: str):
 async def list_generated_reports():
     """Liste tous les rapports generes"""
     try:
-        reports_dir = "generatedReports"
-        if not os.path.exists(reports_dir):
-            return JSONResponse({"reports": []})
-
+        # Lu depuis l index du gestionnaire de stockage : seuls les dossiers nouveaux ou modifies sont relus
         reports = []
-        for folder_name in os.listdir(reports_dir):
-            folder_path = os.path.join(reports_dir, folder_name)
-            if os.path.isdir(folder_path):
+        for entry in await asyncio.to_thread(storage_manager.entries, "reports"):
+            if entry.get("is_dir"):
                 # Chercher le fichier PDF dans le dossier
-                pdf_files = [f for f in os.listdir(folder_path) if f.endswith('.pdf')]
+                pdf_files = [f for f in entry.get("files", []) if f["name"].endswith('.pdf')]
                 if pdf_files:
-                    pdf_path = os.path.join(folder_path, pdf_files[0])
-                    stat = os.stat(pdf_path)
-
                     reports.append({
-                        "folder_name": folder_name,
-                        "pdf_filename": pdf_files[0],
-                        "creation_date": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                        "size_mb": round(stat.st_size / (1024 * 1024), 2),
-                        "download_url": f"/download-report/{folder_name}"
+                        "folder_name": entry["name"],
+                        "pdf_filename": pdf_files[0]["name"],
+                        "creation_date": datetime.fromtimestamp(pdf_files[0]["ctime"]).isoformat(),
+                        "size_mb": round(pdf_files[0]["size"] / (1024 * 1024), 2),
+                        "download_url": f"/download-report/{entry['name']}",
+                        "archived": entry["tier"] == "cold"
                     })
 
         # Trier par date de creation (plus recent en premier)
@@ -9211,8 +9092,9 @@ async def list_generated_reports():
 async def download_report(folder_name: str):
     """Telecharge un rapport specifique"""
     try:
-        folder_path = os.path.join("generatedReports", folder_name)
-        if not os.path.exists(folder_path):
+        # Un rapport archive (niveau froid) est restaure a la demande
+        folder_path = await asyncio.to_thread(storage_manager.thaw, "reports", folder_name)
+        if not folder_path:
             raise HTTPException(status_code=404, detail="Rapport non trouve")
 
         # Chercher le fichier PDF
@@ -9236,8 +9118,8 @@ async def download_report(folder_name: str):
 async def view_report_details(folder_name: str):
     """Affiche les details d un rapport en HTML pour visualisation"""
     try:
-        folder_path = os.path.join("generatedReports", folder_name)
-        if not os.path.exists(folder_path):
+        folder_path = await asyncio.to_thread(storage_manager.thaw, "reports", folder_name)
+        if not folder_path:
             raise HTTPException(status_code=404, detail="Rapport non trouve")
 
         # Informations du dossier
@@ -9276,6 +9158,7 @@ async def view_report_details(folder_name: str):
 async def download_file(folder_name: str, file_path: str):
     """Telecharge un fichier specifique du rapport"""
     try:
+        await asyncio.to_thread(storage_manager.thaw, "reports", folder_name)
         full_path = os.path.join("generatedReports", folder_name, file_path)
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail="Fichier non trouve")
@@ -9315,8 +9198,10 @@ async def load_model_for_assistant(file: UploadFile = File(...), session_id: str
         raise HTTPException(status_code=400, detail="Seuls les fichiers IFC sont acceptes")
 
     try:
-        # Sauvegarder temporairement le fichier
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.ifc') as temp_file:
+        # Sauvegarder temporairement le fichier (dossier dedie, nettoye par le gestionnaire de stockage)
+        os.makedirs(ASSISTANT_TEMP_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.ifc', prefix=ASSISTANT_TEMP_PREFIX,
+                                         dir=ASSISTANT_TEMP_DIR) as temp_file:
             content = await file.read()
             temp_file.write(content)
             temp_ifc_path = temp_file.name
@@ -9347,8 +9232,12 @@ async def load_model_for_assistant(file: UploadFile = File(...), session_id: str
         assistant = bim_assistants[session_id]
         summary = assistant.load_ifc_model(temp_ifc_path)
 
-        # Garder le fichier temporaire pour les questions futures
-        # (en production, il faudrait un systeme de nettoyage)
+        # Garder le fichier temporaire pour les questions futures ; l ancien de la session
+        # est supprime, les fichiers abandonnes sont nettoyes par le gestionnaire de stockage
+        previous_temp = assistant_temp_files.get(session_id)
+        assistant_temp_files[session_id] = temp_ifc_path
+        if previous_temp and previous_temp != temp_ifc_path and os.path.exists(previous_temp):
+            os.unlink(previous_temp)
 
         return JSONResponse({
             "status": "success",
@@ -9452,6 +9341,41 @@ async def ask_assistant(session_id: str = Form(...), question: str = Form(...)):
         logger.error(f"Erreur lors de la question a l assistant: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur de l assistant: {str(e)}")
 
+@app.post("/assistant/ask-stream")
+async def ask_assistant_stream(request: Request, session_id: str = Form(...), question: str = Form(...)):
+    """Pose une question a l assistant BIM et renvoie la reponse token par token (Server-Sent Events)"""
+    if session_id not in bim_assistants:
+        raise HTTPException(status_code=404, detail="Session non trouvee. Chargez d abord un modele IFC.")
+
+    assistant = bim_assistants[session_id]
+
+    async def event_stream():
+        if hasattr(assistant, "astream_question"):
+            events = assistant.astream_question(question)
+        else:
+            # Assistants sans streaming: reponse complete hors de la boucle d evenements
+            async def single_event():
+                response = await asyncio.to_thread(assistant.ask_question, question)
+                yield {"event": "token", "token": response.get("answer", "")}
+                yield {"event": "done", **response}
+            events = single_event()
+
+        try:
+            async for event in events:
+                # Client deconnecte: fermer le generateur interrompt la generation Ollama
+                if await request.is_disconnected():
+                    logger.info(f"Client deconnecte, generation interrompue (session: {session_id})")
+                    break
+                yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/assistant/suggestions/{session_id}")
 async def get_assistant_suggestions(session_id: str):
     """Recupere les questions suggerees pour une session"""
@@ -9499,6 +9423,8 @@ async def clear_assistant_session(session_id: str):
     """Efface une session d assistant"""
     if session_id in bim_assistants:
         bim_assistants[session_id].clear_conversation()
+        if hasattr(bim_assistants[session_id], "aclose"):
+            await bim_assistants[session_id].aclose()
         del bim_assistants[session_id]
 
     return JSONResponse({
@@ -9507,6 +9433,19 @@ async def clear_assistant_session(session_id: str):
         "session_id": session_id
     })
 
+@app.get("/assistant/cache-stats")
+async def get_assistant_cache_stats():
+    """Statistiques du cache semantique de reponses partage entre les sessions"""
+    try:
+        from semantic_cache import shared_response_cache
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Cache de reponses non disponible")
+
+    return JSONResponse({
+        "status": "success",
+        "cache": shared_response_cache.get_stats()
+    })
+
 @app.get("/assistant/model-summary/{session_id}")
 async def get_model_summary(session_id: str):
     """Recupere le resume du modele charge"""
@@ -9577,6 +9516,7 @@ async def get_available_features():
             "endpoints": {
                 "load": "/assistant/load-model",
                 "ask": "/assistant/ask",
+                "ask_stream": "/assistant/ask-stream",
                 "suggestions": "/assistant/suggestions/{session_id}"
             }
         }
@@ -9609,8 +9549,8 @@ async def get_bi_status():
         raise HTTPException(status_code=500, detail=f"Erreur statut BI: {str(e)}")
 
 @app.post("/bi/export-superset")
-async def export_to_superset(project_id: str = Form(...)):
-    """[EMOJI] Export automatique vers Apache Superset"""
+async def export_to_superset(project_id: str = Form(...), incremental: bool = Form(True)):
+    """[EMOJI] Export automatique vers Apache Superset (seulement les changements si incremental)"""
     if not BI_INTEGRATION_AVAILABLE:
         raise HTTPException(status_code=503, detail="Module BI non disponible")
 
@@ -9644,24 +9584,26 @@ async def export_to_superset(project_id: str = Form(...)):
         if not superset_connector:
             raise HTTPException(status_code=404, detail="Connecteur Superset non configure")
 
+        # Changements depuis le dernier export (toujours calcules pour garder l instantane a jour)
+        delta = await asyncio.to_thread(bi_manager.compute_delta, project_id, superset_connector.config, bim_data)
+
         # Exporter vers Superset
-        result = await superset_connector.export_bim_data(bim_data)
+        result = await superset_connector.export_bim_data(bim_data, delta if incremental else None)
 
-        if result["success"]:
-            # Mettre a jour l historique
-            bi_manager.sync_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "project_id": project_id,
-                "platform": "PowerBI",
-                "status": "success",
-                "message": result["message"]
-            })
+        # Mettre a jour l historique et le filigrane de synchronisation
+        watermark = await asyncio.to_thread(
+            bi_manager.record_sync, project_id, superset_connector.config, "PowerBI", result, delta
+        )
 
+        if result["success"]:
             return {
                 "success": True,
                 "message": "Donnees exportees vers Superset avec succes",
                 "project_id": project_id,
                 "export_time": datetime.now().isoformat(),
+                "sync_mode": "incremental" if incremental else "full",
+                "changes": delta["summary"],
+                "watermark": watermark,
                 "data_summary": {
                     "total_elements": bim_data["performance_kpis"]["total_elements"],
                     "element_types": len(bim_data["element_counts"]),
@@ -9716,7 +9658,7 @@ async def export_to_ifcviewer(project_id: str = Form(...)):
 
         if result["success"]:
             # Mettre a jour l historique
-            bi_manager.sync_history.append({
+            await asyncio.to_thread(bi_manager.sync_history.append, {
                 "timestamp": datetime.now().isoformat(),
                 "project_id": project_id,
                 "platform": "Tableau",
@@ -9797,8 +9739,8 @@ async def trigger_n8n_workflow(project_id: str = Form(...), workflow_type: str =
         raise HTTPException(status_code=500, detail=f"Erreur workflow n8n: {str(e)}")
 
 @app.post("/bi/sync-erp")
-async def sync_with_erp(project_id: str = Form(...)):
-    """[EMOJI] Synchronisation avec les systemes ERP"""
+async def sync_with_erp(project_id: str = Form(...), incremental: bool = Form(True)):
+    """[EMOJI] Synchronisation avec les systemes ERP (seulement les changements si incremental)"""
     if not BI_INTEGRATION_AVAILABLE:
         raise HTTPException(status_code=503, detail="Module BI non disponible")
 
@@ -9833,31 +9775,33 @@ async def sync_with_erp(project_id: str = Form(...)):
         erp_connector = None
         for connector in bi_manager.connectors.values():
             if connector.type == "erp" and connector.active:
-                erp_connector = ERPConnector(connector)
+                erp_connector = ERPNextConnector(connector)
                 break
 
         if not erp_connector:
             raise HTTPException(status_code=404, detail="Connecteur ERP non configure")
 
+        # Changements depuis la derniere synchronisation
+        delta = await asyncio.to_thread(bi_manager.compute_delta, project_id, erp_connector.config, bim_data)
+
         # Synchroniser avec l ERP
-        result = await erp_connector.sync_project_costs(bim_data)
+        result = await erp_connector.sync_project_costs(bim_data, delta if incremental else None)
 
-        if result["success"]:
-            # Mettre a jour l historique
-            bi_manager.sync_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "project_id": project_id,
-                "platform": "ERP",
-                "status": "success",
-                "message": result["message"]
-            })
+        # Mettre a jour l historique et le filigrane de synchronisation
+        watermark = await asyncio.to_thread(
+            bi_manager.record_sync, project_id, erp_connector.config, "ERP", result, delta
+        )
 
+        if result["success"]:
             return {
                 "success": True,
                 "message": "Donnees synchronisees avec l ERP avec succes",
                 "project_id": project_id,
                 "erp_project_id": result.get("erp_project_id"),
                 "sync_time": datetime.now().isoformat(),
+                "sync_mode": "incremental" if incremental else "full",
+                "changes": delta["summary"],
+                "watermark": watermark,
                 "synced_data": {
                     "cost_elements": len(bim_data.get("cost_metrics", {})),
                     "quantities": bim_data["performance_kpis"],
@@ -9920,21 +9864,13 @@ async def get_sync_history(limit: int = Query(50)):
         raise HTTPException(status_code=503, detail="Module BI non disponible")
 
     try:
-        # Retourner l historique des synchronisations
-        history = bi_manager.sync_history[-limit:] if bi_manager.sync_history else []
+        # Retourner les dernieres synchronisations (lues page par page dans SQLite)
+        history = await asyncio.to_thread(bi_manager.sync_history.recent, limit)
 
-        # Statistiques
-        total_syncs = len(bi_manager.sync_history)
-        successful_syncs = sum(1 for sync in bi_manager.sync_history if sync.get("status") == "success")
-
-        platforms_stats = {}
-        for sync in bi_manager.sync_history:
-            platform = sync.get("platform", "unknown")
-            if platform not in platforms_stats:
-                platforms_stats[platform] = {"total": 0, "success": 0}
-            platforms_stats[platform]["total"] += 1
-            if sync.get("status") == "success":
-                platforms_stats[platform]["success"] += 1
+        # Statistiques agregees par SQLite
+        platforms_stats = await asyncio.to_thread(bi_manager.sync_history.platform_statistics)
+        total_syncs = sum(stats["total"] for stats in platforms_stats.values())
+        successful_syncs = sum(stats["success"] for stats in platforms_stats.values())
 
         return {
             "history": history,
@@ -9952,11 +9888,116 @@ async def get_sync_history(limit: int = Query(50)):
         raise HTTPException(status_code=500, detail=f"Erreur historique BI: {str(e)}")
 
 @app.post("/bi/export-all-platforms")
-async def export_to_all_platforms(project_id: str = Form(...)):
+async def export_to_all_platforms(project_id: str = Form(...), incremental: bool = Form(True)):
     """[ROCKET] Export vers toutes les plateformes BI configurees"""
     if not BI_INTEGRATION_AVAILABLE:
         raise HTTPException(status_code=503, detail="Module BI non disponible")
 
+    try:
+        # Trouver le fichier geometry.ifc du projet
+        project_path = None
+
+        # Chercher dans les projets XeoKit
+        xeokit_projects_path = os.path.join(os.path.dirname(__file__), "..", "xeokit-bim-viewer", "app", "data", "projects")
+        if os.path.exists(xeokit_projects_path):
+            for project_folder in os.listdir(xeokit_projects_path):
+                if project_id in project_folder:
+                    geometry_file = os.path.join(xeokit_projects_path, project_folder, "geometry.ifc")
+                    if os.path.exists(geometry_file):
+                        project_path = geometry_file
+                        break
+
+        if not project_path:
+            raise HTTPException(status_code=404, detail=f"Projet {project_id} non trouve")
+
+        # Extraire les donnees BIM une seule fois pour toutes les plateformes
+        bim_data = await bi_manager.extract_bim_data_for_bi(project_id, project_path)
+
+        # Une tache d export par connecteur actif, executees en parallele
+        # (le client HTTP partage limite la concurrence par connecteur)
+        exports = {}
+        deltas = {}
+        for connector in bi_manager.connectors.values():
+            if not connector.active:
+                continue
+            if connector.type in ("superset", "erp"):
+                # Plateformes supportant l export incremental
+                deltas[connector.name] = await asyncio.to_thread(bi_manager.compute_delta, project_id, connector, bim_data)
+                delta = deltas[connector.name] if incremental else None
+                if connector.type == "superset":
+                    exports[connector.name] = SupersetConnector(connector).export_bim_data(bim_data, delta)
+                else:
+                    exports[connector.name] = ERPNextConnector(connector).sync_project_costs(bim_data, delta)
+            elif connector.type in ("ifc_viewer", "tableau"):
+                exports[connector.name] = IFCViewerConnector(connector).export_bim_data(bim_data)
+            elif connector.type == "n8n":
+                exports[connector.name] = N8nConnector(connector).trigger_workflow(bim_data)
+
+        if not exports:
+            raise HTTPException(status_code=404, detail="Aucun connecteur BI actif")
+
+        results = await asyncio.gather(*exports.values(), return_exceptions=True)
+
+        platform_results = {}
+        for (name, result) in zip(exports.keys(), results):
+            if isinstance(result, Exception):
+                result = {"success": False, "error": str(result)}
+            platform_results[name] = result
+
+            connector = bi_manager.connectors[name]
+            await asyncio.to_thread(bi_manager.record_sync, project_id, connector, connector.type, result, deltas.get(name))
+
+        successful = sum(1 for r in platform_results.values() if r.get("success"))
+        return {
+            "success": successful > 0,
+            "message": f"Export termine: {successful}/{len(platform_results)} plateformes",
+            "project_id": project_id,
+            "export_time": datetime.now().isoformat(),
+            "results": platform_results
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erreur export multi-plateformes: {e}")
+        raise HTTPException(status_code=500, detail=f"Erreur export multi-plateformes: {str(e)}")
+
+@app.on_event("startup")
+async def start_storage_compaction():
+    """Lance la compaction periodique des dossiers de sortie (retention, compression)"""
+    if os.getenv("STORAGE_RETENTION_ENABLED", "1") == "1":
+        storage_manager.start(float(os.getenv("STORAGE_COMPACTION_INTERVAL_S", "3600")))
+
+@app.on_event("shutdown")
+async def stop_storage_compaction():
+    storage_manager.stop()
+
+@app.on_event("startup")
+async def start_project_catalog():
+    """Construit le catalogue des projets et le tient a jour (watchdog, sinon sondage des mtimes)"""
+    await asyncio.to_thread(project_catalog.start, float(os.getenv("PROJECT_CATALOG_POLL_S", "5")))
+
+@app.on_event("shutdown")
+async def stop_project_catalog():
+    project_catalog.stop()
+
+@app.get("/storage/stats")
+async def get_storage_stats():
+    """Taille et nombre d entrees par zone de stockage, derniere compaction"""
+    return JSONResponse({"status": "success", "storage": await asyncio.to_thread(storage_manager.stats)})
+
+@app.post("/storage/compact")
+async def run_storage_compaction():
+    """Lance immediatement une passe de retention/compression"""
+    return JSONResponse({"status": "success", "compaction": await asyncio.to_thread(storage_manager.compact)})
+
+@app.on_event("shutdown")
+async def close_bi_http_client():
+    """Ferme le pool de connexions HTTP des connecteurs BI"""
+    if BI_INTEGRATION_AVAILABLE:
+        from bi_http_client import bi_http_client
+        await bi_http_client.aclose()
+
 # ==================== NOUVEAUX ENDPOINTS POUR DASHBOARD ENRICHI ====================
 
 # 🚀 NOUVELLES FONCTIONS POUR DASHBOARDS COHÉRENTS ET RÉELS
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from fastapi.responses import JSONResponse, FileResponse
 from app.core import file_manager
 
@@ -15,8 +16,8 @@ async def upload_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("")
-async def list_files():
-    files = file_manager.list_files()
+async def list_files(type: Optional[str] = None, limit: Optional[int] = Query(None, ge=1), offset: int = Query(0, ge=0)):
+    files = file_manager.list_files(file_type=type, limit=limit, offset=offset)
     return {"status": "success", "data": files}
 
 @router.get("/{file_id}")
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from app.models.ocr_models import ProcessingOptions
-from app.core.processing_manager import ProcessingManager
+from app.core.processing_manager import ProcessingManager, QueueFullError, ACTIVE_STATUSES
 import asyncio
 
 router = APIRouter()
@@ -9,10 +9,13 @@ manager = ProcessingManager()
 
 @router.post("/process/{file_id}")
 async def start_processing(file_id: str, options: ProcessingOptions):
-    if manager.get_status(file_id) == "processing":
+    if manager.get_status(file_id) in ACTIVE_STATUSES:
         raise HTTPException(400, "Processing already in progress for this file")
 
-    task = manager.add_task(file_id, manager.start_processing(file_id, options))
+    try:
+        manager.add_task(file_id, manager.start_processing(file_id, options))
+    except QueueFullError as e:
+        raise HTTPException(429, str(e))
     return JSONResponse({"file_id": file_id, "status": "processing_started"})
 
 
@@ -30,6 +33,10 @@ async def cancel_processing(file_id: str):
         raise HTTPException(400, "No active processing task to cancel")
     return {"file_id": file_id, "status": "cancelled"}
 
+@router.get("/process/cache/stats")
+async def get_cache_stats():
+    return manager.cache.get_stats()
+
 @router.get("/process/queue")
 async def get_queue():
     queue = manager.get_queue()
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from pathlib import Path
+from typing import Optional, Tuple
 import json
+from app.storage.result_store import result_store
 
 router = APIRouter()
 BASE_RESULTS_DIR = Path("data/results")
 
+def _pages_dir(file_id: str) -> Path:
+    return BASE_RESULTS_DIR / f"{file_id}_pages"
+
 def load_results(file_id: str) -> dict:
     results_path = BASE_RESULTS_DIR / f"{file_id}.json"
     if not results_path.exists():
@@ -17,27 +22,78 @@ async def get_all_results(file_id: str):
     """Return the entire JSON results for a file."""
     return load_results(file_id)
 
+def _ensure_indexed(file_id: str):
+    """Results saved before the index existed are indexed on first query."""
+    if not result_store.has_results(file_id):
+        result_store.index_results(file_id, load_results(file_id))
+
+def _viewport(x_min, y_min, x_max, y_max) -> Optional[Tuple[float, float, float, float]]:
+    coords = (x_min, y_min, x_max, y_max)
+    if all(c is None for c in coords):
+        return None
+    if any(c is None for c in coords):
+        raise HTTPException(status_code=400, detail="Viewport needs x_min, y_min, x_max and y_max.")
+    return coords
+
+def _query(file_id: str, kind: str, response: Response, item_type: Optional[str] = None,
+           x_min=None, y_min=None, x_max=None, y_max=None, page=None, limit=None, offset=0) -> list:
+    _ensure_indexed(file_id)
+    items, total = result_store.query_items(
+        file_id, kind, item_type=item_type, bbox=_viewport(x_min, y_min, x_max, y_max),
+        page=page, limit=limit, offset=offset
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return items
+
 @router.get("/results/{file_id}/text")
-async def get_text_results(file_id: str):
-    """Return everything under ocr.results."""
-    data = load_results(file_id)
-    return data.get("ocr", {}).get("results", [])
+async def get_text_results(file_id: str, response: Response,
+                           x_min: Optional[float] = None, y_min: Optional[float] = None,
+                           x_max: Optional[float] = None, y_max: Optional[float] = None,
+                           page: Optional[int] = None, limit: Optional[int] = Query(None, ge=1), offset: int = Query(0, ge=0)):
+    """Return everything under ocr.results (optionally within a viewport, paginated)."""
+    return _query(file_id, "text", response, None, x_min, y_min, x_max, y_max, page, limit, offset)
 
 @router.get("/results/{file_id}/dimensions")
-async def get_dimensions_results(file_id: str):
+async def get_dimensions_results(file_id: str, response: Response,
+                                 x_min: Optional[float] = None, y_min: Optional[float] = None,
+                                 x_max: Optional[float] = None, y_max: Optional[float] = None,
+                                 page: Optional[int] = None, limit: Optional[int] = Query(None, ge=1), offset: int = Query(0, ge=0)):
     """Return only OCR results where type == 'dimension'."""
-    data = load_results(file_id)
-    ocr_results = data.get("ocr", {}).get("results", [])
-    return [item for item in ocr_results if item.get("type") == "dimension"]
+    return _query(file_id, "text", response, "dimension", x_min, y_min, x_max, y_max, page, limit, offset)
 
 @router.get("/results/{file_id}/symbols")
-async def get_symbols_results(file_id: str):
+async def get_symbols_results(file_id: str, response: Response, name: Optional[str] = None,
+                              x_min: Optional[float] = None, y_min: Optional[float] = None,
+                              x_max: Optional[float] = None, y_max: Optional[float] = None,
+                              page: Optional[int] = None, limit: Optional[int] = Query(None, ge=1), offset: int = Query(0, ge=0)):
     """Return vision.symbols."""
-    data = load_results(file_id)
-    return data.get("vision", {}).get("symbols", [])
+    return _query(file_id, "symbol", response, name, x_min, y_min, x_max, y_max, page, limit, offset)
 
 @router.get("/results/{file_id}/elements")
-async def get_elements_results(file_id: str):
+async def get_elements_results(file_id: str, response: Response, element_type: Optional[str] = None,
+                               x_min: Optional[float] = None, y_min: Optional[float] = None,
+                               x_max: Optional[float] = None, y_max: Optional[float] = None,
+                               page: Optional[int] = None, limit: Optional[int] = Query(None, ge=1), offset: int = Query(0, ge=0)):
     """Return vision.elements."""
-    data = load_results(file_id)
-    return data.get("vision", {}).get("elements", [])
+    return _query(file_id, "element", response, element_type, x_min, y_min, x_max, y_max, page, limit, offset)
+
+@router.get("/results/{file_id}/pages")
+async def get_pages_results(file_id: str):
+    """Return the PDF pages processed so far (available while the job is still running)."""
+    pages_dir = _pages_dir(file_id)
+    if not pages_dir.exists():
+        raise HTTPException(status_code=404, detail=f"No page results for file_id '{file_id}'.")
+    pages = []
+    for page_path in sorted(pages_dir.glob("page_*.json")):
+        with open(page_path, "r", encoding="utf-8") as f:
+            pages.append(json.load(f))
+    return {"file_id": file_id, "completed_pages": len(pages), "pages": pages}
+
+@router.get("/results/{file_id}/pages/{page}")
+async def get_page_results(file_id: str, page: int):
+    """Return the results of a single PDF page (1-based)."""
+    page_path = _pages_dir(file_id) / f"page_{page:04d}.json"
+    if not page_path.exists():
+        raise HTTPException(status_code=404, detail=f"Page {page} of file_id '{file_id}' not processed yet.")
+    with open(page_path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -23,18 +23,35 @@ EXPORTS_DIR = os.getenv("EXPORTS_DIR", os.path.join(DATA_DIR, "exports"))
 THUMBNAILS_DIR = os.path.join(DATA_DIR, "thumbnails")
 CACHE_DIR = os.path.join(DATA_DIR, "cache")
 MODELS_DIR = os.path.join(DATA_DIR, "models")
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", os.path.join(DATA_DIR, "ocr_index.db"))  # file/result query index
 
 # =========================
 # Processing settings
 # =========================
 MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", 3))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", 10))  # jobs waiting for a worker slot
 PROCESSING_TIMEOUT = int(os.getenv("PROCESSING_TIMEOUT", 300))  # seconds
+JOB_MEMORY_LIMIT_MB = int(os.getenv("JOB_MEMORY_LIMIT_MB", 4096))  # heap per worker process, on top of what it inherits; 0 = unlimited
+PDF_RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", 200))  # rasterization resolution for PDF plan sets
+PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", 4))  # pages of one PDF processed in parallel
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", 512))  # on-disk cache of processing results
 
 # =========================
 # OCR configuration
 # =========================
 TESSERACT_PATH = os.getenv("TESSERACT_PATH", "/usr/bin/tesseract")
 OCR_LANGUAGES = os.getenv("OCR_LANGUAGES", "eng")  # comma-separated: "eng,fra"
+OCR_TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", 4096))  # rasters larger than this are OCR'd in tiles
+OCR_TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", 256))  # must exceed the largest word, in pixels
+OCR_TILE_WORKERS = int(os.getenv("OCR_TILE_WORKERS", 4))
+
+# =========================
+# Text classification
+# =========================
+TEXT_CLASSIFIER = os.getenv("TEXT_CLASSIFIER", "auto")  # "local", "groq", or "auto" (groq when GROQ_API_KEY is set)
+LLM_BATCH_WORDS = int(os.getenv("LLM_BATCH_WORDS", 400))  # OCR words per classification request
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))  # batches in flight per page
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))  # per worker process, 0 = unlimited
 
 # =========================
 # Logging
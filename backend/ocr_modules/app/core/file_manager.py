@@ -6,7 +6,8 @@ from typing import List, Optional
 from fastapi import UploadFile, HTTPException
 from app.utils.validation import validate_file_type
 from app.storage.file_storage import save_file_to_disk, save_metadata_to_json
-from app.utils.image_utils import generate_thumbnail
+from app.storage.result_store import result_store
+from app.utils.image_utils import generate_thumbnail, is_pdf, get_pdf_page_count
 
 UPLOAD_DIR = "data/uploads"
 
@@ -32,11 +33,12 @@ async def process_uploaded_file(file: UploadFile) -> dict:
         "filename": file.filename,
         "type": file_type,
         "size_kb": file_size_kb,
-        "pages": None,
+        "pages": get_pdf_page_count(saved_path) if is_pdf(saved_path) else 1,
         "dimensions": None,
         "thumbnail": "thumbnail.png"
     }
     save_metadata_to_json(metadata, file_dir)
+    result_store.upsert_file(metadata)
 
     return metadata
 
@@ -55,24 +57,40 @@ def classify_blueprint_type(filename: str) -> str:
 def _get_file_folder(file_id: str) -> str:
     return os.path.join(UPLOAD_DIR, file_id)
 
-def list_files() -> List[dict]:
-    files = []
+def _sync_file_index():
+    """
+    Index uploads the store doesn't know yet (e.g. uploaded before the index existed) and
+    forget those whose folder is gone (e.g. removed by the backend's retention policies).
+    """
     if not os.path.exists(UPLOAD_DIR):
-        return files
-    for file_id in os.listdir(UPLOAD_DIR):
+        return
+    known = result_store.known_file_ids()
+    on_disk = os.listdir(UPLOAD_DIR)
+    for file_id in known.difference(on_disk):
+        result_store.delete_file(file_id)
+    for file_id in on_disk:
+        if file_id in known:
+            continue
         meta_path = os.path.join(_get_file_folder(file_id), "metadata.json")
         if os.path.exists(meta_path):
             with open(meta_path, "r") as f:
-                metadata = json.load(f)
-                files.append(metadata)
+                result_store.upsert_file(json.load(f))
+
+def list_files(file_type: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+    _sync_file_index()
+    files, _ = result_store.list_files(file_type=file_type, limit=limit, offset=offset)
     return files
 
 def get_file(file_id: str) -> Optional[dict]:
+    metadata = result_store.get_file(file_id)
+    if metadata is not None:
+        return metadata
     meta_path = os.path.join(_get_file_folder(file_id), "metadata.json")
     if not os.path.exists(meta_path):
         return None
     with open(meta_path, "r") as f:
         metadata = json.load(f)
+    result_store.upsert_file(metadata)
     return metadata
 
 def delete_file(file_id: str) -> bool:
@@ -80,6 +98,7 @@ def delete_file(file_id: str) -> bool:
     if not os.path.exists(folder):
         return False
     shutil.rmtree(folder)
+    result_store.delete_file(file_id)
     return True
 
 def get_thumbnail_path(file_id: str) -> Optional[str]:
@@ -0,0 +1,162 @@
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from app.config import PDF_RENDER_DPI, PAGE_WORKERS
+from app.core.ocr_engine import perform_ocr
+from app.core.vision_engine import detect_symbols_and_elements
+from app.processors.image_pipeline import ImagePipeline
+from app.models.ocr_models import ProcessingOptions, DetectedSymbolModel, DetectedElementModel
+from app.storage.file_storage import save_page_results, clear_page_results
+from app.utils.image_utils import is_pdf, get_pdf_page_count, render_pdf_page
+
+
+def _process_image(file_path: str, pipeline: ImagePipeline, options: ProcessingOptions) -> Dict[str, Any]:
+    """OCR and vision on one decoded image (a single upload or one PDF page)."""
+    ocr_results = []
+    vision_results = {}
+    ocr_time = 0
+
+    if options.enable_ocr:
+        # Enable LLM type detection if requested
+        ocr_results, ocr_time = perform_ocr(file_path, options.languages, use_llm=options.use_llm, pipeline=pipeline)
+
+    if options.enable_vision:
+        symbols, elements, vision_time = detect_symbols_and_elements(file_path, pipeline=pipeline)
+
+        # Convert to dicts for JSON serialization using Pydantic models
+        vision_results = {
+            "symbols": [DetectedSymbolModel(
+                name=s.name,
+                bbox=s.bbox,
+                confidence=s.confidence
+            ).dict() for s in symbols],
+
+            "elements": [DetectedElementModel(
+                element_type=e.element_type,
+                bbox=e.bbox,
+                confidence=getattr(e, 'confidence', None)
+            ).dict() for e in elements],
+
+            "processing_time": vision_time
+        }
+
+    return {
+        "ocr": {
+            "results": [item.dict() for item in ocr_results],
+            "processing_time": ocr_time
+        },
+        "vision": vision_results
+    }
+
+
+def _process_pdf_page(file_id: Optional[str], file_path: str, page_index: int, options: ProcessingOptions) -> Dict[str, Any]:
+    # Each page is rasterized by the thread that processes it (MuPDF calls are serialized in
+    # render_pdf_page): only PAGE_WORKERS pages live in memory
+    pipeline = ImagePipeline(render_pdf_page(file_path, page_index, dpi=PDF_RENDER_DPI))
+    page_results = _process_image(file_path, pipeline, options)
+    page_results["page"] = page_index + 1
+    if file_id:
+        save_page_results(file_id, page_index, page_results)
+    return page_results
+
+
+def _merge_pages(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Flatten per-page results into the single-image layout, tagging every item with its page."""
+    merged = {
+        "ocr": {"results": [], "processing_time": 0},
+        "vision": {},
+        "pages": len(pages)
+    }
+    for page in pages:
+        number = page["page"]
+        merged["ocr"]["results"].extend({**item, "page": number} for item in page["ocr"]["results"])
+        merged["ocr"]["processing_time"] += page["ocr"]["processing_time"]
+        if page["vision"]:
+            vision = merged["vision"]
+            vision.setdefault("symbols", []).extend({**s, "page": number} for s in page["vision"]["symbols"])
+            vision.setdefault("elements", []).extend({**e, "page": number} for e in page["vision"]["elements"])
+            vision["processing_time"] = vision.get("processing_time", 0) + page["vision"]["processing_time"]
+    return merged
+
+
+def run_job(file_path: str, options: ProcessingOptions, file_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run OCR and vision on a file and return JSON-serializable results.
+    Runs inside a worker process, never on the API event loop.
+    PDF plan sets are processed page by page on PAGE_WORKERS threads; each finished page
+    is persisted right away (when file_id is given) so partial results are available.
+    """
+    if not is_pdf(file_path):
+        # Decode the blueprint once for OCR and every detector
+        pipeline = ImagePipeline.from_file(file_path) if (options.enable_ocr or options.enable_vision) else None
+        return _process_image(file_path, pipeline, options)
+
+    page_count = get_pdf_page_count(file_path)
+    if file_id:
+        clear_page_results(file_id)  # drop pages left over from a previous run
+    pages = []
+    # Threads rather than processes: the job worker is daemonic, and the heavy lifting
+    # (tesseract subprocess, OpenCV) happens outside the GIL; MuPDF rendering, which is
+    # not thread-safe, runs one page at a time
+    with ThreadPoolExecutor(max_workers=max(1, min(PAGE_WORKERS, page_count))) as executor:
+        futures = [
+            executor.submit(_process_pdf_page, file_id, file_path, page_index, options)
+            for page_index in range(page_count)
+        ]
+        for future in as_completed(futures):
+            pages.append(future.result())
+
+    pages.sort(key=lambda page: page["page"])
+    return _merge_pages(pages)
+
+
+def _data_segment_bytes() -> int:
+    """Private writable memory already mapped (VmData); 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmData:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _apply_resource_limits(memory_limit_mb: int):
+    """
+    Give the worker memory_limit_mb of heap on top of what it inherited (POSIX only).
+    The worker is forked from the forkserver with the OCR libraries already imported, so
+    RLIMIT_AS would count every inherited mapping (models, thread arenas); RLIMIT_DATA only
+    counts data/heap, and the limit is raised by the data segment already in use at startup.
+    There is no CPU-time limit: CPU time adds up across page and tile threads, and the
+    manager already stops a worker that exceeds the wall-clock timeout.
+    """
+    try:
+        import resource
+    except ImportError:
+        return  # Windows: only the wall-clock timeout applies
+
+    if memory_limit_mb:
+        limit = _data_segment_bytes() + memory_limit_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, hard))
+
+
+def job_entrypoint(conn, file_id: str, file_path: str, options: Dict[str, Any], memory_limit_mb: int):
+    """Worker process entry point: sends ("ok", results) or ("error", message) back through conn."""
+    try:
+        _apply_resource_limits(memory_limit_mb)
+        results = run_job(file_path, ProcessingOptions(**options), file_id=file_id)
+        conn.send(("ok", results))
+    except MemoryError:
+        conn.send(("error", f"memory limit of {memory_limit_mb} MB exceeded"))
+    except Exception as e:
+        traceback.print_exc()
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+        os._exit(0)
@@ -1,21 +1,69 @@
 import os
+import time
 import asyncio
-from typing import Dict
-from app.core.ocr_engine import perform_ocr
-from app.core.vision_engine import detect_symbols_and_elements
-from app.storage.file_storage import get_file_path, save_results
-from app.models.ocr_models import ProcessingOptions, DetectedSymbolModel, DetectedElementModel
+import multiprocessing
+from typing import Dict, Optional
+from app.config import MAX_CONCURRENT_JOBS, MAX_QUEUED_JOBS, PROCESSING_TIMEOUT, JOB_MEMORY_LIMIT_MB
+from app.core.job_worker import job_entrypoint
+from app.storage.file_storage import get_file_path, save_results, load_page_results, restore_page_results
+from app.storage.cache_manager import ResultCache, result_cache
+from app.storage.result_store import result_store
+from app.models.ocr_models import ProcessingOptions
+from app.utils.image_utils import is_pdf
+
+# Forking the threaded API process can copy locks held by other threads (logging, fitz, thread
+# pools). forkserver forks workers from a clean single-threaded server instead, and preloading
+# only the worker module keeps the host application out of it; spawn is the only option on Windows.
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _mp_context = multiprocessing.get_context("forkserver")
+    _mp_context.set_forkserver_preload(["app.core.job_worker"])
+else:
+    _mp_context = multiprocessing.get_context("spawn")
+
+ACTIVE_STATUSES = ("queued", "processing")
+
+
+class QueueFullError(Exception):
+    pass
+
 
 class ProcessingManager:
-    def __init__(self):
+    """
+    Runs OCR/vision jobs in worker processes so that Tesseract and OpenCV never block the event loop.
+    At most max_concurrent_jobs workers run at once and at most max_queued_jobs more wait for a slot.
+    Each worker can be terminated (cancel, timeout) and runs under a memory limit.
+    Results are cached by file content + options, so re-processing an identical upload is instant.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_jobs: int = MAX_CONCURRENT_JOBS,
+        max_queued_jobs: int = MAX_QUEUED_JOBS,
+        timeout: int = PROCESSING_TIMEOUT,
+        memory_limit_mb: int = JOB_MEMORY_LIMIT_MB,
+        cache: ResultCache = result_cache,
+    ):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.cache = cache
         self.status: Dict[str, str] = {}  # file_id -> status
         self.tasks: Dict[str, asyncio.Task] = {}  # file_id -> asyncio.Task
+        self.processes: Dict[str, multiprocessing.Process] = {}  # file_id -> running worker
+        self._slots: Optional[asyncio.Semaphore] = None
 
-    async def start_processing(self, file_id: str, options: ProcessingOptions):
-        if self.status.get(file_id) == "processing":
-            return  # Already processing
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent_jobs)
+        return self._slots
 
-        self.status[file_id] = "processing"
+    def can_admit(self) -> bool:
+        active = sum(1 for status in self.status.values() if status in ACTIVE_STATUSES)
+        return active < self.max_concurrent_jobs + self.max_queued_jobs
+
+    async def start_processing(self, file_id: str, options: ProcessingOptions):
+        self.status[file_id] = "queued"
 
         try:
             folder_path = get_file_path(file_id)
@@ -28,43 +76,26 @@ class ProcessingManager:
             if not file_path:
                 raise FileNotFoundError(f"No file starting with 'original.' found in {folder_path}")
 
-            ocr_results = []
-            vision_results = {}
-            ocr_time = 0
-            vision_time = 0
-
-            if options.enable_ocr:
-                # Enable LLM type detection if requested
-                ocr_results, ocr_time = perform_ocr(file_path, options.languages, use_llm=options.use_llm)
-
-            if options.enable_vision:
-                symbols, elements, vision_time = detect_symbols_and_elements(file_path)
-
-                # Convert to dicts for JSON serialization using Pydantic models
-                vision_results = {
-                    "symbols": [DetectedSymbolModel(
-                        name=s.name,
-                        bbox=s.bbox,
-                        confidence=s.confidence
-                    ).dict() for s in symbols],
-
-                    "elements": [DetectedElementModel(
-                        element_type=e.element_type,
-                        bbox=e.bbox,
-                        confidence=getattr(e, 'confidence', None)
-                    ).dict() for e in elements],
-
-                    "processing_time": vision_time
-                }
-
-            # Save results as JSON-serializable dicts
-            save_results(file_id, {
-                "ocr": {
-                    "results": [item.dict() for item in ocr_results],
-                    "processing_time": ocr_time
-                },
-                "vision": vision_results
-            })
+            # Identical file + options already processed: skip OCR, vision and the LLM entirely
+            file_hash = await asyncio.to_thread(self.cache.hash_file, file_path)
+            cache_key = self.cache.make_key(file_hash, options)
+            entry = await asyncio.to_thread(self.cache.get, cache_key)
+
+            if entry is None:
+                async with self._get_slots():
+                    self.status[file_id] = "processing"
+                    results = await self._run_in_worker(file_id, file_path, options)
+                # The worker persisted each PDF page; cache them with the merged results
+                pages = await asyncio.to_thread(load_page_results, file_id) if is_pdf(file_path) else []
+                await asyncio.to_thread(self.cache.put, cache_key, {"results": results, "pages": pages})
+            else:
+                results = entry["results"]
+                # run_job was skipped: write the page files it would have written
+                await asyncio.to_thread(restore_page_results, file_id, entry["pages"])
+
+            # Save results as JSON-serializable dicts and index them for queries
+            await asyncio.to_thread(save_results, file_id, results)
+            await asyncio.to_thread(result_store.index_results, file_id, results)
 
             self.status[file_id] = "completed"
 
@@ -74,6 +105,39 @@ class ProcessingManager:
         except Exception as e:
             self.status[file_id] = f"failed: {str(e)}"
 
+    async def _run_in_worker(self, file_id: str, file_path: str, options: ProcessingOptions) -> dict:
+        recv_conn, send_conn = _mp_context.Pipe(duplex=False)
+        process = _mp_context.Process(
+            target=job_entrypoint,
+            args=(send_conn, file_id, file_path, options.dict(), self.memory_limit_mb),
+            daemon=True,
+        )
+        process.start()
+        send_conn.close()
+        self.processes[file_id] = process
+        started = time.monotonic()
+
+        try:
+            while not recv_conn.poll():
+                if not process.is_alive() and not recv_conn.poll():
+                    raise RuntimeError(f"worker exited with code {process.exitcode}")
+                if time.monotonic() - started > self.timeout:
+                    raise TimeoutError(f"processing exceeded {self.timeout}s")
+                await asyncio.sleep(0.1)
+
+            # The result can be large: unpickling it must not stall the event loop
+            outcome, payload = await asyncio.to_thread(recv_conn.recv)
+            if outcome != "ok":
+                raise RuntimeError(payload)
+            return payload
+        finally:
+            # Cancellation and timeouts land here too: stop the worker for real
+            if process.is_alive():
+                process.terminate()
+            await asyncio.to_thread(process.join, 5)
+            recv_conn.close()
+            self.processes.pop(file_id, None)
+
     def get_status(self, file_id: str) -> str:
         return self.status.get(file_id, "not_found")
 
@@ -81,14 +145,24 @@ class ProcessingManager:
         task = self.tasks.get(file_id)
         if task and not task.done():
             task.cancel()
+            # The task terminates the worker when it resumes; do it now in case it is blocked
+            process = self.processes.get(file_id)
+            if process is not None and process.is_alive():
+                process.terminate()
             self.status[file_id] = "cancelled"
             return True
         return False
 
     def get_queue(self):
-        return [fid for fid, status in self.status.items() if status == "processing"]
+        return [fid for fid, status in self.status.items() if status in ACTIVE_STATUSES]
 
     def add_task(self, file_id: str, coro):
+        if not self.can_admit():
+            coro.close()
+            raise QueueFullError(
+                f"Processing queue is full ({self.max_concurrent_jobs} running, {self.max_queued_jobs} queued)"
+            )
+        self.status[file_id] = "queued"
         task = asyncio.create_task(coro)
         self.tasks[file_id] = task
         return task
@@ -1,17 +1,23 @@
+from typing import Optional
 from app.processors.element_detector import ElementDetector
 from app.processors.symbol_detector import SymbolDetector
+from app.processors.image_pipeline import ImagePipeline
 
-def detect_symbols_and_elements(file_path: str):
+def detect_symbols_and_elements(file_path: str, pipeline: Optional[ImagePipeline] = None):
     import time
     start_time = time.time()
 
+    # Decode once; both detectors share the grayscale/binary/contour products
+    if pipeline is None:
+        pipeline = ImagePipeline.from_file(file_path)
+
     # Detect symbols
     symbol_detector = SymbolDetector()
-    symbols = symbol_detector.detect_symbols(file_path)
+    symbols = symbol_detector.detect_symbols(file_path, pipeline=pipeline)
 
     # Detect elements
     element_detector = ElementDetector()
-    elements, _ = element_detector.detect_elements(file_path)
+    elements, _ = element_detector.detect_elements(file_path, pipeline=pipeline)
 
     total_processing_time = time.time() - start_time
     return symbols, elements, total_processing_time
@@ -3,8 +3,9 @@ from pathlib import Path
 import cv2
 from PIL import Image
 import numpy as np
-from typing import List
+from typing import List, Optional
 from app.models.ocr_models import DetectedElementModel
+from app.processors.image_pipeline import ImagePipeline
 
 class ElementDetector:
     def __init__(self, min_area: float = 100):
@@ -15,26 +16,19 @@ class ElementDetector:
         Detect structural elements in a single image (numpy array).
         Returns list of DetectedElementModel.
         """
-        elements = []
-
-        # Convert to grayscale if needed
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-
-        # Apply thresholding to get binary image
-        _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
+        return self.detect_elements_from_pipeline(ImagePipeline(image))
 
-        # Find contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    def detect_elements_from_pipeline(self, pipeline: ImagePipeline) -> List[DetectedElementModel]:
+        """
+        Detect structural elements from the shared pipeline products
+        (fixed thresholding keeps the dark structural strokes).
+        """
+        elements = []
 
-        for contour in contours:
-            area = cv2.contourArea(contour)
+        for area, (x, y, w, h) in pipeline.contours(("threshold", 200)):
             if area < self.min_area:
                 continue  # skip tiny contours
 
-            x, y, w, h = cv2.boundingRect(contour)
             element_type = self.classify_element_by_shape(w, h)
 
             elements.append(
@@ -64,19 +58,17 @@ class ElementDetector:
         else:
             return 'element'
 
-    def detect_elements(self, file_path: str) -> (List[DetectedElementModel], float):
+    def detect_elements(self, file_path: str, pipeline: Optional[ImagePipeline] = None) -> (List[DetectedElementModel], float):
         """
         Main function to call from vision_engine.py.
-        Takes image path and returns list of DetectedElementModel + processing_time.
+        Takes image path (or the job's already decoded pipeline) and returns list of DetectedElementModel + processing_time.
         """
         start_time = time.time()
 
-        # Open image with OpenCV
-        image = cv2.imread(file_path)
-        if image is None:
-            raise FileNotFoundError(f"Could not read image at {file_path}")
+        if pipeline is None:
+            pipeline = ImagePipeline.from_file(file_path)
 
-        elements = self.detect_elements_from_image(image)
+        elements = self.detect_elements_from_pipeline(pipeline)
         processing_time = time.time() - start_time
 
         return elements, processing_time
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+
+
+class ImagePipeline:
+    """
+    Decodes a blueprint once and caches the derived products for a job.
+    Grayscale, binarized images and contours are computed on first use and shared
+    by the text extractor and every detector instead of being rebuilt by each one.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.image = image  # BGR as returned by cv2.imread
+        self._gray: Optional[np.ndarray] = None
+        self._binaries: Dict[Tuple, np.ndarray] = {}
+        self._contours: Dict[Tuple, List[Tuple[float, Tuple[int, int, int, int]]]] = {}
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "ImagePipeline":
+        image = cv2.imread(file_path)
+        if image is None:
+            raise FileNotFoundError(f"Could not read image at {file_path}")
+        return cls(image)
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            if len(self.image.shape) == 3:
+                self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+            else:
+                self._gray = self.image
+        return self._gray
+
+    def pil_image(self) -> Image.Image:
+        """RGB view for pytesseract, built from the already decoded pixels."""
+        if len(self.image.shape) == 3:
+            return Image.fromarray(cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB))
+        return Image.fromarray(self.image)
+
+    def adaptive_binary(self, block_size: int = 15, c: int = 5) -> np.ndarray:
+        key = ("adaptive", block_size, c)
+        if key not in self._binaries:
+            self._binaries[key] = cv2.adaptiveThreshold(self.gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                                        cv2.THRESH_BINARY_INV, block_size, c)
+        return self._binaries[key]
+
+    def threshold_binary(self, thresh: int = 200) -> np.ndarray:
+        key = ("threshold", thresh)
+        if key not in self._binaries:
+            _, self._binaries[key] = cv2.threshold(self.gray, thresh, 255, cv2.THRESH_BINARY_INV)
+        return self._binaries[key]
+
+    def contours(self, binary_key: Tuple) -> List[Tuple[float, Tuple[int, int, int, int]]]:
+        """
+        External contours of a cached binary image as (area, (x, y, w, h)) tuples.
+        binary_key is ("adaptive", block_size, c) or ("threshold", thresh).
+        """
+        if binary_key not in self._contours:
+            if binary_key[0] == "adaptive":
+                binary = self.adaptive_binary(*binary_key[1:])
+            else:
+                binary = self.threshold_binary(*binary_key[1:])
+            found, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            self._contours[binary_key] = [(cv2.contourArea(c), cv2.boundingRect(c)) for c in found]
+        return self._contours[binary_key]
@@ -1,8 +1,8 @@
 import time
-import cv2
 import numpy as np
-from typing import List
+from typing import List, Optional
 from app.models.ocr_models import DetectedSymbolModel
+from app.processors.image_pipeline import ImagePipeline
 
 class SymbolDetector:
     def __init__(self, min_area: float = 50):
@@ -13,28 +13,19 @@ class SymbolDetector:
         Detect BIM symbols in a blueprint image.
         Returns list of DetectedSymbolModel.
         """
-        symbols = []
-
-        # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-
-        # Apply adaptive thresholding to capture blueprint lines and symbols
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
-                                       cv2.THRESH_BINARY_INV, 15, 5)
+        return self.detect_symbols_from_pipeline(ImagePipeline(image))
 
-        # Find contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    def detect_symbols_from_pipeline(self, pipeline: ImagePipeline) -> List[DetectedSymbolModel]:
+        """
+        Detect BIM symbols from the shared pipeline products
+        (adaptive thresholding captures blueprint lines and symbols).
+        """
+        symbols = []
 
-        for contour in contours:
-            area = cv2.contourArea(contour)
+        for area, (x, y, w, h) in pipeline.contours(("adaptive", 15, 5)):
             if area < self.min_area:
                 continue  # skip tiny noise
 
-            x, y, w, h = cv2.boundingRect(contour)
-
             # Classify BIM symbol type using aspect ratio and size heuristics
             symbol_type = self.classify_bim_symbol(w, h)
 
@@ -67,17 +58,17 @@ class SymbolDetector:
         else:
             return "generic_fixture_symbol"
 
-    def detect_symbols(self, file_path: str) -> List[DetectedSymbolModel]:
+    def detect_symbols(self, file_path: str, pipeline: Optional[ImagePipeline] = None) -> List[DetectedSymbolModel]:
         """
         Main function for vision_engine.py
+        Pass the job's pipeline to reuse an image that was already decoded.
         """
         start_time = time.time()
 
-        image = cv2.imread(file_path)
-        if image is None:
-            raise FileNotFoundError(f"Could not read image at {file_path}")
+        if pipeline is None:
+            pipeline = ImagePipeline.from_file(file_path)
 
-        symbols = self.detect_symbols_from_image(image)
+        symbols = self.detect_symbols_from_pipeline(pipeline)
         processing_time = time.time() - start_time
         # optionally return processing_time if needed
         return symbols
@@ -0,0 +1,272 @@
+import logging
+import re
+from abc import ABC, abstractmethod
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from app.config import LLM_BATCH_WORDS, LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE
+from app.models.ocr_models import OCRTextItem
+
+try:
+    from groq import Groq
+    GROQ_AVAILABLE = True
+except ImportError:
+    GROQ_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class TextClassifier(ABC):
+    """
+    Turns OCR words grouped by line (top to bottom) into typed OCRTextItem units.
+    Backends: "local" (in-process rules) and "groq" (remote LLM).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def classify(self, lines: List[List[dict]]) -> List[OCRTextItem]:
+        ...
+
+
+def _to_item(text: str, words: List[dict], typ: str) -> OCRTextItem:
+    x_min = min(w['x'] for w in words)
+    y_min = min(w['y'] for w in words)
+    x_max = max(w['x'] + w['width'] for w in words)
+    y_max = max(w['y'] + w['height'] for w in words)
+    return OCRTextItem(
+        text=text,
+        x=x_min,
+        y=y_min,
+        width=x_max - x_min,
+        height=y_max - y_min,
+        confidence=sum(w['confidence'] for w in words) / len(words),
+        type=typ
+    )
+
+
+class LocalTextClassifier(TextClassifier):
+    """
+    Offline rule/feature-based typing: splits each line into phrases at wide horizontal gaps
+    and labels them with precompiled patterns. No network, thousands of phrases per second.
+    """
+
+    name = "local"
+
+    # Checked in order; the first matching type wins
+    RULES = [
+        ("beam_type", re.compile(
+            r"\b(ipe|ipn|hea|heb|hem|upn|upe)\s?\d{2,4}\b|\bw\d{1,2}\s?x\s?\d{1,3}\b|"
+            r"\b(beam|girder|joist|lintel|purlin|poutre|poutrelle|linteau|solive|chevron)s?\b|^b\d{1,3}[a-z]?$", re.I)),
+        ("material", re.compile(
+            r"\b(concrete|b[ée]ton|steel|acier|timber|wood|bois|brick|brique|masonry|ma[çc]onnerie|glass|verre|"
+            r"gypsum|plaster|pl[âa]tre|insulation|isolant|aluminium|aluminum|rebar|mortar|mortier|stone|pierre)\b|"
+            r"\bc\d{2}/\d{2}\b|\bs(235|275|355|460)\b|\bha\s?\d{1,2}\b|\bba13\b", re.I)),
+        ("dimension", re.compile(
+            r"^[ø∅Ø]?\s?\d+([.,]\d+)?\s?(mm|cm|m|m²|m2|m³|m3|km|ft|in|%|°|'|\")?$|"
+            r"\d+([.,]\d+)?\s?(mm|cm|m²|m2|m³|m3)\b|\d+\s?[x×]\s?\d+|\d+'\s?-?\s?\d+\"|"
+            r"[ø∅Ø]\s?\d+|\be\s?=\s?\d+|\bh\s?=\s?\d+", re.I)),
+        ("location", re.compile(
+            r"\b(room|kitchen|bedroom|bathroom|bath|wc|toilet|hall|corridor|lobby|stair|stairs|staircase|"
+            r"garage|office|living|dining|balcony|terrace|roof|basement|level|floor|storey|axis|grid|"
+            r"chambre|cuisine|salon|s[ée]jour|salle|couloir|escalier|bureau|entr[ée]e|terrasse|toiture|"
+            r"sous-sol|niveau|[ée]tage|axe|palier|d[ée]gagement)\b|\br\s?\+\s?\d\b|\brdc\b|\bn[-\s]?\d\b", re.I)),
+    ]
+
+    def __init__(self, gap_factor: float = 1.5):
+        self.gap_factor = gap_factor  # gap (in word heights) that starts a new phrase on a line
+
+    def _split_phrases(self, line: List[dict]) -> List[List[dict]]:
+        words = sorted(line, key=lambda w: w['x'])
+        phrases = [[words[0]]]
+        for prev, word in zip(words, words[1:]):
+            gap = word['x'] - (prev['x'] + prev['width'])
+            if gap > self.gap_factor * max(prev['height'], word['height'], 1):
+                phrases.append([word])
+            else:
+                phrases[-1].append(word)
+        return phrases
+
+    def classify_text(self, text: str) -> str:
+        for typ, pattern in self.RULES:
+            if pattern.search(text):
+                return typ
+        return "label"
+
+    def classify(self, lines: List[List[dict]]) -> List[OCRTextItem]:
+        items = []
+        for line in lines:
+            if not line:
+                continue
+            for phrase in self._split_phrases(line):
+                text = " ".join(w['text'] for w in phrase)
+                items.append(_to_item(text, phrase, self.classify_text(text)))
+        return items
+
+
+class GroqTextClassifier(TextClassifier):
+    """LLM typing through Groq: meaningful multi-word units, batched by page band and rate limited."""
+
+    name = "groq"
+
+    def __init__(self, api_key: str):
+        if not GROQ_AVAILABLE:
+            raise ImportError("groq package is not installed")
+        self.groq_client = Groq(api_key=api_key)
+
+    def classify(self, lines: List[List[dict]]) -> List[OCRTextItem]:
+        # Split dense pages into horizontal bands and classify them concurrently
+        batches = self._make_batches(lines)
+        if len(batches) == 1:
+            batch_results = [self._classify_batch(batches[0])]
+        else:
+            logger.info(f"Classifying {sum(len(l) for l in lines)} OCR words in {len(batches)} concurrent batches")
+            with ThreadPoolExecutor(max_workers=max(1, LLM_MAX_CONCURRENCY)) as executor:
+                batch_results = list(executor.map(self._classify_batch, batches))
+        return [item for items in batch_results for item in items]
+
+    def _make_batches(self, lines: List[List[dict]]) -> List[List[List[dict]]]:
+        """Group consecutive lines into bands of at most LLM_BATCH_WORDS words."""
+        batches, current, count = [], [], 0
+        for line in lines:
+            if current and count + len(line) > LLM_BATCH_WORDS:
+                batches.append(current)
+                current, count = [], 0
+            current.append(line)
+            count += len(line)
+        if current:
+            batches.append(current)
+        return batches or [[]]
+
+    def _classify_batch(self, lines: List[List[dict]]) -> List[OCRTextItem]:
+        ocr_phrases = [" ".join([w['text'] for w in words]) for words in lines]
+        full_text = "\n".join(ocr_phrases)
+
+        # Strong LLM prompt asking for top 40 meaningful groups
+        prompt = f"""
+You are an expert in construction blueprints and OCR text analysis.
+
+Task:
+1. From the entire OCR text below, identify the  most meaningful semantic units.
+   - Each unit should consist of **2 or more words** whenever possible.
+   - Only include units with **clear meaning** relevant to construction, architecture, or structural details.
+2. Classify each unit into one of these types: label, dimension, location, beam_type, material, other.
+3. Ignore line breaks and OCR splits — merge words logically based on meaning and context.
+4. Avoid trivial single words unless they form a complete semantic unit.
+
+Return ONLY a valid JSON array like:
+[{{"text": "group of words", "type": "..." }}]
+
+OCR text:
+{full_text}
+"""
+
+        # Send to Groq LLaMA (shared rate limit across concurrent batches)
+        try:
+            logger.info("Sending text to Groq LLaMA for classification...")
+            _llm_rate_limiter.wait()
+            chat_completion = self.groq_client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model="llama-3.3-70b-versatile",
+                stream=False
+            )
+            llm_output = chat_completion.choices[0].message.content
+            logger.info("LLM output received")
+        except Exception as e:
+            logger.error(f"LLM request failed: {e}")
+            llm_output = ""
+
+        # Parse JSON output robustly
+        classified_texts = []
+        try:
+            match = re.search(r'\[.*\]', llm_output, re.DOTALL)
+            if match:
+                json_str = match.group(0)
+                json_str = re.sub(r",\s*}", "}", json_str)
+                json_str = re.sub(r",\s*]", "]", json_str)
+                classified_texts = json.loads(json_str)
+                # Keep only meaningful multi-word units
+                classified_texts = [c for c in classified_texts if len(c['text'].split()) > 1 or c['type'] != "label"]
+                # Take only top 40
+                classified_texts = classified_texts[:40]
+            else:
+                raise ValueError("No JSON found")
+        except Exception as e:
+            logger.warning(f"LLM output parsing failed: {e}. Using OCR phrases as fallback.")
+            classified_texts = [{"text": phrase, "type": "other"} for phrase in ocr_phrases[:40]]
+
+        # Merge LLM classification with OCR coordinates through an inverted word index of this band
+        word_index = {}
+        for words in lines:
+            for w in words:
+                word_index.setdefault(w['text'].lower(), []).append(w)
+
+        result_items = []
+        for classified in classified_texts:
+            phrase = classified['text']
+            typ = classified.get('type', 'other')
+
+            words_in_phrase = self._locate_phrase(phrase, word_index)
+            if not words_in_phrase:
+                continue
+
+            result_items.append(_to_item(phrase, words_in_phrase, typ))
+
+        return result_items
+
+    @staticmethod
+    def _locate_phrase(phrase: str, word_index: dict) -> List[dict]:
+        """OCR words appearing in a phrase: dictionary lookups of its tokens instead of scanning every word."""
+        tokens = set(t.lower() for t in phrase.split())
+        tokens.update(t.lower() for t in re.findall(r"\w+", phrase))
+        found, seen = [], set()
+        for token in tokens:
+            for w in word_index.get(token, ()):
+                if id(w) not in seen:
+                    seen.add(id(w))
+                    found.append(w)
+        return found
+
+
+class _RateLimiter:
+    """Spaces out LLM requests to stay under the provider's requests-per-minute quota."""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_llm_rate_limiter = _RateLimiter(LLM_REQUESTS_PER_MINUTE)
+
+
+def resolve_classifier_backend(backend: str = "auto", groq_api_key: Optional[str] = None) -> str:
+    """Name of the classifier get_text_classifier returns for these settings, without building it."""
+    if backend in ("auto", "groq") and groq_api_key and GROQ_AVAILABLE:
+        return GroqTextClassifier.name
+    return LocalTextClassifier.name
+
+
+def get_text_classifier(backend: str = "auto", groq_api_key: Optional[str] = None) -> TextClassifier:
+    """
+    "local", "groq", or "auto" (Groq when a key and the client are available, local otherwise).
+    Falls back to the local classifier if Groq is requested but unusable.
+    """
+    if resolve_classifier_backend(backend, groq_api_key) == GroqTextClassifier.name:
+        return GroqTextClassifier(groq_api_key)
+    if backend == "groq":
+        logger.warning("Groq classifier unavailable (missing key or package), using local classifier")
+    return LocalTextClassifier()
+
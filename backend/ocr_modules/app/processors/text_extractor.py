@@ -1,29 +1,32 @@
 import logging
-import re
-import json
 from typing import List, Optional
-import pytesseract
 from PIL import Image
+from app.config import OCR_TILE_SIZE, OCR_TILE_OVERLAP, OCR_TILE_WORKERS, TEXT_CLASSIFIER
 from app.models.ocr_models import OCRTextItem
-from groq import Groq
+from app.processors.text_classifier import TextClassifier, get_text_classifier
+from app.utils.tiled_ocr import image_to_data_tiled
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class TextExtractor:
-    def __init__(self, use_llm=True, groq_api_key=None, max_tokens=1500, languages: Optional[List[str]] = None):
-        self.use_llm = use_llm
+    def __init__(self, use_llm=True, groq_api_key=None, max_tokens=1500, languages: Optional[List[str]] = None,
+                 classifier: Optional[TextClassifier] = None, classifier_backend: str = TEXT_CLASSIFIER):
+        self.use_llm = use_llm  # False keeps raw OCR words, all typed "label"
         self.max_tokens = max_tokens
         self.languages = languages
-        self.groq_client = Groq(api_key=groq_api_key) if groq_api_key else None
+        self.classifier = classifier or get_text_classifier(classifier_backend, groq_api_key)
 
-    def extract_text(self, image_path: str, languages: Optional[List[str]] = None) -> List[OCRTextItem]:
+    def extract_text(self, image_path: str, languages: Optional[List[str]] = None,
+                     image: Optional[Image.Image] = None) -> List[OCRTextItem]:
         langs = ",".join(languages) if languages else (",".join(self.languages) if self.languages else "eng")
         logger.info(f"Processing image: {image_path} with languages: {langs}")
 
-        # 1️⃣ OCR extraction
-        img = Image.open(image_path)
-        data = pytesseract.image_to_data(img, lang=langs, output_type=pytesseract.Output.DICT)
+        # 1️⃣ OCR extraction (reuse the job's decoded image when given)
+        img = image if image is not None else Image.open(image_path)
+        # Large sheets (A0 at high dpi) are OCR'd as overlapping tiles in parallel
+        data = image_to_data_tiled(img, lang=langs, tile_size=OCR_TILE_SIZE,
+                                   overlap=OCR_TILE_OVERLAP, max_workers=OCR_TILE_WORKERS)
 
         ocr_words = []
         for i in range(len(data['text'])):
@@ -41,98 +44,17 @@ class TextExtractor:
                 "height": h
             })
 
-        if not self.use_llm or not self.groq_client:
+        if not self.use_llm:
             return [OCRTextItem(**w, type="label") for w in ocr_words]
 
-        # 2️⃣ Merge words by approximate lines
+        # 2️⃣ Merge words by approximate lines, top to bottom
         lines = {}
         for w in ocr_words:
             line_key = round(w['y'] / 10)
             lines.setdefault(line_key, []).append(w)
+        lines = [lines[k] for k in sorted(lines)]
 
-        ocr_phrases = [" ".join([w['text'] for w in words]) for words in lines.values()]
-        full_text = "\n".join(ocr_phrases)
-
-        # 3️⃣ Strong LLM prompt asking for top 40 meaningful groups
-        prompt = f"""
-You are an expert in construction blueprints and OCR text analysis.
-
-Task:
-1. From the entire OCR text below, identify the  most meaningful semantic units.
-   - Each unit should consist of **2 or more words** whenever possible.
-   - Only include units with **clear meaning** relevant to construction, architecture, or structural details.
-2. Classify each unit into one of these types: label, dimension, location, beam_type, material, other.
-3. Ignore line breaks and OCR splits — merge words logically based on meaning and context.
-4. Avoid trivial single words unless they form a complete semantic unit.
-
-Return ONLY a valid JSON array like:
-[{{"text": "group of words", "type": "..." }}]
-
-OCR text:
-{full_text}
-"""
-
-        # 4️⃣ Send to Groq LLaMA
-        try:
-            logger.info("Sending text to Groq LLaMA for classification...")
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-                stream=False
-            )
-            llm_output = chat_completion.choices[0].message.content
-            logger.info("LLM output received")
-        except Exception as e:
-            logger.error(f"LLM request failed: {e}")
-            llm_output = ""
-
-        # 5️⃣ Parse JSON output robustly
-        classified_texts = []
-        try:
-            match = re.search(r'\[.*\]', llm_output, re.DOTALL)
-            if match:
-                json_str = match.group(0)
-                json_str = re.sub(r",\s*}", "}", json_str)
-                json_str = re.sub(r",\s*]", "]", json_str)
-                classified_texts = json.loads(json_str)
-                # Keep only meaningful multi-word units
-                classified_texts = [c for c in classified_texts if len(c['text'].split()) > 1 or c['type'] != "label"]
-                # Take only top 40
-                classified_texts = classified_texts[:40]
-            else:
-                raise ValueError("No JSON found")
-        except Exception as e:
-            logger.warning(f"LLM output parsing failed: {e}. Using OCR phrases as fallback.")
-            classified_texts = [{"text": phrase, "type": "other"} for phrase in ocr_phrases[:40]]
-
-        # 6️⃣ Merge LLM classification with OCR coordinates
-        result_items = []
-        for classified in classified_texts:
-            phrase = classified['text']
-            typ = classified.get('type', 'other')
-
-            # Partial match OCR words in phrase
-            words_in_phrase = [w for w in ocr_words if re.search(r'\b{}\b'.format(re.escape(w['text'])), phrase, flags=re.I)]
-            if not words_in_phrase:
-                continue
-
-            x_min = min(w['x'] for w in words_in_phrase)
-            y_min = min(w['y'] for w in words_in_phrase)
-            x_max = max(w['x'] + w['width'] for w in words_in_phrase)
-            y_max = max(w['y'] + w['height'] for w in words_in_phrase)
-            width = x_max - x_min
-            height = y_max - y_min
-            confidence = sum(w['confidence'] for w in words_in_phrase) / len(words_in_phrase)
-
-            result_items.append(OCRTextItem(
-                text=phrase,
-                x=x_min,
-                y=y_min,
-                width=width,
-                height=height,
-                confidence=confidence,
-                type=typ
-            ))
-
-        logger.info(f"Processed {len(result_items)} OCR items with LLM classification")
+        # 3️⃣ Type the text with the configured backend (local rules or Groq LLM)
+        result_items = self.classifier.classify(lines)
+        logger.info(f"Processed {len(result_items)} OCR items with {self.classifier.name} classification")
         return result_items
@@ -0,0 +1,118 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Optional
+from app.config import CACHE_DIR, RESULT_CACHE_MAX_MB, TEXT_CLASSIFIER
+from app.models.ocr_models import ProcessingOptions
+from app.processors.text_classifier import resolve_classifier_backend
+
+# Bump when the result layout or the processing pipeline changes to invalidate old entries
+CACHE_VERSION = 2  # 2: entries hold {"results", "pages"}
+
+
+class ResultCache:
+    """
+    Content-addressed cache of processing results, keyed by file hash + ProcessingOptions.
+    Entries are JSON files under cache_dir; the least recently used are evicted
+    once the cache grows beyond max_size_mb.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_size_mb: int = RESULT_CACHE_MAX_MB):
+        self.cache_dir = os.path.join(cache_dir, "results")
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    @staticmethod
+    def make_key(file_hash: str, options: ProcessingOptions) -> str:
+        payload = {
+            "version": CACHE_VERSION,
+            "file": file_hash,
+            "enable_ocr": options.enable_ocr,
+            "enable_vision": options.enable_vision,
+            "languages": options.languages,  # order matters: the first language is Tesseract's primary
+            "use_llm": options.use_llm,
+            # The backend actually used: "auto" means groq or local depending on the key and package
+            "text_classifier": resolve_classifier_backend(TEXT_CLASSIFIER, os.getenv("GROQ_API_KEY")),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    results = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            self.hits += 1
+            return results
+
+    def put(self, key: str, results: dict) -> None:
+        path = self._entry_path(key)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(results, f)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file():
+                    os.remove(entry.path)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            sizes = [e.stat().st_size for e in os.scandir(self.cache_dir)
+                     if e.is_file() and e.name.endswith(".json")]
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(sizes),
+                "size_bytes": sum(sizes),
+                "max_size_bytes": self.max_size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+result_cache = ResultCache()
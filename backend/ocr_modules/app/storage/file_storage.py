@@ -1,6 +1,7 @@
 # app/storage/file_storage.py
 import os
 import json
+import shutil
 from fastapi import UploadFile
 
 async def save_file_to_disk(file: UploadFile, folder: str, filename: str) -> str:
@@ -26,3 +27,37 @@ def save_results(file_id: str, results: dict) -> None:
     filepath = os.path.join(BASE_RESULTS_PATH, f"{file_id}.json")
     with open(filepath, "w") as f:
         json.dump(results, f)
+
+def get_pages_results_dir(file_id: str) -> str:
+    return os.path.join(BASE_RESULTS_PATH, f"{file_id}_pages")
+
+def save_page_results(file_id: str, page_index: int, results: dict) -> None:
+    """Persist one page as soon as it is processed so partial results are readable during the job."""
+    folder = get_pages_results_dir(file_id)
+    os.makedirs(folder, exist_ok=True)
+    filepath = os.path.join(folder, f"page_{page_index + 1:04d}.json")
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(results, f)
+    os.replace(tmp_path, filepath)  # readers never see a half-written page
+
+def clear_page_results(file_id: str) -> None:
+    shutil.rmtree(get_pages_results_dir(file_id), ignore_errors=True)
+
+def load_page_results(file_id: str) -> list:
+    """All persisted pages of a file, in page order."""
+    folder = get_pages_results_dir(file_id)
+    if not os.path.isdir(folder):
+        return []
+    pages = []
+    for name in sorted(os.listdir(folder)):
+        if name.startswith("page_") and name.endswith(".json"):
+            with open(os.path.join(folder, name), "r") as f:
+                pages.append(json.load(f))
+    return pages
+
+def restore_page_results(file_id: str, pages: list) -> None:
+    """Rewrite the page files of a file from previously saved pages (e.g. a cache hit)."""
+    clear_page_results(file_id)
+    for page in pages:
+        save_page_results(file_id, page["page"] - 1, page)
@@ -0,0 +1,173 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Sequence, Tuple
+from app.config import RESULTS_DB_PATH
+
+
+def _item_rows(file_id: str, results: dict) -> List[tuple]:
+    """Flatten a results JSON into item rows with a normalized [x_min, y_min, x_max, y_max] box."""
+    rows = []
+    for item in results.get("ocr", {}).get("results", []):
+        x, y = item.get("x", 0), item.get("y", 0)
+        rows.append((file_id, "text", item.get("type"), item.get("text"), item.get("page"),
+                     x, y, x + item.get("width", 0), y + item.get("height", 0),
+                     item.get("confidence"), json.dumps(item)))
+    vision = results.get("vision") or {}
+    for kind, key, type_field in (("symbol", "symbols", "name"), ("element", "elements", "element_type")):
+        for item in vision.get(key, []):
+            x_min, y_min, x_max, y_max = item.get("bbox") or [0, 0, 0, 0]
+            rows.append((file_id, kind, item.get(type_field), None, item.get("page"),
+                         x_min, y_min, x_max, y_max, item.get("confidence"), json.dumps(item)))
+    return rows
+
+
+class ResultStore:
+    """
+    SQLite index of uploaded files and their OCR/vision items.
+    The JSON files stay the source of truth for full results; this store answers
+    filtered, paginated and spatial queries without re-parsing them.
+    """
+
+    def __init__(self, db_path: str = RESULTS_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS files (
+                    file_id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    type TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    metadata TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_files_type ON files (type);
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    item_type TEXT,
+                    text TEXT,
+                    page INTEGER,
+                    x_min REAL, y_min REAL, x_max REAL, y_max REAL,
+                    confidence REAL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_type ON items (file_id, kind, item_type);
+                CREATE INDEX IF NOT EXISTS idx_items_x ON items (file_id, kind, x_min, x_max);
+                CREATE INDEX IF NOT EXISTS idx_items_y ON items (file_id, kind, y_min, y_max);
+                CREATE TABLE IF NOT EXISTS indexed_results (
+                    file_id TEXT PRIMARY KEY
+                );
+            """)
+
+    # ---------- Files ----------
+
+    def upsert_file(self, metadata: dict):
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO files (file_id, filename, type, metadata) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(file_id) DO UPDATE SET filename = excluded.filename,
+                   type = excluded.type, metadata = excluded.metadata""",
+                (metadata["id"], metadata.get("filename"), metadata.get("type"), json.dumps(metadata))
+            )
+
+    def get_file(self, file_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT metadata FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_files(self, file_type: Optional[str] = None, limit: Optional[int] = None,
+                   offset: int = 0) -> Tuple[List[dict], int]:
+        where, params = ("WHERE type = ?", [file_type]) if file_type else ("", [])
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM files {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT metadata FROM files {where} ORDER BY created_at, file_id LIMIT ? OFFSET ?",
+                params + [limit if limit is not None else -1, offset]
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows], total
+
+    def known_file_ids(self) -> set:
+        with self._connect() as conn:
+            return {r[0] for r in conn.execute("SELECT file_id FROM files")}
+
+    def delete_file(self, file_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+            conn.execute("DELETE FROM items WHERE file_id = ?", (file_id,))
+            conn.execute("DELETE FROM indexed_results WHERE file_id = ?", (file_id,))
+
+    # ---------- Results ----------
+
+    def index_results(self, file_id: str, results: dict):
+        """Replace the indexed items of a file with those of a new results JSON."""
+        rows = _item_rows(file_id, results)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM items WHERE file_id = ?", (file_id,))
+            conn.executemany(
+                """INSERT INTO items (file_id, kind, item_type, text, page, x_min, y_min, x_max, y_max, confidence, data)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            conn.execute("INSERT OR IGNORE INTO indexed_results (file_id) VALUES (?)", (file_id,))
+
+    def has_results(self, file_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM indexed_results WHERE file_id = ?", (file_id,)).fetchone() is not None
+
+    def query_items(
+        self,
+        file_id: str,
+        kind: str,
+        item_type: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        page: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[List[dict], int]:
+        """
+        Items of one kind ("text", "symbol", "element") for a file.
+        bbox = (x_min, y_min, x_max, y_max) keeps items intersecting that viewport.
+        Returns (items, total matching count before pagination).
+        """
+        clauses, params = ["file_id = ?", "kind = ?"], [file_id, kind]
+        if item_type is not None:
+            clauses.append("item_type = ?")
+            params.append(item_type)
+        if page is not None:
+            clauses.append("page = ?")
+            params.append(page)
+        if bbox is not None:
+            x_min, y_min, x_max, y_max = bbox
+            clauses.append("x_min <= ? AND x_max >= ? AND y_min <= ? AND y_max >= ?")
+            params.extend([x_max, x_min, y_max, y_min])
+        where = " AND ".join(clauses)
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM items WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT data FROM items WHERE {where} ORDER BY id LIMIT ? OFFSET ?",
+                params + [limit if limit is not None else -1, offset]
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows], total
+
+
+result_store = ResultStore()
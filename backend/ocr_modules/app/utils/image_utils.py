@@ -1,18 +1,44 @@
 # app/utils/image_utils.py
 import os
+import threading
+import numpy as np
 from PIL import Image
 import fitz  # PyMuPDF for PDFs
 
+# PyMuPDF is not thread-safe, even with one document per thread: all rendering goes through this lock
+_FITZ_LOCK = threading.Lock()
+
 def generate_thumbnail(input_path: str, output_path: str, size=(300, 300)):
     ext = os.path.splitext(input_path)[1].lower()
 
     if ext == ".pdf":
-        pdf_document = fitz.open(input_path)
-        page = pdf_document[0]
-        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # higher resolution
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        with _FITZ_LOCK:
+            pdf_document = fitz.open(input_path)
+            page = pdf_document[0]
+            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # higher resolution
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
     else:
         img = Image.open(input_path)
 
     img.thumbnail(size)
     img.save(output_path, "PNG")
+
+def is_pdf(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() == ".pdf"
+
+def get_pdf_page_count(pdf_path: str) -> int:
+    with _FITZ_LOCK, fitz.open(pdf_path) as pdf_document:
+        return pdf_document.page_count
+
+def _pixmap_to_bgr(pix) -> np.ndarray:
+    rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+    return np.ascontiguousarray(rgb[:, :, ::-1])  # OpenCV expects BGR
+
+def render_pdf_page(pdf_path: str, page_index: int, dpi: int = 200) -> np.ndarray:
+    """
+    Rasterize a single PDF page to a BGR array.
+    Callable from several threads: rendering itself is serialized, the returned array is a copy.
+    """
+    with _FITZ_LOCK, fitz.open(pdf_path) as pdf_document:
+        pix = pdf_document[page_index].get_pixmap(dpi=dpi, alpha=False)
+        return _pixmap_to_bgr(pix)
@@ -0,0 +1,46 @@
+import json
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import results as results_api
+from app.storage.result_store import ResultStore
+
+results = {
+    "ocr": {"results": [
+        {"text": f"{i}.00", "type": "dimension" if i % 2 else "label", "x": i * 100, "y": 0, "width": 50, "height": 10}
+        for i in range(6)
+    ]},
+    "vision": {"symbols": [], "elements": []},
+}
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "f1.json").write_text(json.dumps(results), encoding="utf-8")
+    monkeypatch.setattr(results_api, "BASE_RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(results_api, "result_store", ResultStore(db_path=str(tmp_path / "results.db")))
+    app = FastAPI()
+    app.include_router(results_api.router)
+    return TestClient(app)
+
+def test_pagination_sets_total_count(client):
+    response = client.get("/results/f1/text", params={"limit": 2, "offset": 3})
+    assert response.status_code == 200
+    assert [item["text"] for item in response.json()] == ["3.00", "4.00"]
+    assert response.headers["X-Total-Count"] == "6"
+
+    response = client.get("/results/f1/dimensions", params={"limit": 1})
+    assert [item["text"] for item in response.json()] == ["1.00"]
+    assert response.headers["X-Total-Count"] == "3"
+
+def test_viewport_filtering(client):
+    response = client.get("/results/f1/text", params={"x_min": 120, "y_min": 0, "x_max": 260, "y_max": 5})
+    assert [item["text"] for item in response.json()] == ["1.00", "2.00"]
+    assert response.headers["X-Total-Count"] == "2"
+    assert client.get("/results/f1/text", params={"x_min": 0}).status_code == 400
+
+def test_unknown_file_is_404(client):
+    assert client.get("/results/missing/text").status_code == 404
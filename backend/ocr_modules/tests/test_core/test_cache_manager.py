@@ -0,0 +1,37 @@
+from app.models.ocr_models import ProcessingOptions
+from app.storage.cache_manager import ResultCache
+
+results = {"ocr": {"results": [], "processing_time": 1.2}, "vision": {}}
+
+def test_hit_after_put(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path), max_size_mb=1)
+    key = cache.make_key("abc", ProcessingOptions())
+    assert cache.get(key) is None
+    cache.put(key, results)
+    assert cache.get(key) == results
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+def test_key_depends_on_options():
+    base = ResultCache.make_key("abc", ProcessingOptions())
+    assert base == ResultCache.make_key("abc", ProcessingOptions())
+    assert base != ResultCache.make_key("abc", ProcessingOptions(use_llm=False))
+    assert base != ResultCache.make_key("abc", ProcessingOptions(languages=["fra"]))
+    assert base != ResultCache.make_key("abd", ProcessingOptions())
+
+def test_size_based_eviction(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path), max_size_mb=0)
+    key = cache.make_key("abc", ProcessingOptions())
+    cache.put(key, results)
+    assert cache.get(key) is None
+    assert cache.get_stats()["evictions"] == 1
+
+def test_key_depends_on_resolved_classifier(monkeypatch):
+    from app.processors import text_classifier
+    monkeypatch.setenv("GROQ_API_KEY", "key")
+    monkeypatch.setattr(text_classifier, "GROQ_AVAILABLE", False)
+    local = ResultCache.make_key("abc", ProcessingOptions())
+    monkeypatch.setattr(text_classifier, "GROQ_AVAILABLE", True)
+    assert ResultCache.make_key("abc", ProcessingOptions()) != local
+    monkeypatch.delenv("GROQ_API_KEY")
+    assert ResultCache.make_key("abc", ProcessingOptions()) == local
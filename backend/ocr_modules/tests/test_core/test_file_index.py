@@ -0,0 +1,33 @@
+import json
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.core import file_manager
+from app.storage.result_store import ResultStore
+
+def add_upload(upload_dir, file_id):
+    folder = upload_dir / file_id
+    folder.mkdir(parents=True)
+    (folder / "metadata.json").write_text(json.dumps({"id": file_id, "filename": f"{file_id}.png", "type": "General"}))
+
+def test_sync_indexes_new_uploads_and_forgets_deleted_ones(tmp_path, monkeypatch):
+    upload_dir = tmp_path / "uploads"
+    store = ResultStore(db_path=str(tmp_path / "results.db"))
+    monkeypatch.setattr(file_manager, "UPLOAD_DIR", str(upload_dir))
+    monkeypatch.setattr(file_manager, "result_store", store)
+    add_upload(upload_dir, "kept")
+    add_upload(upload_dir, "removed")
+    store.index_results("removed", {"ocr": {"results": [{"text": "x"}]}})
+
+    assert sorted(f["id"] for f in file_manager.list_files()) == ["kept", "removed"]
+
+    # Folder removed outside the API (backend retention policies)
+    (upload_dir / "removed" / "metadata.json").unlink()
+    (upload_dir / "removed").rmdir()
+    add_upload(upload_dir, "new")
+
+    assert sorted(f["id"] for f in file_manager.list_files()) == ["kept", "new"]
+    assert store.known_file_ids() == {"kept", "new"}
+    assert not store.has_results("removed")
+    assert store.query_items("removed", "text")[1] == 0
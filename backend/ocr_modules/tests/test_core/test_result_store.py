@@ -0,0 +1,61 @@
+from app.storage.result_store import ResultStore
+
+results = {
+    "ocr": {"results": [
+        {"text": "3.50", "type": "dimension", "x": 0, "y": 0, "width": 40, "height": 10, "page": 1},
+        {"text": "IPE 300", "type": "beam_type", "x": 100, "y": 100, "width": 60, "height": 10, "page": 1},
+        {"text": "2.40", "type": "dimension", "x": 500, "y": 500, "width": 40, "height": 10, "page": 2},
+    ]},
+    "vision": {
+        "symbols": [{"name": "door", "bbox": [90, 90, 120, 130], "confidence": 0.9, "page": 1}],
+        "elements": [{"element_type": "wall", "bbox": [0, 200, 600, 210], "confidence": 0.8, "page": 1}],
+    },
+}
+
+def make_store(tmp_path):
+    store = ResultStore(db_path=str(tmp_path / "results.db"))
+    store.index_results("f1", results)
+    return store
+
+def texts(items):
+    return [item["text"] for item in items]
+
+def test_bbox_keeps_intersecting_items(tmp_path):
+    store = make_store(tmp_path)
+    items, total = store.query_items("f1", "text", bbox=(30, 5, 110, 105))
+    assert texts(items) == ["3.50", "IPE 300"] and total == 2
+    items, _ = store.query_items("f1", "text", bbox=(41, 11, 99, 99))
+    assert items == []
+    symbols, _ = store.query_items("f1", "symbol", bbox=(115, 125, 200, 200))
+    assert [s["name"] for s in symbols] == ["door"]
+    elements, _ = store.query_items("f1", "element", bbox=(300, 205, 301, 206))
+    assert [e["element_type"] for e in elements] == ["wall"]
+
+def test_filters_and_pagination_report_full_total(tmp_path):
+    store = make_store(tmp_path)
+    items, total = store.query_items("f1", "text", limit=2, offset=1)
+    assert texts(items) == ["IPE 300", "2.40"] and total == 3
+    items, total = store.query_items("f1", "text", item_type="dimension", limit=1)
+    assert texts(items) == ["3.50"] and total == 2
+    items, total = store.query_items("f1", "text", page=2)
+    assert texts(items) == ["2.40"] and total == 1
+    items, total = store.query_items("f1", "text", offset=10)
+    assert items == [] and total == 3
+
+def test_reindex_replaces_items(tmp_path):
+    store = make_store(tmp_path)
+    store.index_results("f1", {"ocr": {"results": results["ocr"]["results"][:1]}})
+    assert store.query_items("f1", "text")[1] == 1
+    assert store.query_items("f1", "symbol")[1] == 0
+    assert store.has_results("f1") and not store.has_results("f2")
+
+def test_list_files_pagination(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(5):
+        store.upsert_file({"id": f"file{i}", "filename": f"plan{i}.png", "type": "Structural" if i % 2 else "General"})
+    files, total = store.list_files(limit=2, offset=2)
+    assert [f["id"] for f in files] == ["file2", "file3"] and total == 5
+    files, total = store.list_files(file_type="Structural")
+    assert [f["id"] for f in files] == ["file1", "file3"] and total == 2
+    store.delete_file("file1")
+    assert store.known_file_ids() == {"file0", "file2", "file3", "file4"}
@@ -0,0 +1,33 @@
+import pytest
+from app.processors.text_classifier import LocalTextClassifier, TextClassifier, get_text_classifier
+
+def word(text, x, y=100, width=None, height=20):
+    return {"text": text, "confidence": 90.0, "x": x, "y": y, "width": width or 12 * len(text), "height": height}
+
+def test_local_types():
+    classifier = LocalTextClassifier()
+    assert classifier.classify_text("IPE 300") == "beam_type"
+    assert classifier.classify_text("Béton C25/30") == "material"
+    assert classifier.classify_text("3.50 m") == "dimension"
+    assert classifier.classify_text("Chambre 1") == "location"
+    assert classifier.classify_text("NORTH ELEVATION") == "label"
+
+def test_phrases_split_on_wide_gaps():
+    line = [word("Living", 0), word("room", 80), word("4.20", 600)]
+    items = LocalTextClassifier().classify([line])
+    assert [(i.text, i.type) for i in items] == [("Living room", "location"), ("4.20", "dimension")]
+    assert items[0].x == 0 and items[0].width == 80 + 48
+
+def test_no_key_falls_back_to_local():
+    assert get_text_classifier("auto", None).name == "local"
+    assert get_text_classifier("groq", None).name == "local"
+
+def test_backends_must_implement_classify():
+    with pytest.raises(TypeError):
+        TextClassifier()
+
+    class Incomplete(TextClassifier):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -252,18 +252,22 @@ def download_zip():
 '''
 # app.py — FastAPI backend for OCR table extraction, LLM review, validation & PDF (with stage logs)
 from fastapi import FastAPI, UploadFile, File, Query
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-import os, shutil, uuid, zipfile, traceback, time, json, requests
+import os, shutil, uuid, traceback, time, json, asyncio
 from pathlib import Path
+from urllib.parse import quote
 import pprint
 
-from core.extractor import SmartTableExtractor
+from core.extractor import ExtractOptions, SmartTableExtractor
+from core.extractor_pool import ExtractorPool
+from core.pdf_pages import is_pdf
+from core.zip_stream import ZipBundleCache, all_artifacts, iter_zip, upload_artifacts
 from core.config import load_config
-from pdf_report import generate_pdf_report
-from llm_review import run_review as do_run_review
+from pdf_report import generate_pdf_report, warm_up as warm_pdf_renderer
+from llm_review import run_review_async, model_status, http_session
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Setup
@@ -271,6 +275,8 @@ from llm_review import run_review as do_run_review
 os.makedirs("outputs", exist_ok=True)
 os.makedirs("uploads", exist_ok=True)
 
+zip_cache = ZipBundleCache("zip_cache")  # outside outputs/ so cached bundles never end up in a bundle
+
 app = FastAPI()
 
 app.add_middleware(
@@ -287,13 +293,20 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 cfg = load_config("configs/default.yaml")
 yolo_weights = (cfg.get("model", {}) or {}).get("yolo_weights") or "pixocr_modules/model/best.pt"
 
-extractor = SmartTableExtractor(
-    yolo_model_path=yolo_weights,
-    output_dir="outputs",
-    config=cfg,
-    translate_headers=False,   # override per request
-    validate_schema=True,      # default on
-    debug=True                 # keep *_full_text.json for PDF/LLM
+pool_cfg = cfg.get("pool", {}) or {}
+
+# N preloaded YOLO replicas; request flags travel in ExtractOptions, never on the shared instances
+extractor_pool = ExtractorPool(
+    lambda: SmartTableExtractor(
+        yolo_model_path=yolo_weights,
+        output_dir="outputs",
+        config=cfg,
+        translate_headers=False,   # override per request
+        validate_schema=True,      # default on
+        debug=True                 # keep *_full_text.json for PDF/LLM
+    ),
+    replicas=int(os.getenv("PIXOCR_REPLICAS") or pool_cfg.get("replicas", 1)),
+    pin_cpus=bool(pool_cfg.get("pin_cpus", True)),
 )
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -330,14 +343,6 @@ def _as_fs(path_or_url: str | None) -> str | None:
         return str(Path("outputs") / Path(s).name)
     return s
 
-def _detect_review_base(base_name: str) -> str | None:
-    for b in (base_name, f"{base_name}_page1"):
-        if Path(f"outputs/{b}_header.json").exists():
-            return b
-    for p in Path("outputs").glob(f"{base_name}*_header.json"):
-        return p.name[:-len("_header.json")]
-    return None
-
 def _attach_llm_review_to_result(result: dict, review_base: str) -> None:
     review_path = Path("outputs") / f"{review_base}_llm_review.txt"
     if review_path.exists():
@@ -359,62 +364,21 @@ def _prepare_result_for_pdf(result: dict) -> dict:
         r["tables"] = [{**t, "image": _as_fs(t.get("image")) if t.get("image") else None} for t in r["tables"]]
     return r
 
-def _first_existing(cands: list[str]) -> str | None:
-    for c in cands:
-        if Path(c).exists():
-            return c
-    return None
-
-def _payload_stats(review_base: str) -> dict:
-    out = {"full_text_chars": 0, "csv_lines": 0, "warnings": 0}
-    ft = _first_existing([
-        f"outputs/{review_base}_full_text.json",
-        f"outputs/{review_base}_page1_full_text.json",
-        f"outputs/{review_base}_ocr.json",
-    ])
-    if ft and Path(ft).exists():
-        try:
-            raw = Path(ft).read_text(encoding="utf-8")
-            out["full_text_chars"] = len(raw)
-        except Exception:
-            pass
-    csvp = _first_existing([
-        f"outputs/{review_base}_table_0.csv",
-        f"outputs/{review_base}_page1_table_0.csv",
-    ])
-    if csvp and Path(csvp).exists():
-        try:
-            out["csv_lines"] = sum(1 for _ in open(csvp, "r", encoding="utf-8"))
-        except Exception:
-            pass
-    wp = _first_existing([
-        f"outputs/{review_base}_warnings.json",
-        f"outputs/{review_base}_warn.json",
-    ])
-    if wp and Path(wp).exists():
-        try:
-            w = json.loads(Path(wp).read_text(encoding="utf-8"))
-            if isinstance(w, dict) and "warnings" in w:
-                out["warnings"] = len(w["warnings"])
-            elif isinstance(w, list):
-                out["warnings"] = len(w)
-            else:
-                out["warnings"] = 1
-        except Exception:
-            pass
-    return out
+def _payload_stats(bundle) -> dict:
+    """Prompt inputs of an in-memory bundle (its files may still be being written)."""
+    first = bundle.first_table()
+    return {
+        "full_text_chars": len(bundle.full_text_json() or ""),
+        "csv_lines": len(first.display) + 1 if first else 0,
+        "warnings": len(bundle.warnings),
+    }
 
-def _ping_llm(timeout_s: float = 5.0) -> dict:
-    url = _llm_base_url().rstrip("/") + "/v1/models"
-    t0 = time.time()
-    try:
-        r = requests.get(url, timeout=timeout_s)
-        r.raise_for_status()
-        dt = time.time() - t0
-        models = r.json()
-        return {"ok": True, "latency_s": round(dt, 3), "count": len(models.get("data", [])), "url": url}
-    except Exception as e:
-        return {"ok": False, "latency_s": None, "error": str(e), "url": url}
+def _ping_llm(max_age: float | None = None) -> dict:
+    """/v1/models status shared with llm_review (cached for LLM_HEALTH_TTL_S unless max_age=0)."""
+    st = model_status(_llm_base_url(), max_age=max_age)
+    if st["ok"]:
+        return {"ok": True, "latency_s": st["latency_s"], "count": len(st["models"]), "url": st["url"], "cached": st["cached"]}
+    return {"ok": False, "latency_s": None, "error": st["error"], "url": st["url"], "cached": False}
 
 # Pretty stage logger (prints + accumulates for response)
 def _mk_logger():
@@ -428,9 +392,27 @@ def _mk_logger():
 # ──────────────────────────────────────────────────────────────────────────────
 # Health: ping / warmup / speedtest
 # ──────────────────────────────────────────────────────────────────────────────
+@app.get("/pool")
+def pool_stats():
+    return extractor_pool.stats()
+
+@app.on_event("shutdown")
+def _shutdown_pool():
+    extractor_pool.shutdown()
+
+@app.on_event("startup")
+async def _warm_pdf():
+    # template compiled and fonts loaded before the first report, without delaying startup
+    async def _warm():
+        try:
+            print(f"PDF renderer ready: {await asyncio.to_thread(warm_pdf_renderer)}")
+        except Exception as e:
+            print(f"PDF renderer warm-up failed: {e}")
+    asyncio.create_task(_warm())
+
 @app.get("/llm/ping")
 def llm_ping():
-    return _ping_llm()
+    return _ping_llm(max_age=0)
 
 @app.post("/llm/warmup")
 def llm_warmup():
@@ -443,7 +425,7 @@ def llm_warmup():
     }
     t0 = time.time()
     try:
-        r = requests.post(url, json=payload, timeout=(5, 15))
+        r = http_session().post(url, json=payload, timeout=(5, 15))
         r.raise_for_status()
         dt = time.time() - t0
         return {"ok": True, "latency_s": round(dt, 3)}
@@ -460,7 +442,7 @@ def llm_speedtest(max_tokens: int = Query(160, ge=16, le=512)):
     }
     t0 = time.time()
     try:
-        r = requests.post(url, json=payload, timeout=(5, 60 + max_tokens // 2))
+        r = http_session().post(url, json=payload, timeout=(5, 60 + max_tokens // 2))
         r.raise_for_status()
         dt = time.time() - t0
         text = r.json()["choices"][0]["message"]["content"]
@@ -492,38 +474,114 @@ async def process_document(
         log(f"OK: upload saved.")
 
         # 2) YOLO + OCR + parsing
-        extractor.translate_headers = bool(translate_headers)
-        extractor.validate = bool(validate_schema)
+        options = ExtractOptions(
+            translate_headers=bool(translate_headers),
+            validate=bool(validate_schema),
+            debug=True,
+            # the full OCR dump is only needed by validation (OCR totals) and the LLM review
+            full_text=True if run_llm_review else None,
+        )
 
         log("STEP 2/5  YOLO table detection + OCR running…")
         t_ex0 = time.time()
-        result = extractor.process(input_filename)
+        if is_pdf(input_filename):
+            # every page goes through batched YOLO; page 1 is the primary result (review/PDF use *_page1)
+            bundles = await extractor_pool.extract_pdf(input_filename, options)
+            if not bundles:
+                raise ValueError("PDF has no pages")
+            log(f"PDF: {len(bundles)} page(s) processed")
+        else:
+            bundles = [await extractor_pool.extract(input_filename, options)]
+        bundle = bundles[0]
+        result = bundle.to_result()
+        if is_pdf(input_filename):
+            result["pages"] = [
+                {k: v for k, v in b.to_result().items() if k in ("original_image", "header_json", "full_text_json", "table_csvs", "tables", "warnings")}
+                for b in bundles
+            ]
         t_ex1 = time.time()
         log(f"OK: extraction finished in {t_ex1 - t_ex0:.2f}s")
 
-        # Quick detection summary
-        n_tables = len(result.get("tables", []) or [])
-        log(f"DETECT: tables found = {n_tables}")
-        if n_tables:
-            for t in result["tables"]:
-                shape = t.get("shape") or "?"
-                img = t.get("image")
-                log(f"  • table {t.get('index')}: shape={shape}  image={img}")
-
-        base_name = os.path.splitext(os.path.basename(input_filename))[0]
+        # Artifacts are written in the background; review and PDF read the bundle from memory
+        # (later PDF pages were already written during extraction)
+        save_task = asyncio.gather(*(asyncio.to_thread(b.save) for b in bundles if not b.saved))
+        try:
+            # Quick detection summary
+            n_tables = len(result.get("tables", []) or [])
+            log(f"DETECT: tables found = {n_tables}")
+            if n_tables:
+                for t in result["tables"]:
+                    shape = t.get("shape") or "?"
+                    img = t.get("image")
+                    log(f"  • table {t.get('index')}: shape={shape}  image={img}")
+
+            base_name = os.path.splitext(os.path.basename(input_filename))[0]
+
+            # 3) Copy original for UI
+            output_original_path = os.path.join("outputs", os.path.basename(input_filename))
+            shutil.copy(input_filename, output_original_path)
+            log(f"FILE: original image copied → {output_original_path}")
+
+            def _say_generated(label: str, p: str | None):
+                if not p: return
+                fs = _as_fs(p)
+                if fs and Path(fs).exists():
+                    log(f"FILE: {label} generated → {fs}")
+
+            # 4) LLM review BEFORE PDF (optional)
+            review_base = bundle.name
+            if run_llm_review:
+                log("STEP 3/5  LLM review… running")
+                ping = _ping_llm()
+                log(f"LLM: ping → {ping}")
+
+                stats = _payload_stats(bundle)
+                log(f"LLM: payload stats → {stats}")
+
+                t_llm0 = time.time()
+                first_token: list[float] = []
+
+                def _on_token(attempt: int, chunk: str):
+                    if not first_token:
+                        first_token.append(time.time() - t_llm0)
+                        log(f"LLM: first tokens after {first_token[0]:.2f}s")
 
-        # 3) Copy original for UI
-        output_original_path = os.path.join("outputs", os.path.basename(input_filename))
-        shutil.copy(input_filename, output_original_path)
-        log(f"FILE: original image copied → {output_original_path}")
+                try:
+                    rr = await run_review_async(
+                        outputs_dir="outputs",
+                        base=review_base,
+                        llm_base_url=_llm_base_url(),
+                        model=os.getenv("LLM_MODEL") or "mistral",
+                        temperature=0.2,
+                        force=False,
+                        bundle=bundle,
+                        on_token=_on_token,
+                    )
+                    _attach_llm_review_to_result(result, review_base)
+                    log(f"OK: LLM review finished in {time.time() - t_llm0:.2f}s")
+                    _say_generated("llm_review_txt", f"outputs/{review_base}_llm_review.txt")
+                except Exception as e:
+                    log(f"WARN: LLM review failed → {e}")
+                    try:
+                        Path(f"outputs/{review_base}_llm_review.txt").write_text(
+                            "(LLM review skipped due to error/timeout)", encoding="utf-8"
+                        )
+                        result["llm_review_txt_path"] = f"outputs/{review_base}_llm_review.txt"
+                        _say_generated("llm_review_txt (placeholder)", f"outputs/{review_base}_llm_review.txt")
+                    except Exception:
+                        pass
+            else:
+                Path(f"outputs/{review_base}_llm_review.txt").write_text("(LLM review skipped)", encoding="utf-8")
+                result["llm_review_txt_path"] = f"outputs/{review_base}_llm_review.txt"
+                _say_generated("llm_review_txt (skipped)", f"outputs/{review_base}_llm_review.txt")
+        finally:
+            # also when a step above fails: the writes finish either way and their errors are retrieved
+            saved = await asyncio.gather(save_task, return_exceptions=True)
+        if isinstance(saved[0], BaseException):
+            raise saved[0]
+        log(f"OK: artifacts written for {len(bundles)} page(s)")
 
         # Artifact presence messages
-        def _say_generated(label: str, p: str | None):
-            if not p: return
-            fs = _as_fs(p)
-            if fs and Path(fs).exists():
-                log(f"FILE: {label} generated → {fs}")
-
         _say_generated("header_json", result.get("header_json"))
         _say_generated("full_text_json", result.get("full_text_json"))
         _say_generated("table_crop_image", result.get("table_crop_image"))
@@ -534,44 +592,6 @@ async def process_document(
         if not result.get("original_image"):
             result["original_image"] = output_original_path
 
-        # 4) LLM review BEFORE PDF (optional)
-        review_base = _detect_review_base(base_name) or base_name
-        if run_llm_review:
-            log("STEP 3/5  LLM review… running")
-            ping = _ping_llm()
-            log(f"LLM: ping → {ping}")
-
-            stats = _payload_stats(review_base)
-            log(f"LLM: payload stats → {stats}")
-
-            t_llm0 = time.time()
-            try:
-                rr = do_run_review(
-                    outputs_dir="outputs",
-                    base=review_base,
-                    llm_base_url=_llm_base_url(),
-                    model=os.getenv("LLM_MODEL") or "mistral",
-                    temperature=0.2,
-                    force=False,
-                )
-                _attach_llm_review_to_result(result, review_base)
-                log(f"OK: LLM review finished in {time.time() - t_llm0:.2f}s")
-                _say_generated("llm_review_txt", f"outputs/{review_base}_llm_review.txt")
-            except Exception as e:
-                log(f"WARN: LLM review failed → {e}")
-                try:
-                    Path(f"outputs/{review_base}_llm_review.txt").write_text(
-                        "(LLM review skipped due to error/timeout)", encoding="utf-8"
-                    )
-                    result["llm_review_txt_path"] = f"outputs/{review_base}_llm_review.txt"
-                    _say_generated("llm_review_txt (placeholder)", f"outputs/{review_base}_llm_review.txt")
-                except Exception:
-                    pass
-        else:
-            Path(f"outputs/{review_base}_llm_review.txt").write_text("(LLM review skipped)", encoding="utf-8")
-            result["llm_review_txt_path"] = f"outputs/{review_base}_llm_review.txt"
-            _say_generated("llm_review_txt (skipped)", f"outputs/{review_base}_llm_review.txt")
-
         # 5) warnings.json (if any)
         warn_path = Path("outputs") / f"{review_base}_warnings.json"
         if warn_path.exists():
@@ -584,7 +604,7 @@ async def process_document(
             t_pdf0 = time.time()
             pdf_path = os.path.join("outputs", f"{base_name}_report.pdf")
             result_for_pdf = _prepare_result_for_pdf(result)
-            generate_pdf_report(result_for_pdf, pdf_path)
+            await asyncio.to_thread(generate_pdf_report, result_for_pdf, pdf_path, bundle)
             result["report_pdf"] = pdf_path
             log(f"OK: PDF generated → {pdf_path}  in {time.time() - t_pdf0:.2f}s")
 
@@ -600,6 +620,7 @@ async def process_document(
             result["warnings_json"] = _to_url(result["warnings_json"])
         if result.get("report_pdf"):
             result["report_pdf"] = _to_url(result["report_pdf"])
+        result["zip"] = f"/zip?base={quote(base_name)}"
 
         log("STEP 5/5  DONE ✅  (see outputs/ for artifacts)")
         log(f"TOTAL: {time.time() - T0:.2f}s")
@@ -616,16 +637,42 @@ async def process_document(
         traceback.print_exc()
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _review_events(review_kwargs: dict):
+    """Server-sent events: 'token' per streamed chunk, then one 'result' (or 'error')."""
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(run_review_async(
+        **review_kwargs,
+        on_token=lambda attempt, chunk: queue.put_nowait({"attempt": attempt, "text": chunk}),
+    ))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    try:
+        while (item := await queue.get()) is not None:
+            yield _sse("token", item)
+        try:
+            yield _sse("result", task.result())
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+    finally:
+        # Client gone before the end: stop the review instead of generating for nobody
+        if not task.done():
+            task.cancel()
+
 # Re-run/cached review
 @app.get("/review")
-def review_endpoint(
+async def review_endpoint(
     base: str = Query(..., description="Base name (e.g. '<upload>' or '<upload>_page1')."),
     model: str = Query("mistral", description="Model ID on your local server."),
     temperature: float = Query(0.2, ge=0.0, le=1.0),
     force: bool = Query(False, description="Force re-generate (bypass cache)"),
+    stream: bool = Query(False, description="Stream the review as server-sent events"),
 ):
     t0 = time.time()
-    res = do_run_review(
+    # lazy runs may have skipped the full OCR dump
+    await asyncio.to_thread(extractor_pool.extractor.ensure_full_text, base)
+    review_kwargs = dict(
         outputs_dir="outputs",
         base=base,
         llm_base_url=_llm_base_url(),
@@ -633,17 +680,41 @@ def review_endpoint(
         temperature=temperature,
         force=force,
     )
+    if stream:
+        return StreamingResponse(_review_events(review_kwargs), media_type="text/event-stream")
+    res = await run_review_async(**review_kwargs)
     print(f"[TIMING] /review call: {time.time() - t0:.2f}s")
     status = 200 if "error" not in res else 500
     return JSONResponse(content=res, status_code=status)
 
-# Bundle all artifacts
+def _attachment(filename: str) -> str:
+    # same encoding FileResponse uses for non-ASCII upload names
+    quoted = quote(filename)
+    return f"attachment; filename*=utf-8''{quoted}" if quoted != filename else f'attachment; filename="{filename}"'
+
+# Bundle artifacts (one upload, or everything when no base is given)
 @app.get("/zip")
-def download_zip():
-    zip_path = "outputs/results.zip"
-    with zipfile.ZipFile(zip_path, "w") as zipf:
-        for root, _, files in os.walk("outputs"):
-            for file in files:
-                if file.endswith((".csv", ".json", ".png", ".txt", ".pdf")):
-                    zipf.write(os.path.join(root, file), arcname=file)
-    return FileResponse(zip_path, filename="processed_results.zip")
+def download_zip(
+    base: str | None = Query(None, description="Upload base name (the 'zip' link of /process)."),
+):
+    if not base:
+        # streamed as it is built: no shared results.zip that concurrent calls would overwrite
+        return StreamingResponse(
+            iter_zip(all_artifacts("outputs")),
+            media_type="application/zip",
+            headers={"Content-Disposition": _attachment("processed_results.zip")},
+        )
+    if os.path.basename(base) != base or base in (".", ".."):
+        return JSONResponse(status_code=400, content={"error": "Invalid base name"})
+    files = upload_artifacts("outputs", base)
+    if not files:
+        return JSONResponse(status_code=404, content={"error": f"No artifacts for '{base}'"})
+    path, cached = zip_cache.lookup(base, files)
+    filename = f"{base}_results.zip"
+    if cached:
+        return FileResponse(path, filename=filename, media_type="application/zip")
+    return StreamingResponse(
+        zip_cache.build(base, files, path),
+        media_type="application/zip",
+        headers={"Content-Disposition": _attachment(filename)},
+    )
@@ -0,0 +1,167 @@
+# core/bundle.py — in-memory result of one page, handed from extraction to validation, LLM review and PDF
+
+from __future__ import annotations
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+import pandas as pd
+
+# Cells pandas.read_csv turns into NaN by default; the stages used to see them as "" after a CSV round-trip
+_CSV_NA = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+           "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+
+
+def frame_as_loaded(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """What pd.read_csv(path, dtype=str).fillna("") returns for a frame the extractor writes."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    out = df.astype(str).where(df.notna(), "")
+    # row numbers in warnings count from the first written row, not the pre-filter index
+    return out.mask(out.isin(_CSV_NA), "").reset_index(drop=True)
+
+
+def _to_outputs_url(p: str | Path) -> str:
+    return f"/outputs/{Path(p).name}"
+
+
+@dataclass
+class TableArtifact:
+    index: int
+    bbox: List[int]
+    crop: Optional[np.ndarray]          # None once released after save()
+    display: Optional[pd.DataFrame]     # None/empty when OCR found no rows
+    canonical: Optional[pd.DataFrame] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.display is None or self.display.empty
+
+
+@dataclass
+class ResultBundle:
+    """
+    Everything extracted from one page, kept in memory so validation, the LLM review and the
+    PDF report don't re-read the files; save() writes the usual outputs/ artifacts once.
+    """
+    name: str
+    output_dir: Path
+    page_image: Optional[np.ndarray]                # None once released after save()
+    header: Dict[str, Any]
+    debug: bool = False
+    source: Optional[str] = None                    # original image path, if any
+    full_text_blocks: Optional[List[Dict]] = None   # None when the lazy full-page OCR was skipped
+    tables: List[TableArtifact] = field(default_factory=list)
+    warnings: List[Dict[str, Any]] = field(default_factory=list)
+    validated: bool = False
+    saved: bool = False
+
+    # ---- artifact paths (same names as before the bundle existed)
+    def path(self, suffix: str) -> Path:
+        return self.output_dir / f"{self.name}{suffix}"
+
+    def _table_files(self, t: TableArtifact) -> Dict[str, Optional[Path]]:
+        if not t.empty:
+            csv = self.path(f"_table_{t.index}.csv")
+            val = self.path(f"_table_{t.index}_val.csv")
+        else:
+            csv = self.path(f"_table_{t.index}_EMPTY.csv") if self.debug else None
+            val = None
+        return {"image": self.path(f"_table_{t.index}.png"), "csv": csv, "val_csv": val}
+
+    # ---- views used by the later stages
+    @property
+    def reported_tables(self) -> List[TableArtifact]:
+        """Tables that show up in the result (empty ones only in debug mode)."""
+        return [t for t in self.tables if not t.empty or self.debug]
+
+    def validation_frames(self) -> List[pd.DataFrame]:
+        """Canonical frames, or the displayed ones when no table had rows (mirrors the CSV choice)."""
+        frames = [frame_as_loaded(t.canonical) for t in self.tables if not t.empty]
+        return frames or [frame_as_loaded(t.display) for t in self.reported_tables]
+
+    def full_text_json(self) -> Optional[str]:
+        if self.full_text_blocks is None:
+            return None
+        return json.dumps(self.full_text_blocks, ensure_ascii=False)
+
+    def first_table(self) -> Optional[TableArtifact]:
+        return next((t for t in self.tables if t.index == 0 and not t.empty), None)
+
+    def report_tables(self) -> List[Dict[str, Any]]:
+        out = []
+        for t in self.reported_tables:
+            csv_path = str(self._table_files(t)["csv"].resolve())
+            if t.empty:
+                # same shape _load_tables gives for an empty CSV
+                out.append({"headers": [""], "rows": [], "csv_path": csv_path})
+                continue
+            df = frame_as_loaded(t.display)
+            out.append({"headers": list(df.columns), "rows": df.values.tolist(), "csv_path": csv_path})
+        return out
+
+    # ---- legacy result dict (/outputs URLs)
+    def to_result(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "image": self.source or str(self.path(".png")),
+            "original_image": _to_outputs_url(self.path(".png")),
+            "header_json": _to_outputs_url(self.path("_header.json")),
+            "table_csvs": [],
+            "warnings": self.warnings,
+            "full_text_json": _to_outputs_url(self.path("_full_text.json")) if self.full_text_blocks is not None else None,
+            "tables": [],
+            "table_crop_image": None,
+        }
+        for t in self.reported_tables:
+            files = self._table_files(t)
+            result["table_csvs"].append(_to_outputs_url(files["csv"]))
+            result["tables"].append({
+                "index": t.index,
+                "bbox": t.bbox,
+                "shape": [int(t.display.shape[0]), int(t.display.shape[1])] if not t.empty else [0, 0],
+                "image": _to_outputs_url(files["image"]),
+            })
+            if t.index == 0:
+                result["table_crop_image"] = _to_outputs_url(files["image"])
+        return result
+
+    # ---- artifacts on disk
+    def save(self, max_workers: int = 4) -> None:
+        """Write every artifact; PNG encoding releases the GIL, so the writes overlap."""
+        def _json(path: Path, obj) -> None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(obj, f, indent=2, ensure_ascii=False)
+
+        writes = [
+            lambda: cv2.imwrite(str(self.path(".png")), self.page_image),
+            lambda: _json(self.path("_header.json"), self.header),
+        ]
+        if self.full_text_blocks is not None:
+            writes.append(lambda: _json(self.path("_full_text.json"), self.full_text_blocks))
+        for t in self.tables:
+            files = self._table_files(t)
+            writes.append(lambda t=t, p=files["image"]: cv2.imwrite(str(p), t.crop))
+            if not t.empty:
+                writes.append(lambda t=t, p=files["csv"]: t.display.to_csv(p, index=False, encoding="utf-8-sig"))
+                writes.append(lambda t=t, p=files["val_csv"]: t.canonical.to_csv(p, index=False, encoding="utf-8-sig"))
+            elif files["csv"] is not None:
+                writes.append(lambda p=files["csv"]: pd.DataFrame().to_csv(p, index=False))
+        if self.validated:
+            writes.append(lambda: _json(self.path("_warnings.json"), self.warnings))
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            for future in [pool.submit(w) for w in writes]:
+                future.result()
+        self.saved = True
+
+    def release_images(self) -> None:
+        """Drop the page and crop arrays once saved; the rest of the bundle (tables, header, warnings) stays usable."""
+        if not self.saved:
+            raise RuntimeError(f"{self.name}: save() before releasing the images")
+        self.page_image = None
+        for t in self.tables:
+            t.crop = None
@@ -5,14 +5,16 @@ from __future__ import annotations
 import os
 import json
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 import cv2
 import numpy as np
 import pandas as pd
 from ultralytics import YOLO
-import pytesseract
 
 from .ocr_utils import (
     extract_table_ocr,
@@ -23,7 +25,10 @@ from .ocr_utils import (
 from .grid_utils import (
     detect_table_cells,
 )
-from .validation import run_validations
+from .tiled_ocr import image_to_data_tiled
+from .pdf_pages import iter_pdf_pages
+from .validation import validate_tables
+from .bundle import ResultBundle, TableArtifact
 from .config import Config
 
 
@@ -36,6 +41,17 @@ def _fold(s: str) -> str:
     return unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode().lower().replace(" ", "")
 
 
+@dataclass(frozen=True)
+class ExtractOptions:
+    """Per-call flags, so concurrent requests never share mutable extractor state."""
+    translate_headers: bool = False
+    validate: bool = False
+    debug: bool = False
+    # write {name}_full_text.json: None follows ocr.full_text ("eager" always, "lazy" only when
+    # validation reads the OCR totals from it); True when an LLM review will run on the result
+    full_text: bool | None = None
+
+
 class SmartTableExtractor:
     def __init__(
         self,
@@ -49,6 +65,7 @@ class SmartTableExtractor:
         self.model = YOLO(yolo_model_path)
         self.output_dir = Path(output_dir)
         self.config = config
+        # defaults for calls without their own ExtractOptions
         self.translate = translate_headers
         self.validate = validate_schema
         self.debug = debug
@@ -102,41 +119,9 @@ class SmartTableExtractor:
         return out
 
     # ----------------------------
-    # Main
+    # Full OCR dump (debug/audit, LLM review, OCR totals for validation)
     # ----------------------------
-    def process(self, image_path: str) -> Dict:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Could not read image: {image_path}")
-
-        name = Path(image_path).stem
-        result: Dict = {
-            "image": image_path,
-            "original_image": None,
-            "header_json": None,
-            "table_csvs": [],
-            "warnings": [],
-            "full_text_json": None,
-            "tables": [],
-            "table_crop_image": None,
-        }
-
-        # Save page image for UI/PDF
-        page_img_path = self.output_dir / f"{name}.png"
-        try:
-            cv2.imwrite(str(page_img_path), image)
-            result["original_image"] = _to_outputs_url(page_img_path)
-        except Exception:
-            pass
-
-        # ---- Header
-        header_info = extract_header_info(image, self.config)
-        header_path = self.output_dir / f"{name}_header.json"
-        with open(header_path, "w", encoding="utf-8") as f:
-            json.dump(header_info, f, indent=2, ensure_ascii=False)
-        result["header_json"] = _to_outputs_url(header_path)
-
-        # ---- Full OCR dump (debug/audit)
+    def full_text_blocks(self, image: np.ndarray) -> List[Dict]:
         lang = _read_cfg_path(self.config, ["ocr", "language"], getattr(self.config, "language", "eng+deu"))
         oem = _read_cfg_path(self.config, ["ocr", "oem"], getattr(self.config, "oem", 3))
         psm = _read_cfg_path(self.config, ["ocr", "psm"], getattr(self.config, "psm", 6))
@@ -149,8 +134,13 @@ class SmartTableExtractor:
             preserve_interword_spaces=preserve_spaces,
             tessdata_prefix=tessdata_prefix
         )
-        full_ocr = pytesseract.image_to_data(image, lang=lang, config=full_cfg,
-                                             output_type=pytesseract.Output.DICT)
+        # Large pages are OCR'd as overlapping tiles in parallel; small ones in a single call
+        full_ocr = image_to_data_tiled(
+            image, lang=lang, config=full_cfg,
+            tile_size=int(_read_cfg_path(self.config, ["ocr", "tiling", "tile_size"], 4096)),
+            overlap=int(_read_cfg_path(self.config, ["ocr", "tiling", "overlap"], 256)),
+            max_workers=int(_read_cfg_path(self.config, ["ocr", "tiling", "workers"], 4)),
+        )
         ocr_blocks: List[Dict] = []
         n = len(full_ocr.get("text", []))
         for i in range(n):
@@ -168,95 +158,156 @@ class SmartTableExtractor:
                     "height": int(full_ocr["height"][i]),
                     "conf": conf_val,
                 })
+        return ocr_blocks
+
+    def ensure_full_text(self, name: str) -> str | None:
+        """Build {name}_full_text.json from the saved page image if a lazy run skipped it."""
         full_text_path = self.output_dir / f"{name}_full_text.json"
-        with open(full_text_path, "w", encoding="utf-8") as f:
-            json.dump(ocr_blocks, f, indent=2, ensure_ascii=False)
-        result["full_text_json"] = _to_outputs_url(full_text_path)
-
-        # ---- YOLO detection
-        det = self.model(image_path)[0]
-        boxes = det.boxes.xyxy.cpu().numpy() if det and det.boxes is not None else np.zeros((0, 4))
-        if boxes.shape[0] > 0:
-            idx = np.lexsort((boxes[:, 0], boxes[:, 1]))  # sort by y then x
-            boxes = boxes[idx]
-
-        validation_csvs: List[str] = []
-
-        # ---- For each detected table
-        for i, (x1, y1, x2, y2) in enumerate(boxes):
-            x1, y1, x2, y2 = map(int, [x1, y1, x2, y2])
-            if (x2 - x1) < 20 or (y2 - y1) < 20:
-                continue
-
-            crop = image[y1:y2, x1:x2]
-            table_img_path = self.output_dir / f"{name}_table_{i}.png"
-            cv2.imwrite(str(table_img_path), crop)
-
-            df = extract_table_ocr(crop, self.config, translate=self.translate, debug=self.debug)
-            df = self.postprocess_table(df)
-
-            if df is not None and not df.empty:
-                # DISPLAY CSV (what the user sees — German headers, your order)
-                csv_path = self.output_dir / f"{name}_table_{i}.csv"
-                df.to_csv(csv_path, index=False, encoding="utf-8-sig")
-
-                result["table_csvs"].append(_to_outputs_url(csv_path))
-                result["tables"].append({
-                    "index": i,
-                    "bbox": [int(x1), int(y1), int(x2), int(y2)],
-                    "shape": [int(df.shape[0]), int(df.shape[1])],
-                    "image": _to_outputs_url(table_img_path),
-                })
-                if i == 0:
-                    result["table_crop_image"] = _to_outputs_url(table_img_path)
-
-                # ----- CANONICAL CSV (for validator)
-                disp2canon = _read_cfg_path(self.config, ["headers", "display_to_canonical"], {}) or {}
-
-                # fold-insensitive rename
-                folded_map = {_fold(k): v for k, v in disp2canon.items()}
-                rename_map = {}
-                for c in df.columns:
-                    fc = _fold(str(c))
-                    if fc in folded_map:
-                        rename_map[c] = folded_map[fc]
-
-                df_val = df.rename(columns=rename_map).copy()
-                validator_cols = ["position", "quantity", "diameter_mm", "unit_length_m", "total_length_m", "weight_kg"]
-                keep = [c for c in validator_cols if c in df_val.columns]
-                if keep:
-                    df_val = df_val[keep]
-
-                val_csv_path = self.output_dir / f"{name}_table_{i}_val.csv"
-                df_val.to_csv(val_csv_path, index=False, encoding="utf-8-sig")
-                validation_csvs.append(str(val_csv_path))
-            else:
-                if self.debug:
-                    csv_path = self.output_dir / f"{name}_table_{i}_EMPTY.csv"
-                    pd.DataFrame().to_csv(csv_path, index=False)
-                    result["table_csvs"].append(_to_outputs_url(csv_path))
-                    result["tables"].append({
-                        "index": i,
-                        "bbox": [int(x1), int(y1), int(x2), int(y2)],
-                        "shape": [0, 0],
-                        "image": _to_outputs_url(table_img_path),
-                    })
-                    if i == 0:
-                        result["table_crop_image"] = _to_outputs_url(table_img_path)
-
-        # ---- Validation (prefer canonical CSVs)
-        if self.validate and (validation_csvs or result.get("table_csvs")):
-            csvs = validation_csvs if validation_csvs else result["table_csvs"]
-            # Read header info file back (it's already JSON-serializable dict)
-            try:
-                with open(header_path, "r", encoding="utf-8") as f:
-                    header_for_val = json.load(f)
-            except Exception:
-                header_for_val = header_info
-            warnings = run_validations(csvs, header_for_val, self.config)
-            warn_path = self.output_dir / f"{name}_warnings.json"
-            with open(warn_path, "w", encoding="utf-8") as f:
-                json.dump(warnings, f, indent=2, ensure_ascii=False)
-            result["warnings"] = warnings
-
-        return result
+        if not full_text_path.exists():
+            image = cv2.imread(str(self.output_dir / f"{name}.png"))
+            if image is None:
+                return None
+            with open(full_text_path, "w", encoding="utf-8") as f:
+                json.dump(self.full_text_blocks(image), f, indent=2, ensure_ascii=False)
+        return _to_outputs_url(full_text_path)
+
+    # ----------------------------
+    # One detected table: crop → OCR → display frame + canonical frame
+    # ----------------------------
+    def _extract_table(self, image: np.ndarray, opts: ExtractOptions, i: int, box) -> TableArtifact | None:
+        x1, y1, x2, y2 = map(int, box)
+        if (x2 - x1) < 20 or (y2 - y1) < 20:
+            return None
+
+        crop = image[y1:y2, x1:x2]
+        df = extract_table_ocr(crop, self.config, translate=opts.translate_headers, debug=opts.debug)
+        df = self.postprocess_table(df)
+        table = TableArtifact(index=i, bbox=[x1, y1, x2, y2], crop=crop, display=df)
+        if table.empty:
+            return table
+
+        # ----- CANONICAL frame (for validator)
+        disp2canon = _read_cfg_path(self.config, ["headers", "display_to_canonical"], {}) or {}
+
+        # fold-insensitive rename
+        folded_map = {_fold(k): v for k, v in disp2canon.items()}
+        rename_map = {}
+        for c in df.columns:
+            fc = _fold(str(c))
+            if fc in folded_map:
+                rename_map[c] = folded_map[fc]
+
+        df_val = df.rename(columns=rename_map).copy()
+        validator_cols = ["position", "quantity", "diameter_mm", "unit_length_m", "total_length_m", "weight_kg"]
+        keep = [c for c in validator_cols if c in df_val.columns]
+        if keep:
+            df_val = df_val[keep]
+        table.canonical = df_val
+        return table
+
+    # ----------------------------
+    # Main
+    # ----------------------------
+    def detect_tables(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """YOLO over several in-memory BGR pages in one forward pass; boxes per page sorted by y then x."""
+        dets = self.model(images, verbose=False)
+        page_boxes = []
+        for det in dets:
+            boxes = det.boxes.xyxy.cpu().numpy() if det and det.boxes is not None else np.zeros((0, 4))
+            if boxes.shape[0] > 0:
+                idx = np.lexsort((boxes[:, 0], boxes[:, 1]))  # sort by y then x
+                boxes = boxes[idx]
+            page_boxes.append(boxes)
+        return page_boxes
+
+    def process(self, image_path: str, options: ExtractOptions | None = None) -> Dict:
+        bundle = self.extract(image_path, options)
+        bundle.save()
+        return bundle.to_result()
+
+    def process_pdf(self, pdf_path: str, options: ExtractOptions | None = None, dpi: int | None = None) -> List[Dict]:
+        bundles = self.extract_pdf(pdf_path, options, dpi)
+        for bundle in bundles:
+            if not bundle.saved:
+                bundle.save()
+        return [bundle.to_result() for bundle in bundles]
+
+    def extract(self, image_path: str, options: ExtractOptions | None = None) -> ResultBundle:
+        """In-memory result of one image; call save() on it to write the outputs/ artifacts."""
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not read image: {image_path}")
+        bundle = self.extract_batch([(Path(image_path).stem, image)], options)[0]
+        bundle.source = image_path
+        return bundle
+
+    def extract_pdf(self, pdf_path: str, options: ExtractOptions | None = None, dpi: int | None = None) -> List[ResultBundle]:
+        """
+        Every page of a PDF, named {stem}_page{n} (1-based) like the rest of the outputs.
+        Page 1 keeps its images for the review and the PDF report (the caller saves it); every
+        later page is saved as soon as it is extracted and its images are dropped, so a large
+        plan set never holds more than one YOLO batch of rasterized pages.
+        """
+        dpi = int(dpi or _read_cfg_path(self.config, ["pdf", "dpi"], 300))
+        stem = Path(pdf_path).stem
+        pages = ((f"{stem}_page{index + 1}", image) for index, image in iter_pdf_pages(pdf_path, dpi))
+        bundles: List[ResultBundle] = []
+        for bundle in self.iter_extract_batch(pages, options):
+            if bundles:
+                bundle.save()
+                bundle.release_images()
+            bundles.append(bundle)
+        return bundles
+
+    def extract_batch(self, pages: Iterable[Tuple[str, np.ndarray]], options: ExtractOptions | None = None) -> List[ResultBundle]:
+        return list(self.iter_extract_batch(pages, options))
+
+    def iter_extract_batch(self, pages: Iterable[Tuple[str, np.ndarray]], options: ExtractOptions | None = None) -> Iterator[ResultBundle]:
+        """
+        pages: (name, BGR array) pairs, consumed model.batch_size at a time so YOLO
+        runs one batched forward pass per chunk; each page's crops then go to the OCR stage.
+        Bundles are yielded as they are done, so the caller decides which ones stay in memory.
+        """
+        opts = options or ExtractOptions(translate_headers=self.translate, validate=self.validate, debug=self.debug)
+        batch_size = max(1, int(_read_cfg_path(self.config, ["model", "batch_size"], 4)))
+        pages = iter(pages)
+        while True:
+            chunk = list(islice(pages, batch_size))
+            if not chunk:
+                break
+            page_boxes = self.detect_tables([image for _, image in chunk])
+            for (name, image), boxes in zip(chunk, page_boxes):
+                yield self._extract_page(image, name, boxes, opts)
+
+    def _extract_page(self, image: np.ndarray, name: str, boxes: np.ndarray, opts: ExtractOptions) -> ResultBundle:
+        # ---- Header
+        bundle = ResultBundle(
+            name=name,
+            output_dir=self.output_dir,
+            page_image=image,
+            header=extract_header_info(image, self.config),
+            debug=opts.debug,
+        )
+
+        full_text = opts.full_text
+        if full_text is None:
+            mode = str(_read_cfg_path(self.config, ["ocr", "full_text"], "eager")).lower()
+            full_text = mode == "eager" or opts.validate
+
+        # ---- Tables (and the full OCR dump) run concurrently: each OCR call is its own
+        # tesseract process, so threads scale with cores. Results are collected in box order.
+        workers = int(_read_cfg_path(self.config, ["table", "workers"], os.cpu_count() or 4))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            full_text_future = pool.submit(self.full_text_blocks, image) if full_text else None
+            tables = list(pool.map(lambda item: self._extract_table(image, opts, *item), enumerate(boxes)))
+            if full_text_future is not None:
+                bundle.full_text_blocks = full_text_future.result()
+        bundle.tables = [t for t in tables if t is not None]
+
+        # ---- Validation (prefer canonical frames), straight from memory
+        frames = bundle.validation_frames()
+        if opts.validate and frames:
+            bundle.warnings = validate_tables(frames, bundle.header, self.config, bundle.full_text_json())
+            bundle.validated = True
+
+        return bundle
@@ -0,0 +1,99 @@
+# core/extractor_pool.py — N preloaded SmartTableExtractor replicas behind an async dispatch queue
+
+from __future__ import annotations
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from .bundle import ResultBundle
+from .extractor import ExtractOptions, SmartTableExtractor
+
+
+def _cpu_slices(n: int) -> List[List[int]]:
+    """Split the CPUs this process may use into n contiguous, non-overlapping slices."""
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    n = max(1, min(n, len(cpus)))  # more replicas than CPUs would only fight over the same cores
+    size, extra = divmod(len(cpus), n)
+    slices, start = [], 0
+    for i in range(n):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(cpus[start:end])
+        start = end
+    return slices
+
+
+def _pin_current_thread(cpus: List[int]) -> None:
+    # On Linux pid 0 is the calling thread; tesseract children and the table
+    # worker threads it spawns inherit the mask.
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+
+
+class _Replica:
+    def __init__(self, extractor: SmartTableExtractor, cpus: List[int] | None):
+        self.extractor = extractor
+        self.cpus = cpus or []
+        # one dedicated thread per replica: a YOLO model is never used by two requests at once
+        self.executor = ThreadPoolExecutor(
+            max_workers=1,
+            initializer=_pin_current_thread,
+            initargs=(self.cpus,),
+        )
+
+
+class ExtractorPool:
+    """
+    Runs SmartTableExtractor.extract for concurrent requests without blocking the event loop.
+    Each replica owns its YOLO model and a worker thread (optionally pinned to its own CPU slice);
+    requests wait in an asyncio queue for a free replica and carry their flags in ExtractOptions.
+    """
+
+    def __init__(self, factory: Callable[[], SmartTableExtractor], replicas: int = 1, pin_cpus: bool = True):
+        replicas = max(1, int(replicas))
+        slices = _cpu_slices(replicas) if pin_cpus else [None] * replicas
+        self.replicas = [_Replica(factory(), cpus) for cpus in slices]
+        self._free: asyncio.Queue | None = None
+
+    def _queue(self) -> asyncio.Queue:
+        # created on first use so it belongs to the server's running loop
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for replica in self.replicas:
+                self._free.put_nowait(replica)
+        return self._free
+
+    @property
+    def extractor(self) -> SmartTableExtractor:
+        """Any replica, for calls that don't touch the model (e.g. ensure_full_text)."""
+        return self.replicas[0].extractor
+
+    async def _dispatch(self, method: str, *args):
+        free = self._queue()
+        replica = await free.get()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(replica.executor, getattr(replica.extractor, method), *args)
+        finally:
+            free.put_nowait(replica)
+
+    async def extract(self, image_path: str, options: ExtractOptions | None = None) -> ResultBundle:
+        return await self._dispatch("extract", image_path, options)
+
+    async def extract_pdf(self, pdf_path: str, options: ExtractOptions | None = None) -> List[ResultBundle]:
+        # one replica takes the whole document so its pages share batched YOLO passes
+        return await self._dispatch("extract_pdf", pdf_path, options)
+
+    def stats(self) -> Dict:
+        return {
+            "replicas": len(self.replicas),
+            "idle": self._free.qsize() if self._free is not None else len(self.replicas),
+            "cpus": [r.cpus for r in self.replicas],
+        }
+
+    def shutdown(self) -> None:
+        for replica in self.replicas:
+            replica.executor.shutdown(wait=False)
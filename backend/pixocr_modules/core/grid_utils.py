@@ -66,6 +66,37 @@ def dynamic_row_tolerance(df: pd.DataFrame, fallback: int = 15) -> int:
     return max(fallback, int(0.6 * (med if med > 0 else fallback)))
 
 
+def group_rows(df: pd.DataFrame, row_tol: int) -> List[pd.DataFrame]:
+    """
+    Split tokens sorted by (top, left) into rows. A row starts at a token and takes every
+    following token whose top is within row_tol of that first token's top.
+    Row starts are found with binary searches over the sorted tops instead of iterating rows.
+    """
+    if df is None or df.empty:
+        return []
+    tops = df["top"].to_numpy(dtype=np.float64).astype(np.int64)
+    starts = [0]
+    while True:
+        nxt = int(np.searchsorted(tops, tops[starts[-1]] + row_tol, side="right"))
+        if nxt >= len(tops):
+            break
+        starts.append(nxt)
+    bounds = starts + [len(tops)]
+    return [df.iloc[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def split_on_gaps(values: np.ndarray, gap: float) -> List[Tuple[int, int]]:
+    """
+    1D clustering of sorted values: a new group starts wherever consecutive values are more than gap apart.
+    Returns (start, end) positional slices.
+    """
+    if len(values) == 0:
+        return []
+    cuts = (np.flatnonzero(np.diff(values) > gap) + 1).tolist()
+    bounds = [0] + cuts + [len(values)]
+    return list(zip(bounds, bounds[1:]))
+
+
 def is_header_like_row(tokens: List[str]) -> bool:
     """
     Heuristic to skip header rows when parsing data.
@@ -88,22 +119,18 @@ def header_bins_from_tokens(header_df: pd.DataFrame, col_tolerance: int = 10) ->
     if header_df is None or header_df.empty:
         return None
 
-    df = header_df.sort_values("left").copy()
-    bins: List[List[int]] = []
-    last_right = None
+    df = header_df.sort_values("left")
+    left = df["left"].to_numpy(dtype=np.float64).astype(np.int64)
+    right = (df["left"] + df["width"]).to_numpy(dtype=np.float64).astype(np.int64)
 
-    for _, r in df.iterrows():
-        left = int(r["left"])
-        right = int(r["left"] + r["width"])
-        if last_right is not None and left - last_right < col_tolerance:
-            # Extend the previous bin if the gap is small (header text broken into sub-tokens)
-            bins[-1][0] = min(bins[-1][0], left)
-            bins[-1][1] = max(bins[-1][1], right)
-        else:
-            bins.append([left, right])
-        last_right = right
+    # Extend the previous bin while the gap to the previous token is small (header text broken into sub-tokens)
+    new_bin = np.ones(len(left), dtype=bool)
+    new_bin[1:] = (left[1:] - right[:-1]) >= col_tolerance
+    starts = np.flatnonzero(new_bin)
+    bin_left = np.minimum.reduceat(left, starts)
+    bin_right = np.maximum.reduceat(right, starts)
 
-    return [(b[0], b[1]) for b in bins]
+    return [(int(l), int(r)) for l, r in zip(bin_left, bin_right)]
 
 
 def snap_to_bins(df: pd.DataFrame, bins: List[Tuple[int, int]]) -> List[Optional[int]]:
@@ -114,14 +141,10 @@ def snap_to_bins(df: pd.DataFrame, bins: List[Tuple[int, int]]) -> List[Optional
     if not bins or df is None or df.empty:
         return [None] * (0 if df is None else len(df))
 
-    centers = df["left"] + (df["width"] / 2.0)
-    bin_centers = [(b[0] + b[1]) / 2.0 for b in bins]
-    assigned: List[Optional[int]] = []
-    for c in centers:
-        dists = [abs(float(c) - float(bc)) for bc in bin_centers]
-        idx = int(np.argmin(dists)) if len(dists) else None
-        assigned.append(idx)
-    return assigned
+    centers = (df["left"] + (df["width"] / 2.0)).to_numpy(dtype=np.float64)
+    bin_centers = np.array([(b[0] + b[1]) / 2.0 for b in bins], dtype=np.float64)
+    # argmin keeps the first bin on ties, like the scalar version did
+    return np.abs(centers[:, None] - bin_centers[None, :]).argmin(axis=1).tolist()
 
 
 # ----------------------------
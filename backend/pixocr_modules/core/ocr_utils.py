@@ -23,6 +23,8 @@ except Exception:
 # pull stable helpers from grid_utils
 from .grid_utils import (
     dynamic_row_tolerance,
+    group_rows,
+    split_on_gaps,
     header_bins_from_tokens,
     snap_to_bins,
     restrict_to_table_band,
@@ -265,16 +267,7 @@ def extract_table_ocr(image, config, translate: bool = False, debug: bool = Fals
     # --- BODY rows
     row_tol = dynamic_row_tolerance(d, row_tol_base) if dyn_row else row_tol_base
     d = d.sort_values(["top", "left"]).reset_index(drop=True)
-    rows_geom = []
-    cur, cur_top = [], int(d.iloc[0]["top"])
-    for _, tok in d.iterrows():
-        ttop = int(tok["top"])
-        if abs(ttop - cur_top) <= row_tol:
-            cur.append(tok)
-        else:
-            if cur: rows_geom.append(cur)
-            cur, cur_top = [tok], ttop
-    if cur: rows_geom.append(cur)
+    rows_geom = group_rows(d, row_tol)
 
     # --- HEADER bins (primary)
     columns, header_geom, bins = [], pd.DataFrame(), None
@@ -282,19 +275,11 @@ def extract_table_ocr(image, config, translate: bool = False, debug: bool = Fals
         row_tol_hdr = dynamic_row_tolerance(d_hdr, row_tol_base) if dyn_row else row_tol_base
         d_hdr = d_hdr.sort_values(["top", "left"]).reset_index(drop=True)
 
-        rows_hdr, cur_h, cur_top_h = [], [], int(d_hdr.iloc[0]["top"])
-        for _, tok in d_hdr.iterrows():
-            ttop = int(tok["top"])
-            if abs(ttop - cur_top_h) <= row_tol_hdr:
-                cur_h.append(tok)
-            else:
-                if cur_h: rows_hdr.append(cur_h)
-                cur_h, cur_top_h = [tok], ttop
-        if cur_h: rows_hdr.append(cur_h)
+        rows_hdr = group_rows(d_hdr, row_tol_hdr)
 
         header_rows = rows_hdr[:2]
         if header_rows:
-            header_geom = pd.concat([pd.DataFrame(r) for r in header_rows], ignore_index=True)
+            header_geom = pd.concat(header_rows, ignore_index=True)
 
         if use_bins and not header_geom.empty:
             bins = header_bins_from_tokens(header_geom[["left", "width"]].copy(), col_tolerance=hdr_merge_tol)
@@ -323,15 +308,7 @@ def extract_table_ocr(image, config, translate: bool = False, debug: bool = Fals
             # choose gap from page width / 40 (safe) with clamp
             W = image.shape[1]
             gap = max(40, int(W / 40))
-            groups = []
-            g = [num_df.iloc[0]]
-            for _, r in num_df.iloc[1:].iterrows():
-                if (r["xc"] - g[-1]["xc"]) <= gap:
-                    g.append(r)
-                else:
-                    groups.append(pd.DataFrame(g))
-                    g = [r]
-            if g: groups.append(pd.DataFrame(g))
+            groups = [num_df.iloc[a:b] for a, b in split_on_gaps(num_df["xc"].to_numpy(), gap)]
 
             # Merge near groups until we have between 5 and 7 (we expect 6 numeric cols)
             def _combine_nearest(gs):
@@ -383,8 +360,8 @@ def extract_table_ocr(image, config, translate: bool = False, debug: bool = Fals
     # ====== parse rows using bins/columns (no change) ======
     parsed = []
     for r in rows_geom:
-        r_sorted = sorted(r, key=lambda z: int(z["left"]))
-        row_tokens = [str(x["text"]).strip() for x in r_sorted if str(x["text"]).strip()]
+        r_sorted = r.sort_values("left", kind="stable")
+        row_tokens = [t for t in r_sorted["text"].astype(str).str.strip().tolist() if t]
         joined = " ".join(row_tokens).lower()
 
         # Skip header-like/units/title rows
@@ -396,7 +373,7 @@ def extract_table_ocr(image, config, translate: bool = False, debug: bool = Fals
             continue
 
         if bins and columns:
-            r_df = pd.DataFrame(r_sorted)
+            r_df = r_sorted
             # restrict to table band
             x_min = min(b[0] for b in bins) - int(pad)
             x_max = max(b[1] for b in bins) + int(pad)
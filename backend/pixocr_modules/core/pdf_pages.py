@@ -0,0 +1,26 @@
+# core/pdf_pages.py — rasterize PDF schedules page by page for the extractor
+
+from __future__ import annotations
+from typing import Iterator, Tuple
+
+import numpy as np
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # PDFs are optional; images work without it
+    fitz = None
+
+
+def is_pdf(path: str) -> bool:
+    return str(path).lower().endswith(".pdf")
+
+
+def iter_pdf_pages(pdf_path: str, dpi: int = 300) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (page_index, BGR array) one page at a time; only the pages the consumer keeps stay in memory."""
+    if fitz is None:
+        raise RuntimeError("PDF input requires PyMuPDF (pip install pymupdf)")
+    with fitz.open(pdf_path) as doc:
+        for index, page in enumerate(doc):
+            pix = page.get_pixmap(dpi=dpi, alpha=False)
+            rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+            yield index, np.ascontiguousarray(rgb[:, :, ::-1])  # OpenCV expects BGR
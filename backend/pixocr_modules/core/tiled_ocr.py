@@ -0,0 +1,78 @@
+# core/tiled_ocr.py
+# Overlapping-tile OCR for very large rasters (same output as pytesseract.image_to_data DICT).
+# The OCR service keeps an identical copy in ocr_modules/app/utils/tiled_ocr.py: the two
+# apps deploy separately and share no import root. tests/test_tiled_ocr_sync.py fails on drift.
+
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import numpy as np
+import pytesseract
+from PIL import Image
+
+DATA_KEYS = ["level", "page_num", "block_num", "par_num", "line_num", "word_num",
+             "left", "top", "width", "height", "conf", "text"]
+
+def _axis_spans(length: int, tile_size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Split one axis into overlapping tiles.
+    Returns (start, end, own_start, own_end): a tile keeps the words whose center falls
+    in [own_start, own_end), so neighbouring tiles never both keep an overlap-zone word.
+    """
+    step = max(1, tile_size - overlap)
+    starts = [0]
+    while starts[-1] + tile_size < length:
+        starts.append(starts[-1] + step)
+    spans = []
+    for i, start in enumerate(starts):
+        end = min(length, start + tile_size)
+        own_start = 0 if i == 0 else start + overlap // 2
+        own_end = length if i == len(starts) - 1 else starts[i + 1] + overlap // 2
+        spans.append((start, end, own_start, own_end))
+    return spans
+
+def _ocr_tile(image: np.ndarray, tile, lang: str, config: str) -> List[Dict]:
+    (y0, y1, own_y0, own_y1), (x0, x1, own_x0, own_x1) = tile
+    data = pytesseract.image_to_data(image[y0:y1, x0:x1], lang=lang, config=config,
+                                     output_type=pytesseract.Output.DICT)
+    words = []
+    for i in range(len(data["text"])):
+        if not str(data["text"][i]).strip():
+            continue
+        left, top = data["left"][i] + x0, data["top"][i] + y0
+        cx, cy = left + data["width"][i] / 2, top + data["height"][i] / 2
+        if own_x0 <= cx < own_x1 and own_y0 <= cy < own_y1:
+            word = {key: data[key][i] for key in DATA_KEYS}
+            word["left"], word["top"] = left, top
+            words.append(word)
+    return words
+
+def image_to_data_tiled(image, lang: str = "eng", config: str = "", tile_size: int = 4096,
+                        overlap: int = 256, max_workers: int = 4) -> Dict[str, list]:
+    """
+    Drop-in replacement for pytesseract.image_to_data(..., output_type=Output.DICT) on very large rasters.
+    The image is cut into overlapping tiles OCR'd concurrently (each tile is its own tesseract process);
+    words are mapped back to page coordinates and de-duplicated by tile ownership of their center.
+    overlap must exceed the largest word on the sheet. Images that fit in one tile are OCR'd directly.
+    """
+    if isinstance(image, Image.Image) and image.mode not in ("RGB", "L"):
+        # np.asarray on a palette (P) image yields palette indices, not pixels
+        image = image.convert("L" if image.mode in ("1", "LA", "I", "I;16") else "RGB")
+    image = np.asarray(image)
+    height, width = image.shape[:2]
+    if height <= tile_size and width <= tile_size:
+        return pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+
+    tiles = [(row, col) for row in _axis_spans(height, tile_size, overlap)
+             for col in _axis_spans(width, tile_size, overlap)]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        tile_words = list(executor.map(lambda tile: _ocr_tile(image, tile, lang, config), tiles))
+
+    merged = {key: [] for key in DATA_KEYS}
+    for tile_index, words in enumerate(tile_words):
+        for word in words:
+            # keep block numbers unique across tiles so line grouping never mixes tiles
+            word["block_num"] = tile_index * 1000 + word["block_num"]
+            for key in DATA_KEYS:
+                merged[key].append(word[key])
+    return merged
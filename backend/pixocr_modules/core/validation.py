@@ -203,6 +203,7 @@ from __future__ import annotations
 import os, re, json
 from pathlib import Path
 from typing import List, Dict, Any, Optional
+import numpy as np
 import pandas as pd
 
 # --- Optional JSON Schema (if table_schema.json exists)
@@ -261,7 +262,29 @@ def _to_int(x) -> Optional[int]:
         f = _to_float(x)
         return int(round(f)) if f is not None else None
 
-def _kg_per_m(d_mm: Optional[int | float]) -> Optional[float]:
+# Column-wise equivalents of _to_float / _to_int (NaN where those return None)
+_INT = re.compile(r"^[+-]?\d+(?:_\d+)*$")  # what int() accepts once stripped
+
+def _col_to_float(col: pd.Series) -> np.ndarray:
+    s = col.astype(str).str.strip().str.replace(" ", "", regex=False)
+    ok = s.str.match(_NUM).fillna(False).to_numpy(dtype=bool)
+    out = np.full(len(col), np.nan)
+    if ok.any():
+        out[ok] = pd.to_numeric(s[ok].str.replace(",", ".", regex=False), errors="coerce").to_numpy(dtype=float)
+    return out
+
+def _col_to_int(col: pd.Series) -> np.ndarray:
+    s = col.astype(str).str.strip()
+    ok = s.str.match(_INT).fillna(False).to_numpy(dtype=bool)
+    out = np.round(_col_to_float(col))  # round() is half-to-even too
+    if ok.any():
+        out[ok] = pd.to_numeric(s[ok].str.replace("_", "", regex=False), errors="coerce").to_numpy(dtype=float)
+    return out
+
+def _kg_per_m(d_mm: Optional[int | float | np.ndarray]) -> Optional[float | np.ndarray]:
+    """Rebar mass per metre (d²/162); element-wise on arrays, where NaN diameters stay NaN."""
+    if isinstance(d_mm, np.ndarray):
+        return (d_mm * d_mm) / 162.0
     if d_mm is None: return None
     try:
         d = float(d_mm)
@@ -351,52 +374,70 @@ def _to_canonical(df: pd.DataFrame) -> pd.DataFrame:
 # ----------------------------
 # Row & table checks
 # ----------------------------
-def _row_checks(row: Dict[str, Any], idx: int, table_i: int, cfg) -> List[Dict[str, Any]]:
-    ws: List[Dict[str, Any]] = []
-    allowed = set(_read_cfg_path(cfg, ["validation","allowed_diameters_mm"],
-                                 [6,8,10,12,14,16,20,25,28,32,40]))
+_ROW_FIELDS = ("position", "quantity", "diameter_mm", "unit_length_m", "total_length_m", "weight_kg")
+
+def _parse_rows(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Canonical numeric columns, NaN for missing/invalid cells (and for absent columns)."""
+    parsed = {}
+    for field in _ROW_FIELDS:
+        if field not in df.columns:
+            parsed[field] = np.full(len(df), np.nan)
+        elif field in ("position", "quantity", "diameter_mm"):
+            parsed[field] = _col_to_int(df[field])
+        else:
+            parsed[field] = _col_to_float(df[field])
+    return parsed
+
+def _row_checks(df: pd.DataFrame, parsed: Dict[str, np.ndarray], table_i: int, cfg) -> List[Dict[str, Any]]:
+    """All per-row rules as array expressions; warnings come out row by row, in rule order."""
+    allowed = list(_read_cfg_path(cfg, ["validation","allowed_diameters_mm"],
+                                  [6,8,10,12,14,16,20,25,28,32,40]))
     len_pct = float(_read_cfg_path(cfg, ["validation","length_tolerance_pct"], 3.0))
     len_abs = float(_read_cfg_path(cfg, ["validation","length_tolerance_abs_m"], 0.10))
     wt_pct  = float(_read_cfg_path(cfg, ["validation","weight_tolerance_pct"], 5.0))
     wt_abs  = float(_read_cfg_path(cfg, ["validation","weight_tolerance_abs_kg"], 0.20))
 
-    pos = _to_int(row.get("position"))
-    qty = _to_int(row.get("quantity"))
-    dia = _to_int(row.get("diameter_mm"))
-    L1  = _to_float(row.get("unit_length_m"))
-    LT  = _to_float(row.get("total_length_m"))
-    Wkg = _to_float(row.get("weight_kg"))
-
-    # required values
-    for field, val in (("position",pos),("quantity",qty),("diameter_mm",dia),
-                       ("unit_length_m",L1),("total_length_m",LT),("weight_kg",Wkg)):
-        if val is None:
-            ws.append({"table":table_i,"row":idx+1,"field":field,"message":"Missing or invalid value"})
-
-    # domains
-    if qty is not None and qty <= 0:
-        ws.append({"table":table_i,"row":idx+1,"field":"quantity","message":"Quantity must be > 0"})
-
-    if dia is not None and dia not in allowed:
-        ws.append({"table":table_i,"row":idx+1,"field":"diameter_mm","message":f"Unexpected Ø value {dia} mm"})
-
-    # totals ≈ qty × unit length
-    if None not in (qty, L1, LT):
-        expected = qty * L1
-        tol = max(expected*(len_pct/100.0), len_abs)
-        if abs(LT - expected) > tol:
-            ws.append({"table":table_i,"row":idx+1,"field":"total_length_m",
-                       "message":f"Gesamtlänge mismatch: {LT} vs qty×Einzellänge {expected:.2f} (±{tol:.2f})"})
-
-    # weight ≈ kg_per_m(Ø) × total length
-    if None not in (dia, LT, Wkg):
-        kgm = _kg_per_m(dia)
-        if kgm is not None:
-            expected = kgm * LT
-            tol = max(expected*(wt_pct/100.0), wt_abs)
-            if abs(Wkg - expected) > tol:
-                ws.append({"table":table_i,"row":idx+1,"field":"weight_kg",
-                           "message":f"Gewicht mismatch: {Wkg} vs expected {expected:.2f} (±{tol:.2f})"})
+    qty, dia = parsed["quantity"], parsed["diameter_mm"]
+    L1, LT, Wkg = parsed["unit_length_m"], parsed["total_length_m"], parsed["weight_kg"]
+    has = {field: ~np.isnan(parsed[field]) for field in _ROW_FIELDS}
+
+    with np.errstate(invalid="ignore"):
+        # totals ≈ qty × unit length
+        len_expected = qty * L1
+        len_tol = np.maximum(len_expected * (len_pct / 100.0), len_abs)
+        len_bad = has["quantity"] & has["unit_length_m"] & has["total_length_m"] & (np.abs(LT - len_expected) > len_tol)
+
+        # weight ≈ kg_per_m(Ø) × total length
+        wt_expected = _kg_per_m(dia) * LT
+        wt_tol = np.maximum(wt_expected * (wt_pct / 100.0), wt_abs)
+        wt_bad = has["diameter_mm"] & has["total_length_m"] & has["weight_kg"] & (np.abs(Wkg - wt_expected) > wt_tol)
+
+        flags = np.column_stack(
+            [~has[field] for field in _ROW_FIELDS] + [
+                has["quantity"] & (qty <= 0),
+                has["diameter_mm"] & ~np.isin(dia, allowed),
+                len_bad,
+                wt_bad,
+            ]
+        )
+
+    ws: List[Dict[str, Any]] = []
+    labels = df.index.tolist()
+    for r, k in zip(*np.nonzero(flags)):
+        w = {"table": table_i, "row": labels[r] + 1}
+        if k < len(_ROW_FIELDS):
+            w.update(field=_ROW_FIELDS[k], message="Missing or invalid value")
+        elif k == 6:
+            w.update(field="quantity", message="Quantity must be > 0")
+        elif k == 7:
+            w.update(field="diameter_mm", message=f"Unexpected Ø value {int(dia[r])} mm")
+        elif k == 8:
+            w.update(field="total_length_m",
+                     message=f"Gesamtlänge mismatch: {float(LT[r])} vs qty×Einzellänge {len_expected[r]:.2f} (±{len_tol[r]:.2f})")
+        else:
+            w.update(field="weight_kg",
+                     message=f"Gewicht mismatch: {float(Wkg[r])} vs expected {wt_expected[r]:.2f} (±{wt_tol[r]:.2f})")
+        ws.append(w)
     return ws
 
 def _table_checks(df: pd.DataFrame, table_i: int) -> List[Dict[str, Any]]:
@@ -435,10 +476,76 @@ def _schema_validator() -> Optional[Any]:
     except Exception:
         return None
 
+def _schema_column(values: np.ndarray, as_int: bool, index) -> pd.Series:
+    """The dtype Series.map(_to_int / _to_float) used to infer: int64, float64 with NaN, or all-None object."""
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return pd.Series([None] * len(values), index=index, dtype=object)
+    if as_int and valid.all():
+        return pd.Series(values.astype(np.int64), index=index)
+    return pd.Series(values, index=index)
+
+# Top-level keywords whose errors depend only on which columns exist (or are per-property)
+_ROW_SCHEMA_KEYWORDS = {"$schema", "$id", "title", "description", "type", "required", "properties", "additionalProperties"}
+
+def _schema_checks(validator, temp: pd.DataFrame, table_i: int) -> List[Dict[str, Any]]:
+    """
+    validator.iter_errors over every row, without validating whole rows when the schema allows it:
+    object-level errors are computed once per table, property errors once per distinct cell value.
+    """
+    # same row values iterrows() would give (common dtype across columns), boxed as Python scalars
+    rows = [{c: (v.item() if isinstance(v, np.generic) else v) for c, v in zip(temp.columns, vals)}
+            for vals in temp.values]
+    labels = temp.index.tolist()
+    schema = validator.schema
+    ws: List[Dict[str, Any]] = []
+
+    def _warn(r: int, field, message: str):
+        ws.append({"table": table_i, "row": labels[r] + 1, "field": field, "message": message})
+
+    fast = (isinstance(schema, dict) and set(schema) <= _ROW_SCHEMA_KEYWORDS
+            and isinstance(schema.get("additionalProperties", True), bool)
+            and "$ref" not in json.dumps(schema))
+    if not fast or not rows:
+        for r, row in enumerate(rows):
+            for err in validator.iter_errors(row):
+                _warn(r, list(err.path)[0] if err.path else None, err.message)
+        return ws
+
+    object_errors: Dict[str, List[str]] = {}
+    for err in validator.iter_errors(rows[0]):
+        if not err.path:
+            object_errors.setdefault(err.validator, []).append(err.message)
+    props = {p: type(validator)(sub) for p, sub in (schema.get("properties") or {}).items() if p in temp.columns}
+    cache: Dict[tuple, List[str]] = {}
+
+    for r, row in enumerate(rows):
+        for keyword in schema:
+            if keyword != "properties":
+                for message in object_errors.get(keyword, []):
+                    _warn(r, None, message)
+                continue
+            for p, sub in props.items():
+                v = row[p]
+                key = (p, type(v), repr(v))
+                if key not in cache:
+                    cache[key] = [err.message for err in sub.iter_errors(v)]
+                for message in cache[key]:
+                    _warn(r, p, message)
+    return ws
+
 # ----------------------------
 # Public API
 # ----------------------------
 def run_validations(csv_paths: List[str], header_data: Dict[str, Any], config=None) -> List[Dict[str, Any]]:
+    # auto-detect base for OCR totals
+    base = _infer_base_from_csv(csv_paths[0]) if csv_paths else None
+    ocr_text = _load_full_text_json(base) if base else None
+    return validate_tables([_load_csv(p) for p in (csv_paths or [])], header_data, config, ocr_text)
+
+def validate_tables(frames: List[pd.DataFrame], header_data: Dict[str, Any], config=None,
+                    ocr_text: str | None = None) -> List[Dict[str, Any]]:
+    """Same checks as run_validations on already loaded string frames (see core.bundle.frame_as_loaded)."""
     warnings: List[Dict[str, Any]] = []
 
     # header checks
@@ -447,17 +554,13 @@ def run_validations(csv_paths: List[str], header_data: Dict[str, Any], config=No
     # optional schema
     validator = _schema_validator()
 
-    # auto-detect base for OCR totals
-    base = _infer_base_from_csv(csv_paths[0]) if csv_paths else None
-    ocr_text = _load_full_text_json(base) if base else None
     totals = _extract_totals_from_ocr(ocr_text or "") if ocr_text else {}
 
     sum_qty = 0
     sum_len = 0.0
     sum_wgt = 0.0
 
-    for i, p in enumerate(csv_paths or []):
-        df = _load_csv(p)
+    for i, df in enumerate(frames or []):
         if df.empty:
             warnings.append({"table": i, "message": "Empty table CSV"})
             continue
@@ -470,32 +573,24 @@ def run_validations(csv_paths: List[str], header_data: Dict[str, Any], config=No
             if c in df.columns:
                 df[c] = df[c].astype(str).fillna("")
 
+        parsed = _parse_rows(df)
+
         # JSON Schema (optional) — after coercion to float/int in a temp view
         if validator is not None:
             temp = df.copy()
-            def _coerce_col(col, fn): 
-                if col in temp: temp[col] = temp[col].map(fn)
-            _coerce_col("position", _to_int)
-            _coerce_col("quantity", _to_int)
-            _coerce_col("diameter_mm", _to_float)
-            _coerce_col("unit_length_m", _to_float)
-            _coerce_col("total_length_m", _to_float)
-            _coerce_col("weight_kg", _to_float)
-            for r_i, r in temp.iterrows():
-                for err in validator.iter_errors(r.to_dict()):
-                    warnings.append({
-                        "table": i, "row": r_i+1,
-                        "field": list(err.path)[0] if err.path else None,
-                        "message": err.message
-                    })
-
-        # row + table checks
-        for r_i, r in df.iterrows():
-            warnings.extend(_row_checks(r.to_dict(), r_i, i, config))
-            # accumulate totals (skip None)
-            q = _to_int(r.get("quantity")); sum_qty += q or 0
-            L = _to_float(r.get("total_length_m")); sum_len += L or 0.0
-            w = _to_float(r.get("weight_kg")); sum_wgt += w or 0.0
+            for col in _ROW_FIELDS:
+                if col in temp:
+                    # the schema sees Ø as a float, the row rules as an int
+                    values = _col_to_float(temp[col]) if col == "diameter_mm" else parsed[col]
+                    temp[col] = _schema_column(values, as_int=col in ("position", "quantity"), index=temp.index)
+            warnings.extend(_schema_checks(validator, temp, i))
+
+        # row + table checks, column-wise
+        warnings.extend(_row_checks(df, parsed, i, config))
+        # accumulate totals (skip None); sequential sums keep the former float rounding
+        q = parsed["quantity"]; sum_qty += int(q[~np.isnan(q)].sum())
+        L = parsed["total_length_m"]; sum_len = sum(L[~np.isnan(L)].tolist(), sum_len)
+        w = parsed["weight_kg"]; sum_wgt = sum(w[~np.isnan(w)].tolist(), sum_wgt)
         warnings.extend(_table_checks(df, i))
 
     # compare OCR totals if we found any (tolerant)
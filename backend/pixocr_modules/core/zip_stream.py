@@ -0,0 +1,136 @@
+# core/zip_stream.py — per-upload ZIP bundles streamed straight to the response, cached by content key
+
+from __future__ import annotations
+import glob
+import hashlib
+import os
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+BUNDLE_SUFFIXES = (".csv", ".json", ".png", ".txt", ".pdf")
+_STORED = {".png", ".pdf", ".jpg", ".jpeg"}  # already compressed; deflating them only costs CPU
+_CHUNK = 1 << 16
+
+
+def upload_artifacts(outputs_dir: str | Path, base: str) -> List[Path]:
+    """
+    Artifacts of one upload. Every file the pipeline writes for it starts with the upload's
+    unique base (``<uuid>_<name>``), followed by "_" (tables, pages, report…) or "." (the copy).
+    """
+    out = []
+    with os.scandir(outputs_dir) as entries:
+        for e in entries:
+            name = e.name
+            if (name.startswith(base) and name[len(base):len(base) + 1] in ("_", ".")
+                    and name.endswith(BUNDLE_SUFFIXES) and e.is_file()):
+                out.append(Path(e.path))
+    return sorted(out)
+
+
+def all_artifacts(outputs_dir: str | Path) -> List[Path]:
+    """Everything under outputs_dir the legacy /zip used to pack."""
+    return sorted(
+        Path(root) / f
+        for root, _, files in os.walk(outputs_dir)
+        for f in files
+        if f.endswith(BUNDLE_SUFFIXES)
+    )
+
+
+def content_key(files: Iterable[Path]) -> str:
+    """Fingerprint of names, sizes and mtimes: any rewritten artifact gives a new key."""
+    h = hashlib.sha256()
+    for p in files:
+        st = p.stat()
+        h.update(f"{p.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:24]
+
+
+class _Pipe:
+    """Unseekable sink for ZipFile (it then writes data descriptors); drained between chunks."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._buf += data
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def iter_zip(files: Iterable[Path], cache_path: Optional[Path] = None) -> Iterator[bytes]:
+    """
+    Yield a ZIP of files (flat arcnames) chunk by chunk, so only one chunk is in memory.
+    With cache_path, the same bytes go to a temp file that replaces cache_path once the
+    archive is complete; an interrupted download leaves no partial bundle behind.
+    """
+    pipe = _Pipe()
+    tmp = cache_path.with_name(f".{uuid.uuid4().hex}.part") if cache_path is not None else None
+    sink = open(tmp, "wb") if tmp is not None else None
+    complete = False
+
+    def _emit() -> bytes:
+        data = pipe.drain()
+        if data and sink is not None:
+            sink.write(data)
+        return data
+
+    try:
+        with zipfile.ZipFile(pipe, "w") as zf:
+            for p in files:
+                info = zipfile.ZipInfo.from_file(p, arcname=p.name)
+                info.compress_type = zipfile.ZIP_STORED if p.suffix.lower() in _STORED else zipfile.ZIP_DEFLATED
+                with open(p, "rb") as src, zf.open(info, "w") as dst:
+                    while chunk := src.read(_CHUNK):
+                        dst.write(chunk)
+                        if data := _emit():
+                            yield data
+                if data := _emit():  # deflate tail + data descriptor
+                    yield data
+        if data := _emit():  # central directory
+            yield data
+        complete = True
+    finally:
+        if sink is not None:
+            sink.close()
+            if complete:
+                os.replace(tmp, cache_path)
+            else:
+                tmp.unlink(missing_ok=True)
+
+
+class ZipBundleCache:
+    """Finished per-upload bundles on disk, named <base>.<content key>.zip."""
+
+    def __init__(self, cache_dir: str | Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, base: str, files: List[Path]) -> Path:
+        return self.cache_dir / f"{base}.{content_key(files)}.zip"
+
+    def lookup(self, base: str, files: List[Path]) -> tuple[Path, bool]:
+        """(bundle path, already built?) for the current state of the upload's artifacts."""
+        path = self.path_for(base, files)
+        return path, path.exists()
+
+    def build(self, base: str, files: List[Path], path: Path) -> Iterator[bytes]:
+        """Stream the bundle while writing it to path; older bundles of the same upload are dropped."""
+        yield from iter_zip(files, cache_path=path)
+        for old in self.cache_dir.glob(f"{glob.escape(base)}.*.zip"):
+            if old != path:
+                old.unlink(missing_ok=True)
@@ -498,8 +498,9 @@ def run_review(outputs_dir: str = "outputs",
  
 # llm_review.py — robust LM Studio review with defaults, health-check, fallback, and junk-output guard
 
-import os, json, requests
-from typing import Dict, Any, Optional, List, Tuple
+import os, json, time, asyncio, threading, requests
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Any, Optional, List, Tuple
 
 # ------------------------------------------------------------------
 # Built-in defaults (overridable via OS env)
@@ -515,6 +516,9 @@ _DEFAULTS = {
     "LLM_CONNECT_TIMEOUT_S":   "10",
     "LLM_FAST":                "1",
     "LLM_TEMPERATURE":         "0.2",
+    "LLM_STREAM":              "1",      # stream tokens and stop reading at <END>
+    "LLM_HEALTH_TTL_S":        "30",     # reuse a successful /v1/models check this long
+    "LLM_POOL_SIZE":           "8",      # keep-alive connections per LLM server
 }
 
 def _env(k: str, fallback: Optional[str] = None) -> str:
@@ -531,6 +535,62 @@ if FAST_MODE:
 CONNECT_TIMEOUT_S  = int(_env("LLM_CONNECT_TIMEOUT_S"))
 REQUEST_TIMEOUT_S  = int(_env("LLM_TIMEOUT_S"))
 ENDPOINT_PREF      = (_env("LLM_ENDPOINT_PREF") or "chat").strip().lower()  # "chat" | "completions"
+STREAM             = _env("LLM_STREAM") == "1"
+HEALTH_TTL_S       = float(_env("LLM_HEALTH_TTL_S"))
+
+# Receives (attempt, text chunk) while a review streams; attempt increases when a fallback starts over
+TokenCallback = Callable[[int, str], None]
+
+class ReviewCancelled(Exception):
+    """Raised inside run_llm once the caller has set its cancel event."""
+
+# ---------------- Shared HTTP session & cached health ----------------
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_health: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_health_lock = threading.Lock()
+
+def http_session() -> requests.Session:
+    """One keep-alive session for every LLM call, so reviews don't pay a new TCP handshake each time."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(_env("LLM_POOL_SIZE")))
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+def model_status(base_url: Optional[str] = None, max_age: Optional[float] = None) -> Dict[str, Any]:
+    """
+    GET /v1/models, cached per server for LLM_HEALTH_TTL_S (max_age=0 forces a fresh probe).
+    Only successful checks are cached, so a server that comes up is seen on the next call.
+    """
+    base = (base_url or _env("LLM_BASE_URL")).rstrip("/")
+    url = f"{base}/v1/models"
+    ttl = HEALTH_TTL_S if max_age is None else max_age
+    with _health_lock:
+        hit = _health.get(base)
+    if hit is not None and time.monotonic() - hit[0] < ttl:
+        return {**hit[1], "cached": True}
+
+    t0 = time.monotonic()
+    try:
+        r = http_session().get(url, timeout=(CONNECT_TIMEOUT_S, 15))
+        r.raise_for_status()
+        ids = [m.get("id") for m in r.json().get("data", [])]
+    except requests.exceptions.RequestException as e:
+        _forget_health(base)
+        return {"ok": False, "error": str(e), "url": url, "cached": False}
+    status = {"ok": True, "models": ids, "latency_s": round(time.monotonic() - t0, 3), "url": url}
+    with _health_lock:
+        _health[base] = (time.monotonic(), status)
+    return {**status, "cached": False}
+
+def _forget_health(base: str) -> None:
+    with _health_lock:
+        _health.pop(base.rstrip("/"), None)
 
 # ---------------- File helpers ----------------
 def _ensure_exists(path: Optional[str]) -> Optional[str]:
@@ -620,11 +680,29 @@ def _select_header_fields(hdr: dict):
 
 def build_prompt(base: str, outputs_dir: str = "outputs") -> str:
     paths = _paths_for_base(outputs_dir, base)
+    return _compose_prompt(
+        header=_load_file(paths["header_json"], is_json=True) if paths["header_json"] else None,
+        full_text=_load_file(paths["full_text_json"], is_json=True) if paths["full_text_json"] else None,
+        csv_excerpt=_load_csv_excerpt(paths["table_csv"], MAX_CSV_LINES) if paths["table_csv"] else None,
+        warnings=_load_file(paths["warnings_json"], is_json=True) if paths["warnings_json"] else None,
+    )
+
+def build_prompt_from_bundle(bundle) -> str:
+    """Same prompt from an in-memory core.bundle.ResultBundle, before its files are written."""
+    first = bundle.first_table()
+    return _compose_prompt(
+        header=bundle.header,
+        full_text=bundle.full_text_blocks,
+        csv_excerpt=first.display.head(max(MAX_CSV_LINES - 1, 0)).to_csv(index=False) if first else None,
+        warnings=bundle.warnings if bundle.validated else None,
+    )
+
+def _compose_prompt(header, full_text, csv_excerpt: Optional[str], warnings) -> str:
     sections: List[str] = []
 
     # Header (clean)
-    if paths["header_json"]:
-        hdr = _load_file(paths["header_json"], is_json=True)
+    if header is not None:
+        hdr = header
         if isinstance(hdr, dict):
             items = _select_header_fields(hdr)
             if items:
@@ -635,20 +713,20 @@ def build_prompt(base: str, outputs_dir: str = "outputs") -> str:
             sections.append("Header Info: (unstructured)")
 
     # Full OCR text (truncate)
-    if paths["full_text_json"]:
-        ft = _load_file(paths["full_text_json"], is_json=True)
+    if full_text is not None:
+        ft = full_text
         ft_text = json.dumps(ft, ensure_ascii=False) if isinstance(ft, (dict, list)) else str(ft)
         if len(ft_text) > MAX_FULLTEXT_CHARS:
             ft_text = ft_text[:MAX_FULLTEXT_CHARS] + "\n[...truncated...]"
         sections.append("Full OCR Text (truncated):\n" + ft_text)
 
     # CSV excerpt
-    if paths["table_csv"]:
-        sections.append("Extracted Table (first rows):\n" + _load_csv_excerpt(paths["table_csv"], MAX_CSV_LINES))
+    if csv_excerpt is not None:
+        sections.append("Extracted Table (first rows):\n" + csv_excerpt)
 
     # Warnings
-    if paths["warnings_json"]:
-        w = _load_file(paths["warnings_json"], is_json=True)
+    if warnings is not None:
+        w = warnings
         items = w.get("warnings", w) if isinstance(w, dict) else (w if isinstance(w, list) else [str(w)])
         sections.append("Warnings (sample):\n" + "\n".join(f"- {itm}" for itm in items[:12]))
     else:
@@ -690,12 +768,55 @@ def _looks_garbage(text: str) -> bool:
         return True
     return False
 
+# ---------------- Streaming reader ----------------
+_END = "<END>"
+
+def _read_stream(r: requests.Response, pick: Callable[[Dict[str, Any]], Optional[str]],
+                 on_chunk: Optional[Callable[[str], None]] = None,
+                 cancel: Optional[threading.Event] = None) -> str:
+    """
+    Collect an OpenAI-style SSE stream. Reading stops at the first <END> even if the server
+    ignores "stop"; chunks reach on_chunk without the marker (the last few characters are
+    held back until they can no longer be the start of <END>).
+    Raises ReviewCancelled as soon as cancel is set.
+    """
+    text, sent = "", 0
+    for line in r.iter_lines():
+        if cancel is not None and cancel.is_set():
+            raise ReviewCancelled()
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            continue  # keep reading to the end of the body so the connection goes back to the pool
+        try:
+            delta = pick(json.loads(data))
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            continue
+        if not delta:
+            continue
+        start = max(0, len(text) - len(_END) + 1)
+        text += delta
+        cut = text.find(_END, start)
+        if cut >= 0:
+            text = text[:cut]
+            break
+        safe = len(text) - (len(_END) - 1)
+        if on_chunk is not None and safe > sent:
+            on_chunk(text[sent:safe])
+            sent = safe
+    if on_chunk is not None and len(text) > sent:
+        on_chunk(text[sent:])
+    return text
+
 # ---------------- LM Studio call with health-check, fallback & rescue ----------------
 def run_llm(prompt: str,
             base_url: Optional[str] = None,
             model_name: Optional[str] = None,
             temperature: Optional[float] = None,
-            max_tokens: Optional[int] = None) -> Dict[str, Any]:
+            max_tokens: Optional[int] = None,
+            on_token: Optional[TokenCallback] = None,
+            cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
 
     base = (base_url or _env("LLM_BASE_URL")).rstrip("/")
     model = model_name or _env("LLM_MODEL")
@@ -713,17 +834,33 @@ def run_llm(prompt: str,
             return None
         return None if raw_i <= 0 else raw_i
 
-    # Health check
-    try:
-        r0 = requests.get(f"{base}/v1/models", timeout=(CONNECT_TIMEOUT_S, 15))
-        r0.raise_for_status()
-        ids = [m.get("id") for m in r0.json().get("data", [])]
-        if model not in ids:
-            return {"error": f"Model '{model}' not in /v1/models list.", "endpoint": "models"}
-    except requests.exceptions.RequestException as e:
-        return {"error": f"LLM server not ready: {e}", "endpoint": "models"}
+    # Health check (cached for LLM_HEALTH_TTL_S)
+    health = model_status(base)
+    if not health["ok"]:
+        return {"error": f"LLM server not ready: {health['error']}", "endpoint": "models"}
+    if model not in health["models"]:
+        return {"error": f"Model '{model}' not in /v1/models list.", "endpoint": "models"}
 
     stops = ["<END>"]
+    session = http_session()
+    attempt = 0
+
+    def _post(url: str, payload: Dict[str, Any], pick_delta, pick_full) -> str:
+        nonlocal attempt
+        if cancel is not None and cancel.is_set():
+            raise ReviewCancelled()
+        attempt += 1
+        n = attempt
+        if not STREAM:
+            r = session.post(url, json=payload, timeout=(CONNECT_TIMEOUT_S, REQUEST_TIMEOUT_S))
+            r.raise_for_status()
+            return pick_full(r.json())
+        emit = (lambda chunk: on_token(n, chunk)) if on_token is not None else None
+        # Leaving the block before the body ends drops the connection, which also stops generation
+        with session.post(url, json={**payload, "stream": True}, stream=True,
+                          timeout=(CONNECT_TIMEOUT_S, REQUEST_TIMEOUT_S)) as r:
+            r.raise_for_status()
+            return _read_stream(r, pick_delta, emit, cancel)
 
     def _chat_call(use_stop: bool = True, mt: Optional[int] = _effective_max_tokens()) -> Dict[str, Any]:
         url = f"{base}/v1/chat/completions"
@@ -735,10 +872,9 @@ def run_llm(prompt: str,
         }
         if use_stop: payload["stop"] = stops
         if mt is not None and mt > 0: payload["max_tokens"] = mt
-        r = requests.post(url, json=payload, timeout=(CONNECT_TIMEOUT_S, REQUEST_TIMEOUT_S))
-        r.raise_for_status()
-        data = r.json()
-        text = data["choices"][0]["message"]["content"].strip()
+        text = _post(url, payload,
+                     lambda d: d["choices"][0].get("delta", {}).get("content"),
+                     lambda d: d["choices"][0]["message"]["content"]).strip()
         if use_stop and text.endswith("<END>"): text = text[:-5].rstrip()
         return {"model": model, "output": text, "endpoint": "chat"}
 
@@ -752,10 +888,9 @@ def run_llm(prompt: str,
         }
         if use_stop: payload["stop"] = stops
         if mt is not None and mt > 0: payload["max_tokens"] = mt
-        r = requests.post(url, json=payload, timeout=(CONNECT_TIMEOUT_S, REQUEST_TIMEOUT_S))
-        r.raise_for_status()
-        data = r.json()
-        text = (data["choices"][0].get("text") or "").strip()
+        text = _post(url, payload,
+                     lambda d: d["choices"][0].get("text"),
+                     lambda d: d["choices"][0].get("text") or "").strip()
         if use_stop and text.endswith("<END>"): text = text[:-5].rstrip()
         return {"model": model, "output": text, "endpoint": "completions"}
 
@@ -766,6 +901,9 @@ def run_llm(prompt: str,
         res = _chat_call(True) if order[0] == "chat" else _comp_call(True)
         if not _looks_garbage(res["output"]):
             return res
+    except requests.exceptions.ConnectionError:
+        _forget_health(base)  # server went away: the next review re-checks instead of trusting the cache
+        res = None
     except requests.exceptions.RequestException:
         res = None
 
@@ -791,8 +929,17 @@ def run_review(outputs_dir: str = "outputs",
                llm_base_url: Optional[str] = None,
                model: Optional[str] = None,
                temperature: float = 0.2,
-               force: bool = False) -> Dict[str, Any]:
-
+               force: bool = False,
+               bundle=None,
+               on_token: Optional[TokenCallback] = None,
+               cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    bundle: fresh in-memory ResultBundle; its prompt is built from memory and the cache is skipped.
+    on_token: called from this thread with (attempt, chunk) while the answer streams in.
+    cancel: once set, the LLM call stops at its next chunk or attempt and nothing is saved.
+    """
+    if bundle is not None:
+        base = bundle.name
     if not base:
         base = _find_latest_base(outputs_dir)
         if not base:
@@ -801,7 +948,7 @@ def run_review(outputs_dir: str = "outputs",
     paths = _paths_for_base(outputs_dir, base)
 
     # Cached?
-    if not force and not _needs_refresh(paths) and paths.get("review_txt"):
+    if bundle is None and not force and not _needs_refresh(paths) and paths.get("review_txt"):
         return {
             "base": base,
             "model": model or _env("LLM_MODEL"),
@@ -810,7 +957,7 @@ def run_review(outputs_dir: str = "outputs",
             "output": _load_file(paths["review_txt"], is_json=False),
         }
 
-    prompt = build_prompt(base, outputs_dir=outputs_dir)
+    prompt = build_prompt_from_bundle(bundle) if bundle is not None else build_prompt(base, outputs_dir=outputs_dir)
     print("LLM: payload stats →", {
         "prompt_chars": len(prompt),
         "full_text_limit": MAX_FULLTEXT_CHARS,
@@ -819,13 +966,18 @@ def run_review(outputs_dir: str = "outputs",
         "endpoint_pref": ENDPOINT_PREF,
     })
 
-    res = run_llm(
-        prompt,
-        base_url=llm_base_url or _env("LLM_BASE_URL"),
-        model_name=model or _env("LLM_MODEL"),
-        temperature=temperature,
-        max_tokens=None,  # we manage tokens inside run_llm via env
-    )
+    try:
+        res = run_llm(
+            prompt,
+            base_url=llm_base_url or _env("LLM_BASE_URL"),
+            model_name=model or _env("LLM_MODEL"),
+            temperature=temperature,
+            max_tokens=None,  # we manage tokens inside run_llm via env
+            on_token=on_token,
+            cancel=cancel,
+        )
+    except ReviewCancelled:
+        return {"base": base, "error": "Review cancelled."}
     review_text = res.get("output") or f"(LLM review unavailable: {res.get('error')})"
 
     out_path = os.path.join(outputs_dir, f"{base}_llm_review.txt")
@@ -843,3 +995,19 @@ def run_review(outputs_dir: str = "outputs",
         "review_txt": f"/outputs/{os.path.basename(out_path)}",
         "output": review_text.strip(),
     }
+
+async def run_review_async(*args, on_token: Optional[TokenCallback] = None, **kwargs) -> Dict[str, Any]:
+    """
+    run_review on a worker thread; on_token callbacks are delivered on the calling event loop.
+    Cancelling the awaiting task also stops the thread at its next chunk, closing the LLM stream.
+    """
+    cb = None
+    if on_token is not None:
+        loop = asyncio.get_running_loop()
+        cb = lambda attempt, chunk: loop.call_soon_threadsafe(on_token, attempt, chunk)
+    cancel = threading.Event()
+    try:
+        return await asyncio.to_thread(run_review, *args, on_token=cb, cancel=cancel, **kwargs)
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
@@ -6,10 +6,11 @@ import json
 from pathlib import Path
 from core.extractor import SmartTableExtractor
 from core.config import load_config
+from core.pdf_pages import is_pdf
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Smart OCR Pipeline for Construction Documents")
-    parser.add_argument('--image', required=True, help="Path to input image")
+    parser.add_argument('--image', required=True, help="Path to input image or multi-page PDF")
     parser.add_argument('--model', required=True, help="Path to YOLOv8 model")
     parser.add_argument('--output', required=True, help="Directory to save outputs")
     parser.add_argument('--translate_headers', action='store_true', help="Translate German headers to canonical English names")
@@ -30,5 +31,8 @@ if __name__ == '__main__':
         debug=args.debug
     )
 
-    result = extractor.process(args.image)
+    if is_pdf(args.image):
+        result = extractor.process_pdf(args.image)
+    else:
+        result = extractor.process(args.image)
     print(json.dumps(result, indent=2))
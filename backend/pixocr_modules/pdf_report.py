@@ -289,14 +289,39 @@ def generate_pdf_report(data: dict, output_path: str):
 import os
 import json
 import re
+import base64
+import threading
 from datetime import datetime
 from collections import defaultdict, Counter
+from functools import lru_cache
 from pathlib import Path
 
-import pdfkit
+import cv2
 import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 
+try:
+    import pdfkit  # wkhtmltopdf backend (one subprocess per report)
+except ImportError:
+    pdfkit = None
+
+try:
+    from weasyprint import HTML as WeasyHTML
+    from weasyprint.text.fonts import FontConfiguration
+except (ImportError, OSError):  # in-process backend; OSError when pango is missing
+    WeasyHTML = None
+
+# "weasyprint" (in-process), "wkhtmltopdf" or "auto" (weasyprint when it is installed)
+PDF_RENDERER = os.getenv("PDF_RENDERER", "auto").strip().lower()
+WKHTMLTOPDF_PATH = os.getenv("WKHTMLTOPDF_PATH", r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe")
+
+# Longest side (px) of images embedded in the report; scans are often 3000+ px
+PAGE_IMAGE_MAX_PX = int(os.getenv("PDF_PAGE_IMAGE_MAX_PX", "1600"))
+CROP_IMAGE_MAX_PX = int(os.getenv("PDF_CROP_IMAGE_MAX_PX", "900"))
+IMAGE_JPEG_QUALITY = int(os.getenv("PDF_IMAGE_JPEG_QUALITY", "80"))
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
 # ----------------------------
 # Path + URL helpers (tolerant)
 # ----------------------------
@@ -320,11 +345,22 @@ def _outputs_path(url_or_path) -> str:
     return os.path.abspath(s)
 
 
-def _as_file_url(path: str) -> str:
-    """Convert absolute path to file:// URL for wkhtmltopdf."""
-    if not path:
+def _image_data_uri(image=None, path: str = "", max_px: int = PAGE_IMAGE_MAX_PX) -> str:
+    """Downscaled JPEG data: URI from an in-memory BGR array or an image file ("" if neither is usable)."""
+    if image is None:
+        if not path or not os.path.exists(path):
+            return ""
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            return ""
+    h, w = image.shape[:2]
+    scale = max_px / max(h, w, 1)
+    if scale < 1:
+        image = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, IMAGE_JPEG_QUALITY])
+    if not ok:
         return ""
-    return f"file:///{path.replace(os.sep, '/')}"
+    return "data:image/jpeg;base64," + base64.b64encode(buf.tobytes()).decode("ascii")
 
 
 # ----------------------------
@@ -391,8 +427,11 @@ def _load_tables(csv_urls: list) -> list:
     return out
 
 
-def _map_table_images(data: dict) -> dict:
-    """Return {table_index: file:// URL} for crop previews."""
+def _map_table_images(data: dict, bundle=None) -> dict:
+    """Return {table_index: downscaled data: URI} for crop previews."""
+    if bundle is not None:
+        return {t.index: _image_data_uri(t.crop, max_px=CROP_IMAGE_MAX_PX) for t in bundle.reported_tables}
+
     img_map = {}
 
     # Structured list (if present)
@@ -401,15 +440,15 @@ def _map_table_images(data: dict) -> dict:
         img_ref = t.get("image")
         if idx is None or not img_ref:
             continue
-        p = _outputs_path(img_ref)
-        if p and os.path.exists(p):
-            img_map[int(idx)] = _as_file_url(os.path.abspath(p))
+        uri = _image_data_uri(path=_outputs_path(img_ref), max_px=CROP_IMAGE_MAX_PX)
+        if uri:
+            img_map[int(idx)] = uri
 
     # Fallback: single first crop
     if not img_map and data.get("table_crop_image"):
-        p = _outputs_path(data["table_crop_image"])
-        if p and os.path.exists(p):
-            img_map[0] = _as_file_url(os.path.abspath(p))
+        uri = _image_data_uri(path=_outputs_path(data["table_crop_image"]), max_px=CROP_IMAGE_MAX_PX)
+        if uri:
+            img_map[0] = uri
 
     return img_map
 
@@ -561,32 +600,97 @@ def _build_validation_summary_html(warnings: list, table_img_map: dict) -> str:
     return "".join(html)
 
 
+# ----------------------------
+# Template + renderers (created once per process)
+# ----------------------------
+
+@lru_cache(maxsize=None)
+def _report_template():
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), auto_reload=False)
+    return env.get_template("report_template.html")
+
+
+class _WeasyRenderer:
+    """Warm in-process renderer: fonts are discovered once and reused by every report."""
+
+    def __init__(self):
+        self.font_config = FontConfiguration()
+        self._lock = threading.Lock()  # WeasyPrint isn't documented as thread-safe
+
+    def render(self, html: str, output_path: str | None = None):
+        with self._lock:
+            return WeasyHTML(string=html, base_url=TEMPLATE_DIR).write_pdf(output_path, font_config=self.font_config)
+
+
+@lru_cache(maxsize=1)
+def _weasy_renderer() -> _WeasyRenderer:
+    return _WeasyRenderer()
+
+
+def renderer_name() -> str:
+    if PDF_RENDERER == "auto":
+        return "weasyprint" if WeasyHTML is not None else "wkhtmltopdf"
+    return PDF_RENDERER
+
+
+def warm_up() -> str:
+    """Compile the template and, for the in-process backend, load fonts before the first report."""
+    _report_template()
+    name = renderer_name()
+    if name == "weasyprint" and WeasyHTML is not None:
+        _weasy_renderer().render("<p>warm-up</p>")
+    return name
+
+
+def _render_pdf(html_out: str, output_path: str) -> None:
+    name = renderer_name()
+    if name == "weasyprint":
+        if WeasyHTML is None:
+            raise RuntimeError("PDF_RENDERER=weasyprint requires WeasyPrint (pip install weasyprint)")
+        _weasy_renderer().render(html_out, output_path)
+        return
+    if name != "wkhtmltopdf":
+        raise ValueError(f"Unknown PDF_RENDERER '{name}' (use weasyprint, wkhtmltopdf or auto)")
+    if pdfkit is None:
+        raise RuntimeError("PDF_RENDERER=wkhtmltopdf requires pdfkit and wkhtmltopdf")
+    config = pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
+    options = {
+        "enable-local-file-access": None,
+        "encoding": "UTF-8",
+    }
+    pdfkit.from_string(html_out, output_path, configuration=config, options=options)
+
+
 # ----------------------------
 # Main report entry point
 # ----------------------------
 
  
  
-def generate_pdf_report(data: dict, output_path: str):
-    # Jinja environment
-    template_dir = os.path.join(os.path.dirname(__file__), "templates")
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template("report_template.html")
+def generate_pdf_report(data: dict, output_path: str, bundle=None):
+    """bundle: in-memory core.bundle.ResultBundle of the same page; header, OCR text and tables come from it."""
+    template = _report_template()
 
-    # Original page image (optional)
+    # Original page image (optional), embedded downscaled instead of the full-resolution scan
     image_url = ""
-    if data.get("original_image"):
-        p = _outputs_path(data["original_image"])
-        if p and os.path.exists(p):
-            image_url = _as_file_url(os.path.abspath(p))
-
-    # Header / Full OCR text
-    header_info = _load_header_json(data.get("header_json"))
-    full_text = _load_full_text(data.get("full_text_json"))
+    if bundle is not None:
+        image_url = _image_data_uri(bundle.page_image)
+    elif data.get("original_image"):
+        image_url = _image_data_uri(path=_outputs_path(data["original_image"]))
+
+    # Header / Full OCR text / Tables
+    if bundle is not None:
+        header_info = bundle.header
+        full_text = (json.dumps(bundle.full_text_blocks, indent=2, ensure_ascii=False)
+                     if bundle.full_text_blocks is not None else "No OCR text available.")
+        tables = bundle.report_tables()
+    else:
+        header_info = _load_header_json(data.get("header_json"))
+        full_text = _load_full_text(data.get("full_text_json"))
+        tables = _load_tables(data.get("table_csvs"))
 
-    # Tables (CSV) and images map
-    tables = _load_tables(data.get("table_csvs"))
-    table_img_map = _map_table_images(data)
+    # Table images map
+    table_img_map = _map_table_images(data, bundle)
 
     # Warnings + validation summary
     warnings = data.get("warnings", [])
@@ -609,13 +713,4 @@ def generate_pdf_report(data: dict, output_path: str):
         validation_summary_html=validation_summary_html,  # <<< NEW
     )
 
-    # Generate PDF (configure wkhtmltopdf path if needed)
-    config = pdfkit.configuration(
-    wkhtmltopdf=r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
-)# add path to wkhtmltopdf here if required
-    options = {
-        "enable-local-file-access": None,
-        "encoding": "UTF-8",
-        # keep any other options you were using (dpi, image-quality, quiet, etc.)
-    }
-    pdfkit.from_string(html_out, output_path, configuration=config, options=options)
+    _render_pdf(html_out, output_path)
@@ -0,0 +1,54 @@
+# Cancelling a streamed review must reach the worker thread and stop reading the LLM stream.
+import asyncio
+import threading
+
+import pytest
+
+import llm_review
+
+
+class FakeStream:
+    def __init__(self, lines, cancel, cancel_after):
+        self.lines, self.cancel, self.cancel_after = lines, cancel, cancel_after
+        self.read = 0
+
+    def iter_lines(self):
+        for line in self.lines:
+            if self.read == self.cancel_after:
+                self.cancel.set()
+            self.read += 1
+            yield line
+
+
+def test_read_stream_stops_when_cancelled():
+    cancel = threading.Event()
+    lines = [b'data: {"t": "chunk %d "}' % i for i in range(10)]
+    stream = FakeStream(lines, cancel, cancel_after=3)
+    chunks = []
+    with pytest.raises(llm_review.ReviewCancelled):
+        llm_review._read_stream(stream, lambda d: d["t"], chunks.append, cancel)
+    assert stream.read == 4
+    assert "chunk 3" not in "".join(chunks)
+
+
+def test_cancelling_the_task_sets_the_thread_event(monkeypatch):
+    seen = {}
+    started = threading.Event()
+
+    def fake_run_review(*args, on_token=None, cancel=None, **kwargs):
+        seen["cancel"] = cancel
+        started.set()
+        assert cancel.wait(5)
+        return {"error": "Review cancelled."}
+
+    monkeypatch.setattr(llm_review, "run_review", fake_run_review)
+
+    async def main():
+        task = asyncio.create_task(llm_review.run_review_async(base="x"))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert seen["cancel"].is_set()
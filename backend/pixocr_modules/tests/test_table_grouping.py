@@ -0,0 +1,96 @@
+# Regression tests: vectorized row/column grouping must match the former iterrows implementation
+# on the OCR token dumps saved in backend/outputs.
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.grid_utils import group_rows, split_on_gaps, header_bins_from_tokens, snap_to_bins
+
+FIXTURES = sorted((Path(__file__).resolve().parents[2] / "outputs").glob("*_full_text.json"))
+
+
+def load_tokens(path: Path) -> pd.DataFrame:
+    with open(path, encoding="utf-8") as f:
+        d = pd.DataFrame(json.load(f))
+    return d.sort_values(["top", "left"]).reset_index(drop=True)
+
+
+def legacy_rows(d: pd.DataFrame, row_tol: int):
+    rows, cur, cur_top = [], [], int(d.iloc[0]["top"])
+    for _, tok in d.iterrows():
+        ttop = int(tok["top"])
+        if abs(ttop - cur_top) <= row_tol:
+            cur.append(tok)
+        else:
+            if cur: rows.append(cur)
+            cur, cur_top = [tok], ttop
+    if cur: rows.append(cur)
+    return rows
+
+
+def legacy_clusters(num_df: pd.DataFrame, gap: float):
+    groups, g = [], [num_df.iloc[0]]
+    for _, r in num_df.iloc[1:].iterrows():
+        if (r["xc"] - g[-1]["xc"]) <= gap:
+            g.append(r)
+        else:
+            groups.append(pd.DataFrame(g))
+            g = [r]
+    if g: groups.append(pd.DataFrame(g))
+    return groups
+
+
+def legacy_header_bins(header_df: pd.DataFrame, col_tolerance: int):
+    bins, last_right = [], None
+    for _, r in header_df.sort_values("left").iterrows():
+        left, right = int(r["left"]), int(r["left"] + r["width"])
+        if last_right is not None and left - last_right < col_tolerance:
+            bins[-1][0] = min(bins[-1][0], left)
+            bins[-1][1] = max(bins[-1][1], right)
+        else:
+            bins.append([left, right])
+        last_right = right
+    return [(b[0], b[1]) for b in bins]
+
+
+def test_fixtures_present():
+    assert FIXTURES, "expected OCR dumps in backend/outputs"
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.name[:40])
+@pytest.mark.parametrize("row_tol", [6, 15, 30])
+def test_group_rows_matches_legacy(path, row_tol):
+    d = load_tokens(path)
+    expected = [[int(t.name) for t in row] for row in legacy_rows(d, row_tol)]
+    assert [row.index.tolist() for row in group_rows(d, row_tol)] == expected
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.name[:40])
+def test_column_clusters_match_legacy(path):
+    d = load_tokens(path)
+    num_df = d[d["text"].astype(str).str.fullmatch(r"\d+(?:[.,]\d+)?")].copy()
+    if num_df.empty:
+        pytest.skip("no numeric tokens")
+    num_df["xc"] = num_df["left"] + num_df["width"] / 2.0
+    num_df = num_df.sort_values("xc")
+    for gap in (40, 60):
+        expected = [g.index.tolist() for g in legacy_clusters(num_df, gap)]
+        got = [num_df.iloc[a:b].index.tolist() for a, b in split_on_gaps(num_df["xc"].to_numpy(), gap)]
+        assert got == expected
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.name[:40])
+def test_header_bins_and_snapping_match_legacy(path):
+    d = load_tokens(path)
+    header = pd.concat(group_rows(d, 15)[:2], ignore_index=True)[["left", "width"]]
+    for tol in (10, 120, 200):
+        bins = header_bins_from_tokens(header, col_tolerance=tol)
+        assert bins == legacy_header_bins(header, tol)
+
+        centers = d["left"] + d["width"] / 2.0
+        bin_centers = [(b[0] + b[1]) / 2.0 for b in bins]
+        expected = [int(np.argmin([abs(float(c) - float(bc)) for bc in bin_centers])) for c in centers]
+        assert snap_to_bins(d[["left", "width"]], bins) == expected
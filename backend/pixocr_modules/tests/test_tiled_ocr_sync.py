@@ -0,0 +1,17 @@
+# core/tiled_ocr.py is duplicated in the OCR service (the two apps share no import root):
+# the code below the header comments must stay identical.
+from pathlib import Path
+
+MODULE_DIR = Path(__file__).resolve().parents[1]
+OCR_COPY = MODULE_DIR.parent / "ocr_modules" / "app" / "utils" / "tiled_ocr.py"
+
+
+def _code(path: Path) -> list:
+    lines = path.read_text(encoding="utf-8").splitlines()
+    while lines and lines[0].startswith("#"):
+        lines.pop(0)
+    return lines
+
+
+def test_ocr_service_copy_matches():
+    assert _code(OCR_COPY) == _code(MODULE_DIR / "core" / "tiled_ocr.py")
@@ -0,0 +1,156 @@
+# Regression tests: the column-wise validation engine must emit exactly the warnings
+# of the former iterrows implementation (kept below as the reference).
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import validation as V
+
+MODULE_DIR = Path(__file__).resolve().parents[1]
+
+
+def legacy_row_checks(row, idx, table_i, cfg):
+    ws = []
+    allowed = set(V._read_cfg_path(cfg, ["validation", "allowed_diameters_mm"], [6, 8, 10, 12, 14, 16, 20, 25, 28, 32, 40]))
+    len_pct = float(V._read_cfg_path(cfg, ["validation", "length_tolerance_pct"], 3.0))
+    len_abs = float(V._read_cfg_path(cfg, ["validation", "length_tolerance_abs_m"], 0.10))
+    wt_pct = float(V._read_cfg_path(cfg, ["validation", "weight_tolerance_pct"], 5.0))
+    wt_abs = float(V._read_cfg_path(cfg, ["validation", "weight_tolerance_abs_kg"], 0.20))
+
+    pos = V._to_int(row.get("position"))
+    qty = V._to_int(row.get("quantity"))
+    dia = V._to_int(row.get("diameter_mm"))
+    L1 = V._to_float(row.get("unit_length_m"))
+    LT = V._to_float(row.get("total_length_m"))
+    Wkg = V._to_float(row.get("weight_kg"))
+
+    for field, val in (("position", pos), ("quantity", qty), ("diameter_mm", dia),
+                       ("unit_length_m", L1), ("total_length_m", LT), ("weight_kg", Wkg)):
+        if val is None:
+            ws.append({"table": table_i, "row": idx + 1, "field": field, "message": "Missing or invalid value"})
+    if qty is not None and qty <= 0:
+        ws.append({"table": table_i, "row": idx + 1, "field": "quantity", "message": "Quantity must be > 0"})
+    if dia is not None and dia not in allowed:
+        ws.append({"table": table_i, "row": idx + 1, "field": "diameter_mm", "message": f"Unexpected Ø value {dia} mm"})
+    if None not in (qty, L1, LT):
+        expected = qty * L1
+        tol = max(expected * (len_pct / 100.0), len_abs)
+        if abs(LT - expected) > tol:
+            ws.append({"table": table_i, "row": idx + 1, "field": "total_length_m",
+                       "message": f"Gesamtlänge mismatch: {LT} vs qty×Einzellänge {expected:.2f} (±{tol:.2f})"})
+    if None not in (dia, LT, Wkg):
+        kgm = V._kg_per_m(dia)
+        if kgm is not None:
+            expected = kgm * LT
+            tol = max(expected * (wt_pct / 100.0), wt_abs)
+            if abs(Wkg - expected) > tol:
+                ws.append({"table": table_i, "row": idx + 1, "field": "weight_kg",
+                           "message": f"Gewicht mismatch: {Wkg} vs expected {expected:.2f} (±{tol:.2f})"})
+    return ws
+
+
+def legacy_validate(frames, header, cfg, ocr_text):
+    warnings = list(V._header_checks(header or {}, cfg))
+    validator = V._schema_validator()
+    totals = V._extract_totals_from_ocr(ocr_text or "") if ocr_text else {}
+    sum_qty, sum_len, sum_wgt = 0, 0.0, 0.0
+    for i, df in enumerate(frames):
+        if df.empty:
+            warnings.append({"table": i, "message": "Empty table CSV"})
+            continue
+        df = V._to_canonical(df)
+        for c in ("position", "quantity", "diameter_mm", "unit_length_m", "total_length_m", "weight_kg"):
+            if c in df.columns:
+                df[c] = df[c].astype(str).fillna("")
+        if validator is not None:
+            temp = df.copy()
+            for col, fn in (("position", V._to_int), ("quantity", V._to_int), ("diameter_mm", V._to_float),
+                            ("unit_length_m", V._to_float), ("total_length_m", V._to_float), ("weight_kg", V._to_float)):
+                if col in temp:
+                    temp[col] = temp[col].map(fn)
+            for r_i, r in temp.iterrows():
+                for err in validator.iter_errors(r.to_dict()):
+                    warnings.append({"table": i, "row": r_i + 1,
+                                     "field": list(err.path)[0] if err.path else None, "message": err.message})
+        for r_i, r in df.iterrows():
+            warnings.extend(legacy_row_checks(r.to_dict(), r_i, i, cfg))
+            q = V._to_int(r.get("quantity")); sum_qty += q or 0
+            L = V._to_float(r.get("total_length_m")); sum_len += L or 0.0
+            w = V._to_float(r.get("weight_kg")); sum_wgt += w or 0.0
+        warnings.extend(V._table_checks(df, i))
+    if totals:
+        if totals.get("total_quantity") is not None and sum_qty:
+            if abs(sum_qty - totals["total_quantity"]) > max(1, 0.01 * sum_qty):
+                warnings.append({"message": f"Anzahl mismatch: table Σ={sum_qty} vs OCR {totals['total_quantity']}"})
+        if totals.get("total_length_m") is not None and sum_len:
+            tol = max(0.03 * sum_len, 0.10)
+            if abs(sum_len - totals["total_length_m"]) > tol:
+                warnings.append({"message": f"Summe Länge mismatch: table Σ={sum_len:.2f} m vs OCR {totals['total_length_m']:.2f} m (±{tol:.2f})"})
+        if totals.get("total_weight_kg") is not None and sum_wgt:
+            tol = max(0.05 * sum_wgt, 0.2)
+            if abs(sum_wgt - totals["total_weight_kg"]) > tol:
+                warnings.append({"message": f"Gesamtgewicht mismatch: table Σ={sum_wgt:.2f} kg vs OCR {totals['total_weight_kg']:.2f} kg (±{tol:.2f})"})
+    return warnings
+
+
+CELLS = {
+    "position": ["1", "2", "3", "03", "+4", "1_0", "0", "-2", "2,5", "", "x", " 7 "],
+    "quantity": ["1", "2", "10", "0", "-1", "3,0", "2.4", "", "zwei", "1 2"],
+    "diameter_mm": ["8", "10", "12", "14", "9", "12,0", "11.5", "", "Ø12", "40"],
+    "unit_length_m": ["1,25", "2.5", "0,8", "3", "", "1.2.3", "-1", "4,75"],
+    "total_length_m": ["2,5", "5", "1,6", "30", "", "abc", "9,5", "0"],
+    "weight_kg": ["0,99", "3,08", "1,6", "18,5", "", "n/a", "0", "7,38"],
+}
+
+
+def random_frame(rng: np.random.Generator, n: int, columns) -> pd.DataFrame:
+    data = {c: rng.choice(CELLS[c], size=n).tolist() for c in columns}
+    return pd.DataFrame(data)
+
+
+def consistent_frame(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    qty = rng.integers(1, 20, n)
+    dia = rng.choice([8, 10, 12, 16, 20], n)
+    L1 = rng.integers(50, 900, n) / 100
+    LT = qty * L1
+    W = dia * dia / 162.0 * LT
+    fmt = lambda a: [f"{v:.2f}".replace(".", ",") for v in a]
+    return pd.DataFrame({"position": [str(i + 1) for i in range(n)], "quantity": qty.astype(str),
+                         "diameter_mm": dia.astype(str), "unit_length_m": fmt(L1),
+                         "total_length_m": fmt(LT), "weight_kg": fmt(W)})
+
+
+@pytest.fixture(params=["no_schema", "schema"])
+def schema_mode(request, monkeypatch, tmp_path):
+    # _schema_validator looks for table_schema.json in the working directory
+    monkeypatch.chdir(MODULE_DIR if request.param == "schema" else tmp_path)
+    if request.param == "schema" and V._schema_validator() is None:
+        pytest.skip("jsonschema not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_matches_legacy_on_noisy_tables(seed, schema_mode):
+    rng = np.random.default_rng(seed)
+    all_cols = list(CELLS)
+    frames = [
+        random_frame(rng, 40, all_cols),
+        random_frame(rng, 25, rng.choice(all_cols, size=4, replace=False).tolist()),  # missing columns
+        pd.DataFrame(),
+        consistent_frame(rng, 30),
+    ]
+    frames[3].index = frames[3].index * 2  # non-contiguous row labels
+    header = {"PROJECT": "Neubau", "DATE": "31.02."}
+    ocr = "Summe 100,5 m  Gesamtgewicht 12,3 kg  Anzahl der Ausführungen 7"
+    cfg = {"validation": {"allowed_diameters_mm": [8, 10, 12, 14, 16, 20, 40]}}
+
+    expected = legacy_validate([f.copy() for f in frames], header, cfg, ocr)
+    assert V.validate_tables([f.copy() for f in frames], header, cfg, ocr) == expected
+
+
+def test_display_headers_are_mapped(schema_mode):
+    df = pd.DataFrame({"Position": ["1", "1"], "Stück": ["2", "0"], "Ø [mm]": ["12", "13"],
+                       "Einzellänge [m]": ["1,5", "2"], "Gesamtlänge [m]": ["3,0", "9"], "Gewicht [kg]": ["2,67", "1"]})
+    assert V.validate_tables([df.copy()], {}, None) == legacy_validate([df.copy()], {}, None, None)
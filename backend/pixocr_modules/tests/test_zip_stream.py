@@ -0,0 +1,67 @@
+# Per-upload ZIP bundles: only that upload's artifacts, a valid streamed archive, cached once complete.
+import io
+import os
+import zipfile
+
+from core.zip_stream import ZipBundleCache, iter_zip, upload_artifacts
+
+BASE = "0a1b2c_plan"
+
+
+def make_outputs(tmp_path):
+    out = tmp_path / "outputs"
+    out.mkdir()
+    files = {
+        f"{BASE}.png": os.urandom(200_000),
+        f"{BASE}_table_0.csv": "Pos;Stück\n1;2\n".encode() * 5000,
+        f"{BASE}_page1_header.json": b'{"PROJECT": "Neubau"}',
+        f"{BASE}_report.pdf": b"%PDF-1.4 fake",
+        f"{BASE}x_table_0.csv": b"other upload",   # shares the prefix, not the base
+        "ffff_other_table_0.csv": b"other upload",
+        f"{BASE}_notes.tmp": b"not an artifact",
+    }
+    for name, data in files.items():
+        (out / name).write_bytes(data)
+    return out, files
+
+
+def test_selects_only_the_upload(tmp_path):
+    out, _ = make_outputs(tmp_path)
+    names = [p.name for p in upload_artifacts(out, BASE)]
+    assert names == sorted([f"{BASE}.png", f"{BASE}_page1_header.json", f"{BASE}_report.pdf", f"{BASE}_table_0.csv"])
+
+
+def test_streamed_archive_round_trips(tmp_path):
+    out, files = make_outputs(tmp_path)
+    chunks = list(iter_zip(upload_artifacts(out, BASE)))
+    assert len(chunks) > 1
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.testzip() is None
+        for info in zf.infolist():
+            assert zf.read(info) == files[info.filename]
+        assert zf.getinfo(f"{BASE}.png").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo(f"{BASE}_table_0.csv").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_cache_keeps_complete_bundles_only(tmp_path):
+    out, _ = make_outputs(tmp_path)
+    cache = ZipBundleCache(tmp_path / "zip_cache")
+    files = upload_artifacts(out, BASE)
+
+    path, cached = cache.lookup(BASE, files)
+    assert not cached
+    stream = cache.build(BASE, files, path)
+    next(stream)
+    stream.close()                       # client went away mid-download
+    assert list(cache.cache_dir.iterdir()) == []
+
+    body = b"".join(cache.build(BASE, files, path))
+    assert cache.lookup(BASE, files) == (path, True)
+    assert path.read_bytes() == body
+
+    # a rewritten artifact gives a new bundle and drops the old one
+    (out / f"{BASE}_table_0.csv").write_bytes(b"Pos\n1\n")
+    new_path, cached = cache.lookup(BASE, files)
+    assert new_path != path and not cached
+    b"".join(cache.build(BASE, files, new_path))
+    assert list(cache.cache_dir.iterdir()) == [new_path]
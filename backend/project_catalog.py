@@ -0,0 +1,394 @@
+"""
+Catalogue des projets et fichiers BIM
+Index en mémoire des fichiers IFC/XKT (uploads, projets XeoKit standardisés et ancienne
+structure) et des projets du viewer, construit au démarrage puis tenu à jour par les
+notifications du système de fichiers (watchdog) ou, à défaut, par un sondage périodique
+des mtimes : /list-files, /scan-projects et /xeokit-projects servent des listes prêtes
+au lieu de reparcourir les dossiers à chaque requête
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ["*.ifc", "*.xkt"]
+MODEL_SUFFIXES = (".ifc", ".xkt")
+PROJECT_INDEX_NAME = "index.json"
+
+# Sections du catalogue, reconstruites indépendamment quand elles sont invalidées
+UPLOADS, PROJECTS, LEGACY, VIEWER, INDEX = "uploads", "projects", "legacy", "viewer", "index"
+SECTIONS = (UPLOADS, PROJECTS, LEGACY, VIEWER, INDEX)
+
+
+def _model_entry(file_path: Path, project: Optional[str] = None, source: Optional[str] = None) -> Dict[str, Any]:
+    st = file_path.stat()
+    entry = {"name": file_path.name, "path": str(file_path)}
+    if project is not None:
+        entry["project"] = project
+    entry.update({"type": file_path.suffix.lower(), "size": st.st_size, "modified": st.st_mtime})
+    if source is not None:
+        entry["source"] = source
+    return entry
+
+
+def _model_entries(model_dir: Path, project: Optional[str] = None, source: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Modèles IFC/XKT sous model_dir ; un fichier supprimé ou illisible pendant le parcours est ignoré"""
+    entries = []
+    for ext in SUPPORTED_EXTENSIONS:
+        for file_path in model_dir.rglob(ext):
+            try:
+                entries.append(_model_entry(file_path, project, source))
+            except OSError:
+                continue
+    return entries
+
+
+def scan_uploads(uploads_dir: Path) -> List[Dict[str, Any]]:
+    """Fichiers IFC/XKT du dossier uploads"""
+    return _model_entries(uploads_dir) if uploads_dir.exists() else []
+
+
+def scan_standard_projects(projects_dir: Path) -> List[Dict[str, Any]]:
+    """Modèles de la structure standardisée : projects/<projet>/models/model/"""
+    files = []
+    if not projects_dir.exists():
+        return files
+    for project_dir in projects_dir.iterdir():
+        if project_dir.is_dir():
+            model_dir = project_dir / "models" / "model"
+            if model_dir.exists():
+                files.extend(_model_entries(model_dir, project_dir.name, "xeokit_standardized"))
+    return files
+
+
+def scan_legacy_projects(projects_dir: Path) -> List[Dict[str, Any]]:
+    """Modèles de l'ancienne structure (models/model/design/ puis models/)"""
+    files = []
+    if not projects_dir.exists():
+        return files
+    for project_dir in projects_dir.iterdir():
+        if project_dir.is_dir():
+            for models_subdir in ["models/model/design", "models"]:
+                design_dir = project_dir / models_subdir
+                if design_dir.exists():
+                    files.extend(_model_entries(design_dir, project_dir.name, "xeokit_legacy"))
+    return files
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _tree_signature(root: str, relevant: Callable[[str], bool]) -> Tuple:
+    """Empreinte d'un arbre : chemins et stats de ses fichiers pertinents (les autres ne comptent pas)"""
+    if not os.path.isdir(root):
+        return ()
+    sig = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if relevant(name):
+                path = os.path.join(dirpath, name)
+                sig.append((path, _file_stamp(path)))
+    return tuple(sig)
+
+
+def _is_model(name: str) -> bool:
+    return name.lower().endswith(MODEL_SUFFIXES)
+
+
+class _CatalogEventHandler(FileSystemEventHandler):
+    def __init__(self, catalog: "ProjectCatalog"):
+        super().__init__()
+        self.catalog = catalog
+
+    def on_any_event(self, event):
+        # Un dossier "modifié" signale seulement un changement de son contenu, déjà notifié
+        if event.is_directory and event.event_type == "modified":
+            return
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path:
+                self.catalog._on_fs_event(os.fsdecode(path), event.is_directory)
+
+
+class ProjectCatalog:
+    """
+    Listes servies par les endpoints de projets, mises en cache par section.
+    Une section invalidée (événement fichier, changement d'empreinte ou invalidate())
+    est reconstruite à la requête suivante ; les autres sont servies telles quelles.
+    Les listes renvoyées sont partagées : les appelants ne doivent pas les modifier.
+    """
+
+    def __init__(self, uploads_dir: Path, projects_dir: Path, legacy_projects_dir: Path,
+                 viewer_projects_dir: Path, projects_index: Path,
+                 load_projects_index: Callable[[], Dict[str, Any]]):
+        self.paths = {
+            UPLOADS: Path(uploads_dir),
+            PROJECTS: Path(projects_dir),
+            LEGACY: Path(legacy_projects_dir),
+            VIEWER: Path(viewer_projects_dir),
+            INDEX: Path(projects_index),
+        }
+        self._abs = {name: os.path.abspath(path) for name, path in self.paths.items()}
+        self._load_projects_index = load_projects_index
+        self._lock = threading.RLock()
+        self._dirty = set(SECTIONS)
+        self._data: Dict[str, Any] = {}
+        self._versions = {name: 0 for name in SECTIONS}
+        self._derived: Dict[str, Tuple[Tuple, Any]] = {}
+        self._project_files: Dict[str, Tuple[Optional[Tuple[int, int]], Optional[Dict]]] = {}
+        self._signatures: Dict[str, Any] = {}
+        self._observer = None
+        self._watched: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- Invalidation ----
+
+    def invalidate(self, *sections: str):
+        """Force la reconstruction des sections données (toutes par défaut) à la prochaine lecture"""
+        with self._lock:
+            self._dirty.update(sections or SECTIONS)
+
+    def _section_for(self, name: str, path: str, is_directory: bool) -> bool:
+        if name == INDEX:
+            return path == self._abs[INDEX]
+        root = self._abs[name]
+        if path != root and not path.startswith(root + os.sep):
+            return False
+        if name == VIEWER:
+            # Seuls les dossiers de projet et leur index.json décrivent les projets du viewer
+            depth = os.path.relpath(path, root).count(os.sep)
+            return (is_directory and depth == 0) or (depth == 1 and os.path.basename(path) == PROJECT_INDEX_NAME)
+        return is_directory or _is_model(path)
+
+    def _on_fs_event(self, path: str, is_directory: bool):
+        path = os.path.abspath(path)
+        touched = [name for name in SECTIONS if self._section_for(name, path, is_directory)]
+        if touched:
+            self.invalidate(*touched)
+
+    def _compute_signature(self, name: str) -> Any:
+        root = self._abs[name]
+        if name == INDEX:
+            return _file_stamp(root)
+        if name == VIEWER:
+            if not os.path.isdir(root):
+                return None
+            with os.scandir(root) as it:
+                dirs = sorted(e.name for e in it if e.is_dir())
+            return _file_stamp(root), tuple(
+                (d, _file_stamp(os.path.join(root, d, PROJECT_INDEX_NAME))) for d in dirs
+            )
+        return _tree_signature(root, _is_model)
+
+    def poll(self):
+        """Invalide les sections dont l'empreinte a changé depuis le dernier passage"""
+        for name in SECTIONS:
+            sig = self._compute_signature(name)
+            if self._signatures.get(name, sig) != sig:
+                self.invalidate(name)
+            self._signatures[name] = sig
+
+    def _watch_dirs(self) -> List[str]:
+        dirs = [self._abs[name] for name in (UPLOADS, PROJECTS, LEGACY, VIEWER)]
+        dirs.append(os.path.dirname(self._abs[INDEX]))
+        return list(dict.fromkeys(dirs))
+
+    def _sync_watches(self):
+        """Surveille les dossiers apparus depuis le démarrage, oublie ceux qui ont disparu"""
+        for path in self._watch_dirs():
+            exists = os.path.isdir(path)
+            if exists and path not in self._watched:
+                try:
+                    self._watched[path] = self._observer.schedule(_CatalogEventHandler(self), path, recursive=True)
+                except OSError as e:
+                    logger.warning(f"Surveillance impossible de {path}: {e}")
+                    continue
+                self.invalidate()
+            elif not exists and path in self._watched:
+                watch = self._watched.pop(path)
+                try:
+                    self._observer.unschedule(watch)
+                except Exception:
+                    pass
+                self.invalidate()
+
+    # ---- Construction des sections ----
+
+    def _build(self, name: str) -> Any:
+        if name == UPLOADS:
+            return scan_uploads(self.paths[UPLOADS])
+        if name == PROJECTS:
+            return scan_standard_projects(self.paths[PROJECTS])
+        if name == LEGACY:
+            return scan_legacy_projects(self.paths[LEGACY])
+        if name == INDEX:
+            return self._load_projects_index()
+        return self._build_viewer()
+
+    def _build_viewer(self) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """(id, contenu de index.json ou None) par dossier de projet ; les index.json inchangés ne sont pas relus"""
+        root = self.paths[VIEWER]
+        if not root.exists():
+            self._project_files.clear()
+            return []
+        projects = []
+        seen = set()
+        for project_dir in os.listdir(root):
+            project_path = os.path.join(root, project_dir)
+            if not os.path.isdir(project_path) or project_dir == PROJECT_INDEX_NAME:
+                continue
+            seen.add(project_dir)
+            index_file = os.path.join(project_path, PROJECT_INDEX_NAME)
+            stamp = _file_stamp(index_file)
+            cached = self._project_files.get(project_dir)
+            if cached is not None and cached[0] == stamp:
+                data = cached[1]
+            elif stamp is None:
+                data = None
+            else:
+                try:
+                    with open(index_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Erreur lecture projet XeoKit {project_dir}: {e}")
+                    data = None
+            self._project_files[project_dir] = (stamp, data)
+            projects.append((project_dir, data))
+        for gone in set(self._project_files) - seen:
+            del self._project_files[gone]
+        return projects
+
+    def _section(self, name: str) -> Any:
+        with self._lock:
+            if name in self._dirty:
+                self._dirty.discard(name)
+                try:
+                    self._data[name] = self._build(name)
+                except Exception:
+                    self._dirty.add(name)
+                    raise
+                self._versions[name] += 1
+            return self._data[name]
+
+    def _cached(self, key: str, sections: Iterable[str], build: Callable[..., Any]) -> Any:
+        with self._lock:
+            values = [self._section(name) for name in sections]
+            versions = tuple(self._versions[name] for name in sections)
+            hit = self._derived.get(key)
+            if hit is not None and hit[0] == versions:
+                return hit[1]
+            result = build(*values)
+            self._derived[key] = (versions, result)
+            return result
+
+    # ---- Listes servies par les endpoints ----
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        """Fichiers IFC/XKT : uploads, projets standardisés puis ancienne structure"""
+        return self._cached("files", (UPLOADS, PROJECTS, LEGACY), lambda a, b, c: a + b + c)
+
+    def scan_projects(self) -> List[Dict[str, Any]]:
+        """Projets du dossier viewer, enrichis par l'index des projets quand ils y figurent"""
+        def build(viewer, index_data):
+            known_projects = {p["id"]: p for p in index_data.get("projects", [])}
+            all_projects = []
+            for project_id, _ in viewer:
+                if project_id in known_projects:
+                    all_projects.append(known_projects[project_id])
+                else:
+                    # Entree basique pour les projets non references
+                    project_name = re.sub(r'([A-Z])', r' \1', project_id).strip() if project_id else project_id
+                    all_projects.append({"id": project_id, "name": project_name})
+            return all_projects
+        return self._cached("scan", (VIEWER, INDEX), build)
+
+    def xeokit_projects(self) -> List[Dict[str, Any]]:
+        """Projets du viewer décrits par un index.json lisible"""
+        def build(viewer):
+            return [
+                {
+                    "id": project_id,
+                    "name": data.get("name", project_id),
+                    "description": data.get("description", ""),
+                    "models": data.get("models", []),
+                    "viewerConfigs": data.get("viewerConfigs", {}),
+                    "viewerContent": data.get("viewerContent", {}),
+                    "viewerState": data.get("viewerState", {}),
+                }
+                for project_id, data in viewer
+                if data is not None
+            ]
+        return self._cached("xeokit", (VIEWER,), build)
+
+    def viewer_dir_exists(self) -> bool:
+        return self.paths[VIEWER].exists()
+
+    # ---- Cycle de vie ----
+
+    def refresh(self):
+        """Reconstruit toutes les sections (au démarrage, ou pour forcer une relecture)"""
+        self.invalidate()
+        for name in SECTIONS:
+            self._section(name)
+        self.list_files()
+        self.scan_projects()
+        self.xeokit_projects()
+
+    def start(self, poll_interval_s: float = 5.0):
+        """
+        Construit le catalogue puis le tient à jour : watchdog si disponible (le thread ne fait
+        alors que suivre l'apparition des dossiers), sinon sondage des empreintes
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        if WATCHDOG_AVAILABLE:
+            self._observer = Observer()
+            self._observer.daemon = True
+            self._sync_watches()
+            self._observer.start()
+        else:
+            self.poll()
+        self.refresh()
+        logger.info(f"Catalogue projets pret ({'watchdog' if WATCHDOG_AVAILABLE else 'sondage'}): "
+                    f"{len(self.list_files())} fichiers, {len(self.scan_projects())} projets")
+
+        def _loop():
+            while not self._stop.wait(poll_interval_s):
+                try:
+                    if self._observer is not None:
+                        self._sync_watches()
+                    else:
+                        self.poll()
+                except Exception as e:
+                    logger.warning(f"Surveillance du catalogue projets: {e}")
+
+        self._thread = threading.Thread(target=_loop, name="project-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+            self._watched.clear()
@@ -0,0 +1,164 @@
+"""
+Index des projets XeoKit (SQLite)
+Remplace la réécriture complète de index.json à chaque ajout : chaque opération est une
+transaction, la recherche par identifiant passe par la clé primaire, et le fichier
+index.json lu par le viewer est réexporté de façon atomique après chaque modification
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _file_stamp(path: Path) -> Optional[str]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class ProjectsStore:
+    """
+    Projets {id, name, ...} dans l'ordre d'ajout, indexés par id.
+    Au démarrage, un index.json modifié hors du backend (édition manuelle, checkout)
+    est réimporté ; sinon la base fait foi et index.json n'en est que l'export.
+    """
+
+    def __init__(self, db_path: Path, legacy_index_path: Path):
+        self.db_path = Path(db_path)
+        self.legacy_index_path = Path(legacy_index_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._init_db()
+        self._import_legacy_if_changed()
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS projects (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    # ---- Lecture ----
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def exists(self, project_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM projects WHERE id = ?", (project_id,)).fetchone() is not None
+
+    def all_projects(self) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT data FROM projects ORDER BY seq").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def as_index(self) -> Dict[str, Any]:
+        """Contenu au format de l'ancien index.json"""
+        return {"projects": self.all_projects()}
+
+    # ---- Écriture ----
+
+    def add(self, project: Dict[str, Any]) -> bool:
+        """Ajoute un projet ; False (sans rien modifier) si son id est déjà indexé"""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO projects (id, data) VALUES (?, ?)",
+                (project["id"], json.dumps(project, ensure_ascii=False))
+            )
+            added = cur.rowcount == 1
+            if added:
+                self._export(conn)
+        return added
+
+    def remove(self, project_id: str) -> bool:
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount == 1
+            if removed:
+                self._export(conn)
+        return removed
+
+    def replace_all(self, projects: Iterable[Dict[str, Any]]):
+        """Remplace tout l'index (les doublons d'id ne gardent que la première entrée)"""
+        with self._connect() as conn:
+            self._replace(conn, projects)
+            self._export(conn)
+
+    @staticmethod
+    def _replace(conn: sqlite3.Connection, projects: Iterable[Dict[str, Any]]):
+        conn.execute("DELETE FROM projects")
+        conn.executemany(
+            "INSERT OR IGNORE INTO projects (id, data) VALUES (?, ?)",
+            [(p["id"], json.dumps(p, ensure_ascii=False)) for p in projects if isinstance(p, dict) and "id" in p]
+        )
+
+    # ---- index.json du viewer ----
+
+    def _export(self, conn: sqlite3.Connection):
+        """Réécrit index.json (fichier temporaire puis remplacement) et mémorise son empreinte"""
+        rows = conn.execute("SELECT data FROM projects ORDER BY seq").fetchall()
+        data = {"projects": [json.loads(d) for (d,) in rows]}
+        target = self.legacy_index_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".index.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, target)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('legacy_stamp', ?)", (_file_stamp(target),))
+
+    def export_legacy(self):
+        with self._connect() as conn:
+            self._export(conn)
+
+    def _import_legacy_if_changed(self):
+        stamp = _file_stamp(self.legacy_index_path)
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'legacy_stamp'").fetchone()
+            if stamp is None or (row is not None and row[0] == stamp):
+                return
+            try:
+                with open(self.legacy_index_path, 'r', encoding='utf-8') as f:
+                    projects = json.load(f).get("projects", [])
+            except Exception as e:
+                logger.warning(f"index.json illisible, index des projets conserve: {e}")
+                return
+            self._replace(conn, projects)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('legacy_stamp', ?)", (stamp,))
+        logger.info(f"Index des projets importe depuis {self.legacy_index_path} ({len(projects)} projets)")
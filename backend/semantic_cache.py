@@ -0,0 +1,182 @@
+"""
+Cache sémantique des réponses de l'assistant BIM
+Partagé entre toutes les sessions : une question déjà posée (même reformulée)
+sur le même modèle IFC avec le même LLM est servie sans inférence
+"""
+
+import math
+import re
+import threading
+import unicodedata
+import zlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Mots sans valeur discriminante dans les questions (comparés sans accents)
+STOPWORDS = {
+    "a", "au", "aux", "avec", "ce", "ces", "cet", "cette", "combien", "comment",
+    "d", "dans", "de", "des", "du", "donne", "donner", "en", "est", "et", "il",
+    "ils", "l", "la", "le", "les", "moi", "nombre", "on", "ou", "par", "peux",
+    "pour", "quel", "quelle", "quelles", "quels", "qu", "que", "qui", "sont",
+    "sur", "t", "tu", "un", "une", "y", "batiment", "modele", "projet",
+    "compte", "contient", "possede", "fait", "ya", "elle", "ici",
+    "the", "of", "how", "many", "what", "is", "are", "in", "this", "number"
+}
+
+# Mots de négation : une question niée n'est jamais équivalente à sa forme affirmative
+NEGATIONS = {
+    "n", "ne", "pas", "non", "sans", "aucun", "aucune", "jamais", "rien", "ni",
+    "not", "no", "without", "never", "none", "nor", "isn", "aren", "doesn", "don",
+    "cannot", "wasn", "weren", "hasn", "haven"
+}
+
+# Dimension de l'espace de hachage des caractéristiques
+EMBEDDING_DIM = 2 ** 18
+
+
+def normalize_question(question: str) -> List[str]:
+    """Minuscules, sans accents ni ponctuation, sans mots vides, pluriels simples retirés"""
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    tokens = re.findall(r"[a-z0-9]+", text)
+    normalized = []
+    for token in tokens:
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith(("s", "x")) and not token.isdigit() and token not in NEGATIONS:
+            token = token[:-1]
+        normalized.append(token)
+    return normalized
+
+
+def discriminant_tokens(tokens: List[str]) -> Tuple[Tuple[str, ...], bool]:
+    """
+    Nombres (dans l'ordre) et présence d'une négation : deux questions ne sont
+    équivalentes que si ces éléments coïncident exactement, quelle que soit leur
+    similarité ("niveau 1" / "niveau 2", "conforme" / "non conforme")
+    """
+    numbers = tuple(t for t in tokens if t.isdigit())
+    negated = any(t in NEGATIONS for t in tokens)
+    return numbers, negated
+
+
+def embed_question(question: str) -> Dict[int, float]:
+    """
+    Embedding creux et normalisé d'une question (mots + trigrammes de caractères hachés)
+
+    Les mots pèsent plus que les trigrammes afin que des chiffres ou des
+    termes différents séparent des questions proches en surface.
+    """
+    vector: Dict[int, float] = {}
+    for token in normalize_question(question):
+        key = zlib.crc32(f"w:{token}".encode()) % EMBEDDING_DIM
+        vector[key] = vector.get(key, 0.0) + 1.0
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            key = zlib.crc32(f"c:{padded[i:i + 3]}".encode()) % EMBEDDING_DIM
+            vector[key] = vector.get(key, 0.0) + 0.5
+
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if norm == 0:
+        return {}
+    return {k: v / norm for k, v in vector.items()}
+
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Similarité cosinus de deux vecteurs creux déjà normalisés"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class SemanticResponseCache:
+    """Cache LRU borné de réponses, indexé par (empreinte du modèle, embedding de la question)"""
+
+    def __init__(self, max_entries: int = 1000, similarity_threshold: float = 0.9):
+        """
+        Args:
+            max_entries: Nombre maximal de réponses conservées (toutes empreintes confondues)
+            similarity_threshold: Similarité cosinus minimale pour considérer deux questions équivalentes
+                (à nombres et négation identiques)
+        """
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        # (empreinte, question normalisée) -> (embedding, nombres et négation, réponse)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Dict[int, float], Tuple[Tuple[str, ...], bool], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model_key: str, question: str) -> Optional[str]:
+        """Retourne la réponse d'une question équivalente déjà posée sur ce modèle, sinon None"""
+        tokens = normalize_question(question)
+        normalized = " ".join(tokens)
+        discriminants = discriminant_tokens(tokens)
+        embedding = embed_question(question)
+
+        with self._lock:
+            key = (model_key, normalized)
+            best_key, best_score = None, 0.0
+            if key in self._entries:
+                best_key, best_score = key, 1.0
+            elif embedding:
+                for entry_key, (entry_embedding, entry_discriminants, _) in self._entries.items():
+                    if entry_key[0] != model_key or entry_discriminants != discriminants:
+                        continue
+                    score = cosine_similarity(embedding, entry_embedding)
+                    if score > best_score:
+                        best_key, best_score = entry_key, score
+
+            if best_key is None or best_score < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            logger.debug(f"Cache sémantique: succès (similarité {best_score:.2f})")
+            return self._entries[best_key][2]
+
+    def put(self, model_key: str, question: str, answer: str):
+        """Enregistre une réponse, en évinçant les plus anciennes au-delà de max_entries"""
+        tokens = normalize_question(question)
+        normalized = " ".join(tokens)
+        embedding = embed_question(question)
+
+        with self._lock:
+            key = (model_key, normalized)
+            self._entries[key] = (embedding, discriminant_tokens(tokens), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, model_key: Optional[str] = None):
+        """Vide le cache, entièrement ou pour une seule empreinte de modèle"""
+        with self._lock:
+            if model_key is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == model_key]:
+                    del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques d'utilisation du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Instance partagée par tous les assistants du processus
+shared_response_cache = SemanticResponseCache()
@@ -0,0 +1,402 @@
+"""
+Gestionnaire de rétention et de stockage à niveaux
+Applique des politiques d'âge et de quota aux dossiers qui grossissent sans limite
+(rapports générés, sorties PixOCR, données OCR, fichiers temporaires), compresse les
+entrées anciennes (niveau froid) et tient un index JSON des entrées pour que les
+listings n'aient pas à parcourir les dossiers
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, "data", "storage_index.json")
+
+# Suffixes des entrées compressées (dossier → zip, fichier → gzip)
+COLD_DIR_SUFFIX = ".cold.zip"
+COLD_FILE_SUFFIX = ".cold.gz"
+
+# Une entrée modifiée il y a moins de SETTLE_S secondes est peut-être encore en cours d'écriture :
+# elle est relue à chaque listing et aucune politique ne la touche
+SETTLE_S = 120
+
+DAY_S = 86400
+
+# Fichiers IFC temporaires de l'assistant : dossier dédié, pour ne jamais toucher aux fichiers
+# temporaires des autres processus
+ASSISTANT_TEMP_DIR = os.path.join(tempfile.gettempdir(), "bimex_assistant")
+ASSISTANT_TEMP_PREFIX = "bimex_assistant_"
+
+
+@dataclass
+class RetentionPolicy:
+    """Politique d'une zone : chaque entrée de premier niveau de root (fichier ou dossier) est une unité"""
+    name: str
+    root: str
+    include: str = r".+"                          # regex sur le nom de l'entrée
+    max_age_days: Optional[float] = None          # suppression au-delà
+    compress_after_days: Optional[float] = None   # passage au niveau froid
+    quota_mb: Optional[float] = None              # au-delà, suppression des entrées les plus anciennes
+    derived: bool = False                         # régénérable : jamais compressée, seulement supprimée
+    owner_root: Optional[str] = None              # entrée orpheline (supprimée) si owner_root/<clé> n'existe plus
+    owner_key: str = r"(.+)"                      # regex : le groupe 1 du nom donne la clé du propriétaire
+    _include_re: Any = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._include_re = re.compile(self.include)
+
+    def matches(self, name: str) -> bool:
+        return self._include_re.fullmatch(name) is not None
+
+    def owner_missing(self, name: str) -> bool:
+        if not self.owner_root:
+            return False
+        m = re.fullmatch(self.owner_key, name)
+        return bool(m) and not os.path.exists(os.path.join(self.owner_root, m.group(1)))
+
+
+def default_policies() -> List[RetentionPolicy]:
+    """Zones gérées par défaut (chemins relatifs au dossier backend)"""
+    pixocr_upload = r"[0-9a-f]{32}_.+"  # préfixe uuid ajouté par pixocr_modules/app.py
+    ocr_data = os.getenv("OCR_DATA_DIR", os.path.join(BASE_DIR, "ocr_modules", "data"))
+    return [
+        RetentionPolicy("reports", os.path.join(BASE_DIR, "generatedReports"), compress_after_days=30),
+        RetentionPolicy("temp_files", BASE_DIR,
+                        include=r"temp_report_.+\.(pdf|html)|temp_[0-9a-f]{32}\.ifc",
+                        max_age_days=1, derived=True),
+        RetentionPolicy("assistant_temp_ifc", ASSISTANT_TEMP_DIR,
+                        include=re.escape(ASSISTANT_TEMP_PREFIX) + r"\w+\.ifc", max_age_days=2, derived=True),
+        RetentionPolicy("pixocr_outputs", os.path.join(BASE_DIR, "outputs"), include=pixocr_upload,
+                        max_age_days=60, quota_mb=4096),
+        RetentionPolicy("pixocr_uploads", os.path.join(BASE_DIR, "uploads"), include=pixocr_upload,
+                        max_age_days=7, derived=True),  # copie conservée dans outputs/
+        RetentionPolicy("pixocr_zip_cache", os.path.join(BASE_DIR, "zip_cache"), include=r"[^.].*\.zip",
+                        max_age_days=7, quota_mb=1024, derived=True),
+        RetentionPolicy("ocr_uploads", os.path.join(ocr_data, "uploads"), max_age_days=180),
+        RetentionPolicy("ocr_results", os.path.join(ocr_data, "results"), include=r".+(\.json|_pages)",
+                        derived=True, owner_root=os.path.join(ocr_data, "uploads"),
+                        owner_key=r"(.+?)(?:\.json|_pages)"),
+        RetentionPolicy("ocr_exports", os.path.join(ocr_data, "exports"), max_age_days=7, derived=True),
+    ]
+
+
+def load_policies(path: Optional[str] = None) -> List[RetentionPolicy]:
+    """Politiques par défaut, surchargées par zone depuis un fichier JSON ({"zone": {"max_age_days": 10}})"""
+    policies = {p.name: p for p in default_policies()}
+    path = path or os.getenv("STORAGE_POLICIES_FILE")
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for name, values in overrides.items():
+            if name in policies:
+                policies[name] = replace(policies[name], **values)
+            else:
+                logger.warning(f"Zone de stockage inconnue ignoree: {name}")
+    return list(policies.values())
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class StorageManager:
+    """
+    Index des zones + compaction en arrière-plan.
+    Chaque listing relit le dossier racine (un seul scandir) et compare le mtime de chaque entrée :
+    seules les entrées nouvelles, modifiées ou récentes sont décrites à nouveau. Le mtime de la
+    racine ne suffit pas : écrire un fichier dans un sous-dossier ne le change pas.
+    """
+
+    def __init__(self, policies: Iterable[RetentionPolicy], index_path: str = DEFAULT_INDEX_PATH,
+                 protected: Optional[Callable[[], Iterable[str]]] = None):
+        self.policies: Dict[str, RetentionPolicy] = {p.name: p for p in policies}
+        self.index_path = index_path
+        self._protected = protected or (lambda: ())
+        self._lock = threading.RLock()
+        self._index = self._load_index()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_compaction: Optional[Dict[str, Any]] = None
+
+    # ---- index
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == 1:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": 1, "zones": {}}
+
+    def _save_index(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp, self.index_path)
+        self._dirty = False
+
+    def _describe(self, path: str, cold: bool, previous: Optional[Dict] = None) -> Dict[str, Any]:
+        st = os.stat(path)
+        entry = {"mtime": st.st_mtime, "mtime_ns": st.st_mtime_ns, "ctime": st.st_ctime,
+                 "tier": "cold" if cold else "hot", "size": st.st_size}
+        if cold:
+            entry["is_dir"] = path.endswith(COLD_DIR_SUFFIX)
+            if entry["is_dir"]:
+                if previous and previous.get("files") is not None:
+                    entry["files"] = previous["files"]
+                else:
+                    with zipfile.ZipFile(path) as zf:
+                        entry["files"] = [
+                            {"name": i.filename, "size": i.file_size, "ctime": time.mktime(i.date_time + (0, 0, -1))}
+                            for i in zf.infolist() if "/" not in i.filename
+                        ]
+        elif os.path.isdir(path):
+            entry["is_dir"] = True
+            entry["size"] = _tree_size(path)
+            files = []
+            with os.scandir(path) as it:
+                for f in it:
+                    if f.is_file():
+                        fst = f.stat()
+                        files.append({"name": f.name, "size": fst.st_size, "ctime": fst.st_ctime})
+            entry["files"] = files
+        else:
+            entry["is_dir"] = False
+        return entry
+
+    def _scan(self, policy: RetentionPolicy) -> Dict[str, Dict[str, Any]]:
+        zones = self._index["zones"]
+        state = zones.get(policy.name) or {}
+        entries = state.get("entries", {})
+        try:
+            root_mtime = os.stat(policy.root).st_mtime_ns
+        except FileNotFoundError:
+            if entries or policy.name not in zones:
+                zones[policy.name] = {"root": policy.root, "root_mtime_ns": None, "entries": {}}
+                self._dirty = True
+            return {}
+
+        now = time.time()
+        fresh = {}
+        reused = state.get("root") == policy.root
+        with os.scandir(policy.root) as it:
+            for de in it:
+                name, cold = de.name, False
+                for suffix in (COLD_DIR_SUFFIX, COLD_FILE_SUFFIX):
+                    if name.endswith(suffix):
+                        name, cold = name[:-len(suffix)], True
+                        break
+                if name.startswith(".") or not policy.matches(name):
+                    continue
+                try:
+                    st = de.stat()
+                    old = entries.get(name)
+                    if (old and old["mtime_ns"] == st.st_mtime_ns and old["tier"] == ("cold" if cold else "hot")
+                            and now - old["mtime"] >= SETTLE_S):
+                        fresh[name] = old
+                    else:
+                        fresh[name] = self._describe(de.path, cold, old)
+                        reused = False
+                except OSError:
+                    continue  # supprimée pendant le parcours
+        if reused and fresh.keys() == entries.keys():
+            return entries  # rien de nouveau : l'index sur disque reste valable
+        zones[policy.name] = {"root": policy.root, "root_mtime_ns": root_mtime, "entries": fresh}
+        self._dirty = True
+        return fresh
+
+    def _entry_path(self, policy: RetentionPolicy, name: str, entry: Dict[str, Any]) -> str:
+        path = os.path.join(policy.root, name)
+        if entry["tier"] == "cold":
+            path += COLD_DIR_SUFFIX if entry.get("is_dir") else COLD_FILE_SUFFIX
+        return path
+
+    # ---- listings
+    def entries(self, zone: str) -> List[Dict[str, Any]]:
+        """Entrées d'une zone (les plus récentes d'abord), depuis l'index"""
+        policy = self.policies[zone]
+        with self._lock:
+            entries = self._scan(policy)
+            self._save_index()
+            return sorted(({"name": n, **e} for n, e in entries.items()), key=lambda e: e["mtime"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        zones = {}
+        with self._lock:
+            for policy in self.policies.values():
+                entries = self._scan(policy)
+                zones[policy.name] = {
+                    "root": policy.root,
+                    "entries": len(entries),
+                    "cold_entries": sum(1 for e in entries.values() if e["tier"] == "cold"),
+                    "size_mb": round(sum(e["size"] for e in entries.values()) / (1024 * 1024), 2),
+                    "quota_mb": policy.quota_mb,
+                }
+            self._save_index()
+        return {"zones": zones, "last_compaction": self.last_compaction}
+
+    # ---- tiers
+    def _compress(self, policy: RetentionPolicy, name: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        src = os.path.join(policy.root, name)
+        dst = src + (COLD_DIR_SUFFIX if entry.get("is_dir") else COLD_FILE_SUFFIX)
+        tmp = os.path.join(policy.root, f".{name}.cold-tmp")
+        if entry.get("is_dir"):
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+                for root, _, files in os.walk(src):
+                    for f in files:
+                        full = os.path.join(root, f)
+                        zf.write(full, os.path.relpath(full, src))
+        else:
+            with open(src, "rb") as fin, gzip.open(tmp, "wb") as fout:
+                shutil.copyfileobj(fin, fout)
+        os.utime(tmp, (entry["mtime"], entry["mtime"]))  # l'âge de l'entrée ne repart pas de zéro
+        os.replace(tmp, dst)
+        if entry.get("is_dir"):
+            shutil.rmtree(src)
+        else:
+            os.remove(src)
+        return self._describe(dst, True, entry)
+
+    def thaw(self, zone: str, name: str) -> Optional[str]:
+        """Ramène une entrée froide au niveau chaud ; renvoie son chemin, None si elle n'existe pas"""
+        policy = self.policies[zone]
+        if os.path.basename(name) != name or name in ("", ".", ".."):
+            return None
+        hot = os.path.join(policy.root, name)
+        with self._lock:
+            if os.path.exists(hot):
+                return hot
+            tmp = os.path.join(policy.root, f".{name}.thaw-tmp")
+            if os.path.exists(hot + COLD_DIR_SUFFIX):
+                archive = hot + COLD_DIR_SUFFIX
+                with zipfile.ZipFile(archive) as zf:
+                    zf.extractall(tmp)
+            elif os.path.exists(hot + COLD_FILE_SUFFIX):
+                archive = hot + COLD_FILE_SUFFIX
+                with gzip.open(archive, "rb") as fin, open(tmp, "wb") as fout:
+                    shutil.copyfileobj(fin, fout)
+            else:
+                return None
+            os.replace(tmp, hot)
+            os.remove(archive)
+            zone_state = self._index["zones"].get(zone)
+            if zone_state is not None:
+                zone_state["entries"][name] = self._describe(hot, False)
+                self._dirty = True
+            self._save_index()
+            logger.info(f"Stockage: {zone}/{name} restaure depuis le niveau froid")
+            return hot
+
+    # ---- compaction
+    def _remove(self, policy: RetentionPolicy, name: str, entry: Dict[str, Any]) -> int:
+        path = self._entry_path(policy, name, entry)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return entry["size"]
+
+    def compact_zone(self, zone: str, now: Optional[float] = None) -> Dict[str, int]:
+        """Orphelins, âge, compression puis quota pour une zone"""
+        policy = self.policies[zone]
+        now = now if now is not None else time.time()
+        protected = {os.path.abspath(p) for p in self._protected()}
+        report = {"deleted": 0, "compressed": 0, "freed_bytes": 0}
+        with self._lock:
+            entries = self._scan(policy)
+            for name, entry in sorted(entries.items(), key=lambda kv: kv[1]["mtime"]):
+                age_s = now - entry["mtime"]
+                if age_s < SETTLE_S or os.path.abspath(os.path.join(policy.root, name)) in protected:
+                    continue
+                expired = policy.max_age_days is not None and age_s > policy.max_age_days * DAY_S
+                try:
+                    if expired or policy.owner_missing(name):
+                        report["freed_bytes"] += self._remove(policy, name, entry)
+                        report["deleted"] += 1
+                        del entries[name]
+                    elif (entry["tier"] == "hot" and not policy.derived and policy.compress_after_days is not None
+                          and age_s > policy.compress_after_days * DAY_S):
+                        cold = self._compress(policy, name, entry)
+                        report["freed_bytes"] += max(0, entry["size"] - cold["size"])
+                        report["compressed"] += 1
+                        entries[name] = cold
+                except OSError as e:
+                    logger.warning(f"Stockage: echec sur {zone}/{name}: {e}")
+                self._dirty = True
+
+            if policy.quota_mb is not None:
+                limit = policy.quota_mb * 1024 * 1024
+                total = sum(e["size"] for e in entries.values())
+                for name, entry in sorted(entries.items(), key=lambda kv: kv[1]["mtime"]):
+                    if total <= limit:
+                        break
+                    if now - entry["mtime"] < SETTLE_S or os.path.abspath(os.path.join(policy.root, name)) in protected:
+                        continue
+                    freed = self._remove(policy, name, entry)
+                    total -= freed
+                    report["freed_bytes"] += freed
+                    report["deleted"] += 1
+                    del entries[name]
+                    self._dirty = True
+            self._save_index()
+        return report
+
+    def compact(self) -> Dict[str, Any]:
+        """Passe de compaction sur toutes les zones"""
+        started = time.time()
+        zones = {}
+        for zone in self.policies:
+            try:
+                zones[zone] = self.compact_zone(zone)
+            except Exception as e:
+                logger.error(f"Stockage: compaction de {zone} echouee: {e}")
+                zones[zone] = {"error": str(e)}
+        self.last_compaction = {"at": started, "duration_s": round(time.time() - started, 3), "zones": zones}
+        freed = sum(z.get("freed_bytes", 0) for z in zones.values())
+        logger.info(f"Stockage: compaction terminee, {freed / (1024 * 1024):.1f} Mo liberes")
+        return self.last_compaction
+
+    # ---- tâche de fond
+    def start(self, interval_s: float = 3600):
+        """Lance la compaction périodique dans un thread (première passe immédiate)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.is_set():
+                self.compact()
+                self._stop.wait(interval_s)
+
+        self._thread = threading.Thread(target=_loop, name="storage-compaction", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("pandas")
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+
+def bim_data(analysis_date):
+    return {
+        "project_metadata": {"project_id": "p1", "project_name": "Demo", "analysis_date": analysis_date},
+        "performance_kpis": {"total_elements": 10},
+        "quality_metrics": {},
+        "element_counts": {"IfcWall": 5, "IfcSlab": 3, "IfcDoor": 2},
+    }
+
+
+def test_interrupted_export_resumes_from_saved_batch(tmp_path, monkeypatch):
+    # L'import instancie bi_manager, qui crée bi_sync.db dans le répertoire courant
+    monkeypatch.chdir(tmp_path)
+    import bi_integration
+    from bi_integration import BIConnector, SupersetConnector
+
+    progress_dir = tmp_path / "progress"
+    monkeypatch.setattr(SupersetConnector, "progress_dir", progress_dir)
+    posted = []
+    fail_on = {"IfcSlab"}
+
+    async def fake_post(config, url, headers=None, json=None):
+        rows = json["rows"]
+        if any(row.get("ElementType") in fail_on for row in rows):
+            return FakeResponse(500)
+        posted.extend(rows)
+        return FakeResponse(200)
+
+    monkeypatch.setattr(bi_integration.bi_http_client, "post", fake_post)
+    connector = SupersetConnector(BIConnector("superset-test", "powerbi", "http://bi", {}, max_concurrency=1))
+    connector._store_token("token", datetime.max)
+
+    first = connector.format_data_for_powerbi(bim_data(datetime.now().isoformat()))
+    result = asyncio.run(connector.insert_data_to_dataset("ds", first, batch_size=1))
+    assert not result["success"] and result["resumable"]
+    assert [row.get("ElementType") for row in posted] == [None, "IfcWall"]
+
+    # Nouvelle extraction : seule la date d'analyse change
+    posted.clear()
+    fail_on.clear()
+    second = connector.format_data_for_powerbi(bim_data((datetime.now() + timedelta(minutes=5)).isoformat()))
+    result = asyncio.run(connector.insert_data_to_dataset("ds", second, batch_size=1))
+    assert result["success"]
+    assert result["batches_skipped"] == 2
+    assert [row["ElementType"] for row in posted] == ["IfcSlab", "IfcDoor"]
+    assert not list(progress_dir.iterdir())
@@ -0,0 +1,53 @@
+import pytest
+
+from bi_sync_store import BISyncStore, StaleDeltaError, SyncHistory
+
+
+def bim_data(walls=5):
+    return {
+        "element_counts": {"IfcWall": walls, "IfcDoor": 2},
+        "space_analysis": {"Bureau": {"area": 20.0}},
+        "material_breakdown": {"Beton": 12.5},
+    }
+
+
+def test_commit_only_sent_tables(tmp_path):
+    store = BISyncStore(tmp_path / "sync.db")
+    delta = store.compute_delta("p1", "superset", bim_data())
+    store.commit_delta(delta, ["elements"])
+
+    delta = store.compute_delta("p1", "superset", bim_data())
+    assert delta["summary"]["elements"] == {"inserted": 0, "updated": 0, "deleted": 0}
+    assert delta["summary"]["spaces"]["inserted"] == 1
+    assert delta["summary"]["materials"]["inserted"] == 1
+    assert delta["from_watermark"]["version"] == 1
+
+
+def test_stale_delta_is_rejected(tmp_path):
+    store = BISyncStore(tmp_path / "sync.db")
+    first = store.compute_delta("p1", "erp", bim_data())
+    second = store.compute_delta("p1", "erp", bim_data(walls=6))
+    assert store.commit_delta(first)["version"] == 1
+
+    with pytest.raises(StaleDeltaError):
+        store.commit_delta(second)
+    assert store.get_watermark("p1", "erp")["version"] == 1
+
+    # Recalculé depuis l'instantané courant, le delta s'applique
+    recomputed = store.compute_delta("p1", "erp", bim_data(walls=6))
+    assert recomputed["summary"]["elements"]["updated"] == 1
+    assert store.commit_delta(recomputed)["version"] == 2
+
+
+def test_history_is_paged_and_bounded(tmp_path):
+    history = SyncHistory(BISyncStore(tmp_path / "sync.db"), max_entries=5)
+    for i in range(8):
+        history.append({"n": i, "platform": "ERP" if i % 2 else "PowerBI",
+                        "status": "success" if i < 6 else "error"})
+
+    assert len(history) == 5
+    assert [entry["n"] for entry in history.recent(3)] == [5, 6, 7]
+    assert history.platform_statistics() == {
+        "ERP": {"total": 3, "success": 2},
+        "PowerBI": {"total": 2, "success": 1},
+    }
@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+import project_catalog
+from project_catalog import ProjectCatalog, UPLOADS, VIEWER
+
+
+def write(path, content=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def tree(tmp_path):
+    write(tmp_path / "uploads" / "a.ifc")
+    write(tmp_path / "projects" / "P1" / "models" / "model" / "m.xkt")
+    write(tmp_path / "legacy" / "L1" / "models" / "old.ifc")
+    for name in ("Demo", "Other"):
+        write(tmp_path / "viewer" / name / "index.json", json.dumps({"name": name}))
+    return tmp_path
+
+
+def make_catalog(root):
+    return ProjectCatalog(root / "uploads", root / "projects", root / "legacy", root / "viewer",
+                          root / "viewer" / "index.json", lambda: {"projects": [{"id": "Demo", "name": "Démo"}]})
+
+
+def names(files):
+    return sorted(f["name"] for f in files)
+
+
+def test_fs_event_invalidates_only_touched_section(tree):
+    catalog = make_catalog(tree)
+    catalog.refresh()
+    assert names(catalog.list_files()) == ["a.ifc", "m.xkt", "old.ifc"]
+    versions = dict(catalog._versions)
+
+    new_file = write(tree / "uploads" / "b.ifc")
+    assert names(catalog.list_files()) == ["a.ifc", "m.xkt", "old.ifc"]  # servi depuis le cache
+
+    catalog._on_fs_event(str(tree / "uploads" / "notes.txt"), False)
+    assert catalog._versions == versions
+
+    catalog._on_fs_event(str(new_file), False)
+    assert names(catalog.list_files()) == ["a.ifc", "b.ifc", "m.xkt", "old.ifc"]
+    catalog.scan_projects()
+    assert catalog._versions[UPLOADS] == versions[UPLOADS] + 1
+    assert {k: v for k, v in catalog._versions.items() if k != UPLOADS} == \
+        {k: v for k, v in versions.items() if k != UPLOADS}
+
+
+def test_polling_fallback_without_watchdog(tree, monkeypatch):
+    monkeypatch.setattr(project_catalog, "WATCHDOG_AVAILABLE", False)
+    catalog = make_catalog(tree)
+    catalog.start(poll_interval_s=3600)
+    try:
+        assert catalog._observer is None
+        assert [p["id"] for p in catalog.xeokit_projects()] == ["Demo", "Other"]
+
+        write(tree / "viewer" / "New" / "index.json", json.dumps({"name": "New"}))
+        write(tree / "projects" / "P1" / "models" / "model" / "m2.xkt")
+        catalog.poll()
+        assert [p["id"] for p in catalog.xeokit_projects()] == ["Demo", "New", "Other"]
+        assert "m2.xkt" in names(catalog.list_files())
+
+        versions = dict(catalog._versions)
+        catalog.poll()  # rien n'a changé
+        catalog.list_files()
+        assert catalog._versions == versions
+    finally:
+        catalog.stop()
+
+
+def test_only_changed_index_json_is_reread(tree, monkeypatch):
+    catalog = make_catalog(tree)
+    catalog.refresh()
+
+    reads = []
+    original_load = json.load
+    monkeypatch.setattr(project_catalog.json, "load", lambda f: reads.append(f.name) or original_load(f))
+
+    changed = write(tree / "viewer" / "Demo" / "index.json", json.dumps({"name": "Demo v2"}))
+    stat = os.stat(changed)
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    catalog._on_fs_event(str(changed), False)
+
+    projects = {p["id"]: p["name"] for p in catalog.xeokit_projects()}
+    assert projects == {"Demo": "Demo v2", "Other": "Other"}
+    assert reads == [str(changed)]
+    assert catalog._versions[VIEWER] == 2
+
+
+def test_vanished_model_is_skipped(tree):
+    os.symlink(tree / "missing.ifc", tree / "uploads" / "dangling.ifc")
+    catalog = make_catalog(tree)
+    assert names(catalog.list_files()) == ["a.ifc", "m.xkt", "old.ifc"]
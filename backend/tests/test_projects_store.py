@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+
+from projects_store import ProjectsStore
+
+
+def project(i):
+    return {"id": f"p{i}", "name": f"Projet {i}"}
+
+
+def open_store(tmp_path):
+    return ProjectsStore(tmp_path / "projects.db", tmp_path / "viewer" / "index.json")
+
+
+def read_index(tmp_path):
+    with open(tmp_path / "viewer" / "index.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_duplicate_add_is_ignored(tmp_path):
+    store = open_store(tmp_path)
+    assert store.add(project(1))
+    assert not store.add({"id": "p1", "name": "Autre nom"})
+    assert store.all_projects() == [project(1)]
+    assert store.exists("p1") and not store.exists("p2")
+
+
+def test_concurrent_adds_keep_every_project(tmp_path):
+    store = open_store(tmp_path)
+    added = []
+
+    def worker(start):
+        for i in range(start, start + 20):
+            added.append(store.add(project(i)))
+            added.append(store.add(project(i % 10)))
+
+    threads = [threading.Thread(target=worker, args=(n * 20,)) for n in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ids = [p["id"] for p in store.all_projects()]
+    assert sorted(ids) == sorted(f"p{i}" for i in range(100))
+    assert sum(added) == 100
+    assert [p["id"] for p in read_index(tmp_path)["projects"]] == ids
+
+
+def test_index_json_follows_every_change(tmp_path):
+    store = open_store(tmp_path)
+    store.add(project(1))
+    store.add(project(2))
+    assert read_index(tmp_path) == {"projects": [project(1), project(2)]}
+    store.remove("p1")
+    assert read_index(tmp_path) == {"projects": [project(2)]}
+    assert not [p for p in os.listdir(tmp_path / "viewer") if p.endswith(".tmp")]
+
+
+def test_external_edit_is_reimported(tmp_path):
+    store = open_store(tmp_path)
+    store.add(project(1))
+
+    # Redémarrage sans modification: la base fait foi
+    assert open_store(tmp_path).all_projects() == [project(1)]
+
+    index_path = tmp_path / "viewer" / "index.json"
+    index_path.write_text(json.dumps({"projects": [project(3), project(2), project(3)]}), encoding="utf-8")
+    stat = os.stat(index_path)
+    os.utime(index_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reopened = open_store(tmp_path)
+    assert reopened.all_projects() == [project(3), project(2)]
+    assert reopened.get("p1") is None
@@ -0,0 +1,49 @@
+import pytest
+
+from semantic_cache import SemanticResponseCache
+
+MODEL = "model-a"
+
+
+def test_hit_on_reformulation_and_miss_on_other_model():
+    cache = SemanticResponseCache()
+    cache.put(MODEL, "Combien de murs dans le modèle ?", "12 murs")
+    assert cache.get(MODEL, "Combien y a-t-il de murs ?") == "12 murs"
+    assert cache.get("model-b", "Combien de murs dans le modèle ?") is None
+    assert cache.get(MODEL, "Quelle est la surface des dalles ?") is None
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 1
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = SemanticResponseCache(max_entries=2)
+    cache.put(MODEL, "Combien de murs ?", "murs")
+    cache.put(MODEL, "Combien de portes ?", "portes")
+    assert cache.get(MODEL, "Combien de murs ?") == "murs"
+    cache.put(MODEL, "Combien de fenêtres ?", "fenetres")
+    assert cache.get(MODEL, "Combien de portes ?") is None
+    assert cache.get(MODEL, "Combien de murs ?") == "murs"
+    assert cache.get(MODEL, "Combien de fenêtres ?") == "fenetres"
+    assert cache.get_stats()["evictions"] == 1
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Combien de portes au niveau 1 ?", "Combien de portes au niveau 2 ?"),
+    ("How many doors on storey 1?", "How many doors on storey 4?"),
+    ("Les murs sont-ils conformes ?", "Les murs ne sont-ils pas conformes ?"),
+    ("Is the wall compliant?", "Is the wall not compliant?"),
+    ("Les espaces sans fenêtre", "Les espaces avec fenêtre"),
+])
+def test_near_duplicates_with_different_numbers_or_negation_miss(cached, asked):
+    cache = SemanticResponseCache(similarity_threshold=0.5)
+    cache.put(MODEL, cached, "answer")
+    assert cache.get(MODEL, asked) is None
+
+
+def test_clear_single_model():
+    cache = SemanticResponseCache()
+    cache.put(MODEL, "Combien de murs ?", "a")
+    cache.put("model-b", "Combien de murs ?", "b")
+    cache.clear(MODEL)
+    assert cache.get(MODEL, "Combien de murs ?") is None
+    assert cache.get("model-b", "Combien de murs ?") == "b"
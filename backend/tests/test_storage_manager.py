@@ -0,0 +1,129 @@
+import os
+import time
+from dataclasses import replace
+
+import pytest
+
+import storage_manager
+from storage_manager import COLD_DIR_SUFFIX, COLD_FILE_SUFFIX, DAY_S, RetentionPolicy, StorageManager
+
+
+def make_entry(root, name, age_s, size=1024, is_dir=False):
+    path = root / name
+    if is_dir:
+        path.mkdir(parents=True)
+        (path / "data.bin").write_bytes(b"x" * size)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+    mtime = time.time() - age_s
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def manager(tmp_path, *policies, protected=None):
+    return StorageManager(policies, index_path=str(tmp_path / "index.json"), protected=protected)
+
+
+def test_entries_older_than_max_age_are_deleted(tmp_path):
+    root = tmp_path / "zone"
+    old = make_entry(root, "old.pdf", 2 * DAY_S)
+    new = make_entry(root, "new.pdf", 3600)
+    sm = manager(tmp_path, RetentionPolicy("z", str(root), max_age_days=1))
+
+    report = sm.compact_zone("z")
+    assert report["deleted"] == 1 and report["freed_bytes"] == 1024
+    assert not old.exists() and new.exists()
+    assert [e["name"] for e in sm.entries("z")] == ["new.pdf"]
+
+
+def test_quota_evicts_oldest_first(tmp_path):
+    root = tmp_path / "zone"
+    for name, age in (("a", 3 * 3600), ("b", 2 * 3600), ("c", 3600)):
+        make_entry(root, name, age)
+    sm = manager(tmp_path, RetentionPolicy("z", str(root), quota_mb=1536 / (1024 * 1024)))
+
+    report = sm.compact_zone("z")
+    assert report["deleted"] == 2
+    assert sorted(p.name for p in root.iterdir()) == ["c"]
+
+
+def test_recent_entries_are_left_alone(tmp_path):
+    root = tmp_path / "zone"
+    settling = make_entry(root, "writing.pdf", storage_manager.SETTLE_S / 2)
+    sm = manager(tmp_path, RetentionPolicy("z", str(root), max_age_days=0, quota_mb=0))
+
+    assert sm.compact_zone("z")["deleted"] == 0
+    assert settling.exists()
+
+
+def test_protected_paths_are_kept(tmp_path):
+    root = tmp_path / "zone"
+    in_use = make_entry(root, "in_use.ifc", 2 * DAY_S)
+    stale = make_entry(root, "stale.ifc", 2 * DAY_S)
+    sm = manager(tmp_path, RetentionPolicy("z", str(root), max_age_days=1), protected=lambda: [str(in_use)])
+
+    assert sm.compact_zone("z")["deleted"] == 1
+    assert in_use.exists() and not stale.exists()
+
+
+def test_ocr_results_without_upload_are_deleted(tmp_path):
+    uploads, results = tmp_path / "uploads", tmp_path / "results"
+    make_entry(uploads, "kept", 3600, is_dir=True)
+    kept = [make_entry(results, "kept.json", 3600), make_entry(results, "kept_pages", 3600, is_dir=True)]
+    orphans = [make_entry(results, "gone.json", 3600), make_entry(results, "gone_pages", 3600, is_dir=True)]
+    make_entry(results, "notes.txt", 3600)  # hors du motif de la zone
+    default = next(p for p in storage_manager.default_policies() if p.name == "ocr_results")
+    sm = manager(tmp_path, replace(default, root=str(results), owner_root=str(uploads)))
+
+    assert sm.compact_zone("ocr_results")["deleted"] == 2
+    assert all(p.exists() for p in kept) and not any(p.exists() for p in orphans)
+    assert (results / "notes.txt").exists()
+
+
+def test_compress_then_thaw_round_trip(tmp_path):
+    root = tmp_path / "reports"
+    report_dir = make_entry(root, "report_1", 40 * DAY_S, is_dir=True)
+    (report_dir / "summary.txt").write_text("contenu")
+    os.utime(report_dir, (time.time() - 40 * DAY_S,) * 2)
+    make_entry(root, "report_2.pdf", 40 * DAY_S, size=4096)
+    sm = manager(tmp_path, RetentionPolicy("reports", str(root), compress_after_days=30))
+
+    assert sm.compact_zone("reports")["compressed"] == 2
+    assert sorted(p.name for p in root.iterdir()) == ["report_1" + COLD_DIR_SUFFIX, "report_2.pdf" + COLD_FILE_SUFFIX]
+    entries = {e["name"]: e for e in sm.entries("reports")}
+    assert entries["report_1"]["tier"] == "cold"
+    assert sorted(f["name"] for f in entries["report_1"]["files"]) == ["data.bin", "summary.txt"]
+
+    thawed = sm.thaw("reports", "report_1")
+    assert (root / "report_1" / "summary.txt").read_text() == "contenu"
+    assert thawed == str(root / "report_1")
+    assert sm.thaw("reports", "report_2.pdf") == str(root / "report_2.pdf")
+    assert (root / "report_2.pdf").read_bytes() == b"x" * 4096
+    assert {e["name"]: e["tier"] for e in sm.entries("reports")} == {"report_1": "hot", "report_2.pdf": "hot"}
+    assert sm.thaw("reports", "../reports") is None
+
+
+def test_unchanged_zone_reuses_index(tmp_path, monkeypatch):
+    root = tmp_path / "zone"
+    make_entry(root, "a.pdf", DAY_S)
+    make_entry(root, "b", DAY_S, is_dir=True)
+    sm = manager(tmp_path, RetentionPolicy("z", str(root)))
+    first = sm.entries("z")
+    index_mtime = os.stat(tmp_path / "index.json").st_mtime_ns
+
+    # Nouvelle instance: l'index sur disque suffit, aucune entrée n'est redécrite
+    sm = manager(tmp_path, RetentionPolicy("z", str(root)))
+    described = []
+    original = sm._describe
+    monkeypatch.setattr(sm, "_describe", lambda *args: described.append(args[0]) or original(*args))
+    assert sm.entries("z") == first
+    assert described == []
+    assert os.stat(tmp_path / "index.json").st_mtime_ns == index_mtime
+
+    # Un fichier ajouté dans un dossier ne fait redécrire que ce dossier
+    (root / "b" / "new.bin").write_bytes(b"y")
+    os.utime(root / "b", (time.time() - DAY_S,) * 2)
+    os.utime(root / "b" / "new.bin", (time.time() - DAY_S,) * 2)
+    assert {f["name"] for f in next(e for e in sm.entries("z") if e["name"] == "b")["files"]} == {"data.bin", "new.bin"}
+    assert described == [str(root / "b")]